@@ -0,0 +1,28 @@
+"""Quality profile per task
+
+Revision ID: 002_quality_profile
+Revises: 001_initial
+Create Date: 2026-10-19
+
+Records the effective quality profile (fast, balanced, accurate) each task
+ran with and why it was chosen (requested, default or auto step-down).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002_quality_profile'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('transcription_tasks', sa.Column('profile', sa.String(20), nullable=True))
+    op.add_column('transcription_tasks', sa.Column('profile_reason', sa.String(200), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('transcription_tasks', 'profile_reason')
+    op.drop_column('transcription_tasks', 'profile')
@@ -0,0 +1,28 @@
+"""Timestamped segments per task
+
+Revision ID: 003_task_segments
+Revises: 002_quality_profile
+Create Date: 2026-10-19
+
+Stores each task's segments (start/end, text offsets, confidence) as a
+compressed binary blob written by app/services/segment_store.py. Subtitle
+export, click-to-seek and rule-hit timestamps read it instead of
+re-transcribing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003_task_segments'
+down_revision = '002_quality_profile'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('transcription_tasks', sa.Column('segments', sa.LargeBinary, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('transcription_tasks', 'segments')
@@ -0,0 +1,31 @@
+"""Audio metadata probed at upload
+
+Revision ID: 004_audio_metadata
+Revises: 003_task_segments
+Create Date: 2026-10-19
+
+Codec, sample rate and channel count read from the file header when the
+task is created (app/services/audio_probe.py). The probed duration goes to
+the existing 'duration' column.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_audio_metadata'
+down_revision = '003_task_segments'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('transcription_tasks', sa.Column('codec', sa.String, nullable=True))
+    op.add_column('transcription_tasks', sa.Column('sample_rate', sa.Integer, nullable=True))
+    op.add_column('transcription_tasks', sa.Column('channels', sa.Integer, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('transcription_tasks', 'channels')
+    op.drop_column('transcription_tasks', 'sample_rate')
+    op.drop_column('transcription_tasks', 'codec')
@@ -6,11 +6,21 @@ from app.database import get_db
 from app.core.config import settings, logger
 from app.core.services import whisper_service
 from app.schemas import RuleCreate, UpdateUserLimitRequest
+import asyncio
 import os
 import uuid
 
 router = APIRouter()
 
+
+async def _cancel_jobs(task_ids: list):
+    """Cancel queued jobs / flag running ones of tasks about to be deleted"""
+    if not task_ids:
+        return
+    from app.core.cancellation import job_canceller
+    await asyncio.to_thread(job_canceller.cancel, task_ids)
+
+
 @router.get("/logs")
 async def get_logs(limit: int = 100, current_user: models.User = Depends(auth.require_admin)):
     log_file = "/app/data/app.log"
@@ -102,13 +112,17 @@ async def delete_user(user_id: str, db: Session = Depends(get_db), current_user:
     if user and user.username.lower() == "admin":
         raise HTTPException(status_code=403, detail="O usuário 'admin' não pode ser excluído")
     
-    crud.TaskStore(db).delete_user(user_id)
+    task_store = crud.TaskStore(db)
+    await _cancel_jobs(task_store.active_task_ids(owner_id=user_id))
+    task_store.delete_user(user_id)
     return {"message": "User deleted"}
 
 @router.post("/history/clear")
 async def clear_history(db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
     task_store = crud.TaskStore(db)
     if current_user.is_admin: 
+        # Limpeza total inclui tarefas na fila/em execução: cancelar os jobs antes
+        await _cancel_jobs(task_store.active_task_ids())
         deleted = task_store.clear_all_history()
     else: 
         deleted = task_store.clear_history(current_user.id)
@@ -276,6 +290,8 @@ async def get_cache_stats(current_user: models.User = Depends(auth.require_admin
         - total_keys: Total cached items
         - transcription_keys: Cached transcriptions
         - analysis_keys: Cached analyses
+        - generic_keys: Other cached values
+        - *_bytes / total_bytes: Stored (compressed) size per namespace
         - used_memory_mb: Redis memory usage
         - connected: Redis connection status
     """
@@ -295,6 +311,38 @@ async def get_cache_stats(current_user: models.User = Depends(auth.require_admin
             "stats": {}
         }
 
+@router.get("/admin/queue/fair-share")
+async def get_fair_share_stats(current_user: models.User = Depends(auth.require_admin)):
+    """
+    Per-user fair-share queue state.
+    
+    Returns:
+        - ready_jobs / ready_depth: Jobs in RQ and the dispatch target
+        - users: pending jobs, pending audio seconds and credit per user
+    """
+    try:
+        from app.core.fair_share import fair_share
+        return {"status": "success", "stats": fair_share.get_stats()}
+    except Exception as e:
+        logger.error(f"Failed to get fair-share stats: {e}")
+        return {"status": "error", "message": str(e), "stats": {}}
+
+@router.post("/admin/queue/reap")
+async def reap_stuck_jobs(current_user: models.User = Depends(auth.require_admin)):
+    """
+    Run the stuck-job reaper now (it also runs in the workers' maintenance loop).
+    
+    Returns:
+        - requeued / failed / reconciled: Task counts of this pass
+    """
+    try:
+        from app.core.reaper import job_reaper
+        counts = await asyncio.to_thread(job_reaper.reap)
+        return {"status": "success", **counts}
+    except Exception as e:
+        logger.error(f"Reaper failed: {e}")
+        return {"status": "error", "message": str(e)}
+
 @router.post("/admin/cache/clear")
 async def clear_cache(
     cache_type: str = "all",  # all, transcriptions, analysis
@@ -24,6 +24,7 @@ from app.core.config import settings, logger
 from app.database import get_db
 from app.validation import FileValidator
 from app.core.queue import task_queue
+from app.services.audio_probe import InvalidAudioError, probe_content_async, probe_file_async
 
 # Note: We need the whisper_service instance. 
 # I will initialize it in `app.core.services` in the next step.
@@ -31,16 +32,68 @@ from app.core.services import whisper_service
 
 router = APIRouter()
 
+
+def _clean_display_name(raw_name: str):
+    """
+    Display name shown in history, cleaned of upload clutter.
+    Returns (clean_base, ext).
+    """
+    import re
+    
+    # 1. Cleaning: Remove digits and underscores that look like clutter
+    # Strategy: Replace underscores with space, remove digits, strip.
+    # Remove extension for processing
+    base, ext = os.path.splitext(raw_name)
+    
+    # Replace _ with space
+    clean_base = base.replace("_", " ")
+    
+    # Remove digits (often random IDs like 12345_Name)
+    # Be careful not to kill "Number 5", but user asked for "random numbers".
+    # Regex: Remove isolated number blocks or numbers at start/end
+    clean_base = re.sub(r'\b\d+\b', '', clean_base) # Remove standalone numbers
+    clean_base = re.sub(r'^\d+|\d+$', '', clean_base) # Remove start/end numbers
+    
+    # Remove 'Resgate' (case insensitive)
+    clean_base = re.sub(r'(?i)resgate', '', clean_base)
+    
+    # Clean standardizing spaces
+    clean_base = " ".join(clean_base.split())
+    if not clean_base: clean_base = "Audio" # Fallback if empty
+    
+    return clean_base, ext
+
+
+def _upload_options(timestamp: bool, diarization: bool, profile: Optional[str], denoise: Optional[bool] = None) -> dict:
+    """
+    Opções da tarefa; perfil de qualidade e redução de ruído (se informados) entram na chave de cache.
+    denoise: True/False força ligar/desligar; ausente = automático pelo SNR (DENOISE_AUTO)
+    """
+    from app.services.quality import QUALITY_PROFILES
+    
+    options = {"timestamp": timestamp, "diarization": diarization}
+    if denoise is not None:
+        options["denoise"] = denoise
+    if profile:
+        if profile not in QUALITY_PROFILES:
+            raise HTTPException(400, f"Perfil inválido: {profile}. Use um de: {', '.join(QUALITY_PROFILES)}")
+        options["profile"] = profile
+    return options
+
+
 @router.post("/upload")
 async def upload_audio(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user),
-    timestamp: bool = Form(True),
-    diarization: bool = Form(True)
+    timestamp: bool = Form(False),
+    diarization: bool = Form(False),
+    profile: Optional[str] = Form(None),
+    denoise: Optional[bool] = Form(None)
 ):
     task_store = crud.TaskStore(db)
+    options = _upload_options(timestamp, diarization, profile, denoise)
     
     # Check limits if not admin
     if not current_user.is_admin:
@@ -58,31 +111,19 @@ async def upload_audio(
         logger.error(f"File validation error: {e}")
         raise HTTPException(400, f"Erro na validação do arquivo: {str(e)}")
 
+    # Read content properly before response (fixes closed file error in background task)
+    file_content = await file.read()
+
+    # Probe the header (duration/codec) and reject undecodable audio before any task exists.
+    # None = container left to ffprobe, which runs on the saved file below
+    try:
+        audio_info = await probe_content_async(file_content)
+    except InvalidAudioError as e:
+        logger.warning(f"❌ Rejected {file.filename}: {e}")
+        raise HTTPException(400, f"Arquivo de áudio inválido: {str(e)}")
+
     # --- Filename Sanitization & Collision Handling ---
-    import re
-    
-    # 1. Cleaning: Remove digits and underscores that look like clutter
-    # Strategy: Replace underscores with space, remove digits, strip.
-    raw_name = file.filename
-    # Remove extension for processing
-    base, ext = os.path.splitext(raw_name)
-    
-    # Replace _ with space
-    clean_base = base.replace("_", " ")
-    
-    # Remove digits (often random IDs like 12345_Name)
-    # Be careful not to kill "Number 5", but user asked for "random numbers".
-    # Regex: Remove isolated number blocks or numbers at start/end
-    clean_base = re.sub(r'\b\d+\b', '', clean_base) # Remove standalone numbers
-    clean_base = re.sub(r'^\d+|\d+$', '', clean_base) # Remove start/end numbers
-    
-    # Remove 'Resgate' (case insensitive)
-    clean_base = re.sub(r'(?i)resgate', '', clean_base)
-    
-    # Clean standardizing spaces
-    clean_base = " ".join(clean_base.split())
-    if not clean_base: clean_base = "Audio" # Fallback if empty
-    
+    clean_base, ext = _clean_display_name(file.filename)
     final_display_name = clean_base + ext
     
     # 2. Collision Detection (Append _2, _3...)
@@ -113,20 +154,18 @@ async def upload_audio(
     file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
     
     # Create task FIRST (DB record)
-    options = {"timestamp": timestamp, "diarization": diarization}
     task = task_store.create_task(
         filename=final_display_name,
         file_path=file_path,
         owner_id=current_user.id,
-        options=options
+        options=options,
+        audio_info=audio_info
     )
-    
-    # Read content properly before response (fixes closed file error in background task)
-    file_content = await file.read()
 
     # Save file AND enqueue AFTER successful save (fixes race condition)
     async def save_and_enqueue(content):
         """Save uploaded file and enqueue ONLY after successful save"""
+        info = audio_info
         try:
             # 2. Write to disk (runs in thread pool to not block event loop)
             import aiofiles
@@ -135,8 +174,19 @@ async def upload_audio(
             
             logger.info(f"✅ File saved: {unique_filename}")
             
+            # Formats without a header parser (M4A, WebM...): ffprobe the saved file
+            if info is None:
+                try:
+                    info = await probe_file_async(file_path)
+                except InvalidAudioError as e:
+                    logger.warning(f"❌ Rejected {unique_filename}: {e}")
+                    os.remove(file_path)
+                    task_store.update_status(task.task_id, "failed", error_message=f"Arquivo de áudio inválido: {str(e)}")
+                    return
+                task_store.set_audio_info(task.task_id, info)
+            
             # 3. ONLY NOW enqueue for processing (guarantees file exists)
-            await task_queue.put((task.task_id, file_path, options))
+            await task_queue.put((task.task_id, file_path, options, current_user.id), duration=info.duration)
             logger.info(f"✅ Task enqueued: {task.task_id}")
             
         except Exception as e:
@@ -163,6 +213,179 @@ async def upload_audio(
         "status_url": f"/api/status/{task.task_id}"
     }
 
+def _discard_uploads(paths):
+    """Remove uploaded files that will not get a task (missing files are ignored)"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove {path}: {e}")
+
+
+def _copy_upload(src, dest_path: str):
+    """Copy a spooled upload to disk in 1MB chunks (never whole-file in memory)"""
+    src.seek(0)
+    with open(dest_path, 'wb') as out:
+        shutil.copyfileobj(src, out, length=1024 * 1024)
+
+
+@router.post("/upload/batch")
+async def upload_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user),
+    timestamp: bool = Form(False),
+    diarization: bool = Form(False),
+    profile: Optional[str] = Form(None),
+    denoise: Optional[bool] = Form(None)
+):
+    """
+    Upload many audio files in one multipart request.
+    
+    One limit check, one collision query, one bulk INSERT and one Redis
+    pipeline for the whole batch; files are written to disk concurrently.
+    Invalid files are reported per file without failing the others.
+    
+    Returns:
+        tasks: [{filename, task_id, status_url}] or [{filename, error}] in upload order
+    """
+    from sqlalchemy import or_
+    
+    if len(files) > settings.BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(400, f"Máximo de {settings.BATCH_UPLOAD_MAX_FILES} arquivos por envio")
+    options = _upload_options(timestamp, diarization, profile, denoise)
+    
+    task_store = crud.TaskStore(db)
+    results = [None] * len(files)
+    
+    # Limits: one COUNT for the whole batch
+    remaining = len(files)
+    if not current_user.is_admin:
+        usage = task_store.count_user_tasks(current_user.id)
+        limit = current_user.transcription_limit if current_user.transcription_limit is not None else 100
+        if limit > 0:
+            remaining = max(0, limit - usage)
+            if remaining == 0:
+                raise HTTPException(status_code=403, detail=f"Limite de transcrições atingido ({usage}/{limit}). Contate o admin.")
+    
+    # 1. Validate (header read only) and clean display names
+    accepted = []  # (index, file, safe_filename, clean_base, ext)
+    for i, file in enumerate(files):
+        if len(accepted) >= remaining:
+            results[i] = {"filename": file.filename, "error": "Limite de transcrições atingido"}
+            continue
+        try:
+            safe_filename, _ = await FileValidator.validate_file(file)
+        except HTTPException as e:
+            results[i] = {"filename": file.filename, "error": e.detail}
+            continue
+        except Exception as e:
+            logger.error(f"File validation error: {e}")
+            results[i] = {"filename": file.filename, "error": f"Erro na validação do arquivo: {str(e)}"}
+            continue
+        clean_base, ext = _clean_display_name(file.filename)
+        accepted.append((i, file, safe_filename, clean_base, ext))
+    
+    # 2. Collision detection: one query for every name this batch could take
+    taken = set()
+    if accepted:
+        bases = {clean_base for _, _, _, clean_base, _ in accepted}
+        taken = {
+            name for (name,) in db.query(models.TranscriptionTask.filename).filter(
+                models.TranscriptionTask.owner_id == current_user.id,
+                or_(*(models.TranscriptionTask.filename.startswith(b, autoescape=True) for b in bases))
+            )
+        }
+    
+    # 3. Write files concurrently (spooled temp files -> upload dir), then probe
+    #    them in the probe pool; undecodable files are dropped before any task exists
+    semaphore = asyncio.Semaphore(settings.BATCH_UPLOAD_WRITE_CONCURRENCY)
+    
+    async def write(entry):
+        i, file, safe_filename, clean_base, ext = entry
+        task_id = str(uuid.uuid4())
+        file_path = os.path.join(settings.UPLOAD_DIR, f"{task_id}_{safe_filename}")
+        try:
+            async with semaphore:
+                await asyncio.to_thread(_copy_upload, file.file, file_path)
+            audio_info = await probe_file_async(file_path)
+        except Exception:
+            # Cópia parcial ou áudio inválido: nenhum arquivo sem tarefa fica no disco
+            _discard_uploads([file_path])
+            raise
+        return task_id, file_path, audio_info
+    
+    written = await asyncio.gather(*(write(entry) for entry in accepted), return_exceptions=True)
+    
+    rows = []
+    for (i, file, _, clean_base, ext), outcome in zip(accepted, written):
+        if isinstance(outcome, InvalidAudioError):
+            logger.warning(f"❌ Rejected {file.filename}: {outcome}")
+            results[i] = {"filename": file.filename, "error": f"Arquivo de áudio inválido: {str(outcome)}"}
+            continue
+        if isinstance(outcome, Exception):
+            logger.error(f"❌ Failed to save {file.filename}: {outcome}")
+            results[i] = {"filename": file.filename, "error": f"Falha ao salvar arquivo: {str(outcome)}"}
+            continue
+        
+        # Same naming rule as /upload: "Name.ext", then "Name (2).ext", ...
+        display_name = clean_base + ext
+        counter = 2
+        while display_name in taken:
+            display_name = f"{clean_base} ({counter}){ext}"
+            counter += 1
+        taken.add(display_name)
+        
+        task_id, file_path, audio_info = outcome
+        rows.append({
+            "task_id": task_id, "filename": display_name, "file_path": file_path,
+            "audio_info": audio_info, "index": i
+        })
+    
+    # 4. One bulk INSERT for all task rows (files are removed if it fails)
+    if rows:
+        try:
+            task_store.create_tasks(rows, owner_id=current_user.id, options=options)
+        except Exception as e:
+            logger.error(f"❌ Batch insert failed, removing {len(rows)} written file(s): {e}")
+            await asyncio.to_thread(_discard_uploads, [r["file_path"] for r in rows])
+            raise
+    
+    for row in rows:
+        results[row["index"]] = {
+            "filename": files[row["index"]].filename,
+            "task_id": row["task_id"],
+            "status_url": f"/api/status/{row['task_id']}"
+        }
+    
+    # 5. Enqueue everything in one Redis round trip (after the response)
+    async def enqueue_all(items, durations):
+        try:
+            await task_queue.put_many(items, owner_id=current_user.id, durations=durations)
+            logger.info(f"✅ Batch enqueued: {len(items)} tasks")
+        except Exception as e:
+            logger.error(f"❌ Failed to enqueue batch: {e}")
+            task_store.fail_tasks([item[0] for item in items], f"Falha ao enfileirar: {str(e)}")
+    
+    if rows:
+        background_tasks.add_task(
+            enqueue_all,
+            [(r["task_id"], r["file_path"], options) for r in rows],
+            [r["audio_info"].duration for r in rows]
+        )
+    
+    logger.info(f"📦 Batch upload: {len(rows)}/{len(files)} files accepted for {current_user.username}")
+    
+    return {
+        "tasks": results,
+        "accepted": len(rows),
+        "rejected": len(files) - len(rows),
+        "message": "Envio realizado com sucesso" if rows else "Nenhum arquivo aceito"
+    }
+
 @router.get("/status/{task_id}")
 async def get_status(task_id: str, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
     task_store = crud.TaskStore(db)
@@ -197,6 +420,14 @@ async def get_status(task_id: str, db: Session = Depends(get_db), current_user:
     
     if task.status == "failed":
         response["error"] = task.error_message
+    
+    # ETA: posição na fila e previsão de início/término (RTF histórico)
+    if task.status in ("queued", "processing"):
+        try:
+            from app.services.eta import eta_estimator
+            response.update(await asyncio.to_thread(eta_estimator.estimate, task))
+        except Exception as e:
+            logger.debug(f"ETA indisponível para {task_id}: {e}")
         
     return response
 
@@ -224,6 +455,27 @@ async def get_result(task_id: str, db: Session = Depends(get_db), current_user:
         "analysis_status": task.analysis_status # Added field
     }
 
+def _load_segments(task: models.TranscriptionTask):
+    """SegmentStore persistido da tarefa (None para tarefas anteriores ao store)"""
+    from app.services.segment_store import SegmentStore
+    
+    if not task.segments:
+        return None
+    try:
+        return SegmentStore.from_bytes(task.segments)
+    except Exception as e:
+        logger.warning(f"Segmentos ilegíveis para {task.task_id}: {e}")
+        return None
+
+
+def _task_option(task: models.TranscriptionTask, key: str, default=None):
+    import json
+    try:
+        return json.loads(task.options or "{}").get(key, default)
+    except ValueError:
+        return default
+
+
 @router.get("/download/{task_id}")
 async def download_result(task_id: str, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
     task_store = crud.TaskStore(db)
@@ -237,6 +489,17 @@ async def download_result(task_id: str, db: Session = Depends(get_db), current_u
     filename = f"{os.path.splitext(task.filename)[0]}.txt"
     content = task.result_text or ""
     
+    # Opção 'timestamp' do upload: [mm:ss] por segmento (a partir do SegmentStore);
+    # com falantes identificados, cada linha leva o rótulo (result_text não tem)
+    timestamp = _task_option(task, "timestamp", False)
+    if timestamp or _task_option(task, "diarization", False):
+        store = _load_segments(task)
+        if store is not None:
+            if timestamp:
+                content = store.to_timestamped_text()
+            elif store.labels:
+                content = store.labelled_text
+    
     # Use StreamingResponse to avoid creating temp files that never get deleted
     return StreamingResponse(
         iter([content]),
@@ -244,6 +507,73 @@ async def download_result(task_id: str, db: Session = Depends(get_db), current_u
         headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
+@router.get("/segments/{task_id}")
+async def get_segments(task_id: str, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+    """
+    Segmentos com timestamps (click-to-seek no player) e ocorrências de termos
+    de regras com o instante em que aparecem, sem retranscrever.
+    """
+    task_store = crud.TaskStore(db)
+    task = task_store.get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+        
+    if task.owner_id != current_user.id and not current_user.is_admin:
+         raise HTTPException(status_code=403, detail="Não autorizado")
+    
+    store = _load_segments(task)
+    if store is None:
+        raise HTTPException(status_code=404, detail="Segmentos não disponíveis para esta tarefa")
+    
+    rules = [
+        {'category': r.category, 'keywords': r.keywords}
+        for r in db.query(models.AnalysisRule).filter(models.AnalysisRule.is_active == True).all()
+    ]
+    rule_hits = []
+    for category, terms in whisper_service.analyzer.indicator_terms(rules).items():
+        for term in terms:
+            for seg in store.locate(term):
+                rule_hits.append({
+                    "category": category,
+                    "term": term,
+                    "start": round(seg.start, 2),
+                    "end": round(seg.end, 2),
+                })
+    rule_hits.sort(key=lambda hit: hit["start"])
+    
+    return {
+        "task_id": task.task_id,
+        "segments": store.to_dicts(),
+        "rule_hits": rule_hits,
+    }
+
+@router.get("/subtitles/{task_id}")
+async def download_subtitles(task_id: str, format: str = "srt", db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+    """Legendas SRT ou VTT geradas do SegmentStore"""
+    if format not in ("srt", "vtt"):
+        raise HTTPException(status_code=400, detail="Formato inválido. Use srt ou vtt")
+    
+    task_store = crud.TaskStore(db)
+    task = task_store.get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+        
+    if task.owner_id != current_user.id and not current_user.is_admin:
+         raise HTTPException(status_code=403, detail="Não autorizado")
+    
+    store = _load_segments(task)
+    if store is None:
+        raise HTTPException(status_code=404, detail="Segmentos não disponíveis para esta tarefa")
+    
+    filename = f"{os.path.splitext(task.filename)[0]}.{format}"
+    content = store.to_srt() if format == "srt" else store.to_vtt()
+    media_type = "application/x-subrip" if format == "srt" else "text/vtt"
+    return StreamingResponse(
+        iter([content]),
+        media_type=f"{media_type}; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/audio/{task_id}")
 async def get_audio_file(task_id: str, db: Session = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
     task_store = crud.TaskStore(db)
@@ -404,6 +734,15 @@ async def delete_task(task_id: str, db: Session = Depends(get_db), current_user:
     if task.owner_id != current_user.id and not current_user.is_admin:
          raise HTTPException(status_code=403, detail="Não autorizado")
 
+    # Drop it from the fair-share queue if it was not dispatched yet
+    from app.core.fair_share import fair_share
+    await asyncio.to_thread(fair_share.remove, task.owner_id, task_id)
+    
+    # Cancel the RQ job (or flag it if running) BEFORE deleting the file
+    if task.status in ("queued", "processing"):
+        from app.core.cancellation import job_canceller
+        await asyncio.to_thread(job_canceller.cancel, [task_id])
+
     if task_store.delete_task(task_id):
         return {"deleted": True}
     raise HTTPException(status_code=404, detail="Task not found")
@@ -7,6 +7,30 @@ from app.core.websocket_manager import ws_manager
 
 router = APIRouter()
 
+
+def _task_eta(task_id: str) -> dict:
+    """ETA atual da task (vazio se concluída, inexistente ou sem Redis)"""
+    from app import crud
+    from app.database import SessionLocal
+    from app.services.eta import eta_estimator
+    
+    db = SessionLocal()
+    try:
+        task = crud.TaskStore(db).get_task(task_id)
+        return eta_estimator.estimate(task) if task else {}
+    except Exception as e:
+        logger.debug(f"ETA indisponível para {task_id}: {e}")
+        return {}
+    finally:
+        db.close()
+
+
+async def _push_eta(task_id: str):
+    eta = await asyncio.to_thread(_task_eta, task_id)
+    if eta:
+        await ws_manager.send_eta_update(task_id, eta)
+
+
 @router.websocket("/ws/tasks/{task_id}")
 async def websocket_task_updates(websocket: WebSocket, task_id: str):
     """
@@ -23,6 +47,7 @@ async def websocket_task_updates(websocket: WebSocket, task_id: str):
             "task_id": task_id,
             "message": "Conectado ao servidor de updates"
         }, websocket)
+        await _push_eta(task_id)
         
         # Manter conexão aberta e aguardar mensagens (heartbeat)
         while True:
@@ -40,6 +65,8 @@ async def websocket_task_updates(websocket: WebSocket, task_id: str):
                 await ws_manager.send_personal_message({
                     "type": "ping"
                 }, websocket)
+                # ETA recalculado a cada 30s (fila e RTF mudam)
+                await _push_eta(task_id)
                 
     except WebSocketDisconnect:
         logger.info(f"WebSocket desconectado para task {task_id}")
@@ -0,0 +1,288 @@
+"""
+Local worker autoscaler (supervisor mode of `python -m app.workers`).
+
+Keeps between AUTOSCALE_MIN_WORKERS and AUTOSCALE_MAX_WORKERS CustomWorker
+processes alive on this host, sized by:
+- jobs running on this host's workers plus the waiting audio backlog (RQ
+  queues + fair-share queues, from each job's probed duration), at
+  AUTOSCALE_BACKLOG_SECONDS_PER_WORKER of audio per extra worker
+- CPU count (AUTOSCALE_CORES_PER_WORKER cores per worker)
+- free RAM (a new worker needs WORKER_MAX_MEMORY_MB available)
+CPU and RAM honour container (cgroup) limits, not just the host totals.
+
+Scale-up is immediate (rate limited by AUTOSCALE_UP_COOLDOWN); scale-down
+happens one worker at a time after the backlog has stayed low for
+AUTOSCALE_DOWN_COOLDOWN. Retired workers get SIGTERM and finish their
+current job first (warm shutdown), so no work is lost.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import Dict, List, Tuple
+
+import psutil
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _read_cgroup(path: str):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask and cgroup CPU quota (docker `cpus:`)"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    # cgroup v2 "max 100000" / "400000 100000"; v1 cfs_quota_us / cfs_period_us
+    quota = _read_cgroup("/sys/fs/cgroup/cpu.max")
+    if quota:
+        limit, _, period = quota.partition(" ")
+        if limit != "max" and period:
+            count = min(count, max(1, int(int(limit) / int(period))))
+    else:
+        limit = _read_cgroup("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period = _read_cgroup("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if limit and period and int(limit) > 0:
+            count = min(count, max(1, int(int(limit) / int(period))))
+    return count
+
+
+def available_memory_mb() -> float:
+    """Free RAM in MB, bounded by the container memory limit when there is one"""
+    available = psutil.virtual_memory().available / 1024 / 1024
+
+    limit = _read_cgroup("/sys/fs/cgroup/memory.max")
+    usage = _read_cgroup("/sys/fs/cgroup/memory.current")
+    if limit is None:
+        limit = _read_cgroup("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+        usage = _read_cgroup("/sys/fs/cgroup/memory/memory.usage_in_bytes")
+    if limit and usage and limit != "max" and int(limit) < 1 << 60:
+        available = min(available, (int(limit) - int(usage)) / 1024 / 1024)
+    return max(0.0, available)
+
+
+class WorkerSupervisor:
+    """Spawns and retires worker processes based on queue backlog and host resources"""
+
+    def __init__(self, target, worker_memory_mb: int):
+        """
+        Args:
+            target: Module-level function that runs one worker (spawned process),
+                    called with (slot, slots) for CPU partitioning
+            worker_memory_mb: Memory a worker may use (WORKER_MAX_MEMORY_MB)
+        """
+        self.target = target
+        self.worker_memory_mb = worker_memory_mb
+        self.min_workers = settings.AUTOSCALE_MIN_WORKERS
+        self.max_workers = settings.AUTOSCALE_MAX_WORKERS
+        self.backlog_per_worker = settings.AUTOSCALE_BACKLOG_SECONDS_PER_WORKER
+        self.cores_per_worker = settings.AUTOSCALE_CORES_PER_WORKER
+        self.interval = settings.AUTOSCALE_INTERVAL
+        self.up_cooldown = settings.AUTOSCALE_UP_COOLDOWN
+        self.down_cooldown = settings.AUTOSCALE_DOWN_COOLDOWN
+
+        # Spawn (not fork): each worker starts clean and loads its own model
+        self._ctx = multiprocessing.get_context("spawn")
+        self.workers: List[multiprocessing.Process] = []
+        self.retiring: List[multiprocessing.Process] = []
+        # pid -> CPU partition slot (retiring workers keep theirs until they exit)
+        self._slots: Dict[int, int] = {}
+        self._last_scale_up = 0.0
+        self._low_since = None
+        self._stopping = False
+
+    # ------------------------------------------------------------------
+    # Signals
+    # ------------------------------------------------------------------
+
+    def _handle_shutdown(self, signum, frame):
+        logger.info(f"🛑 Supervisor recebeu sinal {signum}, encerrando workers...")
+        self._stopping = True
+
+    # ------------------------------------------------------------------
+    # Measurements
+    # ------------------------------------------------------------------
+
+    def _backlog(self) -> Tuple[int, float, int]:
+        """
+        Returns:
+            (waiting jobs, waiting audio seconds, jobs running on this host's workers)
+        """
+        from rq import Queue
+        from rq.job import Job
+        from app.core.fair_share import fair_share
+        from app.core.queue import TRANSCRIPTION_QUEUES, task_queue
+
+        redis = task_queue.redis_conn
+        waiting_jobs = 0
+        waiting_audio = 0.0
+        for name in TRANSCRIPTION_QUEUES:
+            job_ids = Queue(name, connection=redis).get_job_ids()
+            waiting_jobs += len(job_ids)
+            for job in Job.fetch_many(job_ids, connection=redis) if job_ids else []:
+                if job is not None:
+                    waiting_audio += job.meta.get("audio_seconds") or settings.FAIR_SHARE_DEFAULT_COST_SECONDS
+
+        stats = fair_share.get_stats()
+        if stats.get("enabled"):
+            for user in stats["users"].values():
+                waiting_jobs += user["pending"]
+                waiting_audio += user["audio_seconds"]
+        return waiting_jobs, waiting_audio, self._running(redis)
+
+    def _running(self, redis) -> int:
+        """Busy workers among the ones this supervisor spawned (other hosts scale themselves)"""
+        from rq import Worker
+
+        pids = {process.pid for process in self.workers}
+        if not pids:
+            return 0
+        hostname = socket.gethostname()
+        return sum(
+            1 for worker in Worker.all(connection=redis)
+            if worker.hostname == hostname and worker.pid in pids and worker.get_current_job_id()
+        )
+
+    def _capacity(self) -> int:
+        """Max workers this host can take right now (CPU, RAM, configured cap)"""
+        by_cpu = max(1, available_cpus() // self.cores_per_worker)
+        available_mb = available_memory_mb()
+        # Running workers keep their memory; each new one needs a full budget free
+        by_ram = len(self.workers) + int(available_mb // self.worker_memory_mb)
+        return max(self.min_workers, min(self.max_workers, by_cpu, by_ram))
+
+    def desired_workers(self) -> int:
+        waiting_jobs, waiting_audio, running = self._backlog()
+        wanted = running
+        if waiting_jobs:
+            wanted += max(1, math.ceil(waiting_audio / self.backlog_per_worker))
+        desired = max(self.min_workers, min(wanted, self._capacity()))
+        logger.debug(
+            f"Autoscaler: waiting={waiting_jobs} ({waiting_audio:.0f}s audio), "
+            f"running={running}, workers={len(self.workers)}, desired={desired}"
+        )
+        return desired
+
+    # ------------------------------------------------------------------
+    # Process management
+    # ------------------------------------------------------------------
+
+    def _spawn(self):
+        # Lowest free CPU slot; retiring workers keep theirs until they exit
+        used = set(self._slots.values())
+        slot = next(i for i in range(self.max_workers + len(used) + 1) if i not in used)
+        # Partition sized for the most workers this host can run at once
+        slots = max(1, min(self.max_workers, available_cpus() // self.cores_per_worker))
+        process = self._ctx.Process(
+            target=self.target,
+            args=(slot, slots),
+            name=f"rq-worker-{slot + 1}"
+        )
+        process.start()
+        self.workers.append(process)
+        self._slots[process.pid] = slot
+        logger.info(f"➕ Worker iniciado (pid={process.pid}, slot={slot + 1}, total={len(self.workers)})")
+
+    def _retire(self):
+        """Warm shutdown of the newest worker (finishes its current job)"""
+        process = self.workers.pop()
+        self.retiring.append(process)
+        try:
+            os.kill(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        logger.info(f"➖ Worker aposentado (pid={process.pid}, total={len(self.workers)})")
+
+    def _reap(self):
+        """Forget processes that exited (crash, max_jobs restart, retirement)"""
+        for process in [p for p in self.workers if not p.is_alive()]:
+            process.join(timeout=0)
+            self.workers.remove(process)
+            self._slots.pop(process.pid, None)
+            logger.warning(f"⚠️  Worker pid={process.pid} saiu (exit={process.exitcode})")
+        for process in [p for p in self.retiring if not p.is_alive()]:
+            process.join(timeout=0)
+            self.retiring.remove(process)
+            self._slots.pop(process.pid, None)
+
+    def _scale(self):
+        self._reap()
+        desired = self.desired_workers()
+        current = len(self.workers)
+        now = time.monotonic()
+
+        # Below the floor (e.g. a worker exited after max_jobs): replace right away
+        while len(self.workers) < self.min_workers:
+            self._spawn()
+
+        if desired > current:
+            self._low_since = None
+            if now - self._last_scale_up >= self.up_cooldown:
+                for _ in range(desired - len(self.workers)):
+                    self._spawn()
+                self._last_scale_up = now
+        elif desired < current:
+            if self._low_since is None:
+                self._low_since = now
+            elif now - self._low_since >= self.down_cooldown:
+                self._retire()
+                self._low_since = now  # One worker per cool-down
+        else:
+            self._low_since = None
+
+    def run(self):
+        """Supervisor loop (blocks until SIGTERM/SIGINT)"""
+        signal.signal(signal.SIGTERM, self._handle_shutdown)
+        signal.signal(signal.SIGINT, self._handle_shutdown)
+
+        logger.info(
+            f"🚀 Supervisor iniciado | Workers: {self.min_workers}-{self.max_workers} | "
+            f"CPUs: {available_cpus()} | Memória/worker: {self.worker_memory_mb}MB"
+        )
+
+        from app.core.fair_share import fair_share
+
+        while not self._stopping:
+            try:
+                # With zero workers nobody else releases fair-share jobs
+                fair_share.pump()
+                self._scale()
+            except Exception as e:
+                logger.error(f"❌ Autoscaler: erro no ciclo: {e}")
+            for _ in range(self.interval):
+                if self._stopping:
+                    break
+                time.sleep(1)
+
+        self.shutdown()
+
+    def shutdown(self, timeout: float = 600):
+        """Forward SIGTERM to all workers and wait for their current jobs"""
+        processes = self.workers + self.retiring
+        for process in processes:
+            if process.is_alive():
+                try:
+                    os.kill(process.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(timeout=max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"⚠️  Worker pid={process.pid} não encerrou, forçando")
+                process.kill()
+        logger.info("✅ Supervisor encerrado")
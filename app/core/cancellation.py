@@ -0,0 +1,129 @@
+"""
+Cancellation of transcription jobs when their task is deleted.
+
+Queued jobs are cancelled in RQ (removed from the queue, moved to the
+CanceledJobRegistry). Running jobs cannot be stopped from outside the
+worker, so a Redis flag is set instead: the worker checks it before
+starting and between segments (TranscriptionService._collect) and aborts
+with TranscriptionCancelled. The flag also covers jobs still parked in the
+fair-share sub-queues, which reach RQ later.
+"""
+import logging
+from time import monotonic
+from typing import Callable, Dict, Iterable
+
+from rq.job import Job, JobStatus
+
+from app.core.config import settings
+from app.core.queue import task_queue
+
+logger = logging.getLogger(__name__)
+
+CANCEL_KEY = "cancel:{task_id}"
+
+# Intervalo mínimo entre consultas ao Redis durante a transcrição
+CHECK_INTERVAL_SECONDS = 1.0
+
+
+class TranscriptionCancelled(Exception):
+    """Raised inside the worker when the task of the running job was deleted"""
+
+
+class JobCanceller:
+    """Cancels queued jobs and flags running ones."""
+
+    def __init__(self, queue=task_queue):
+        self.task_queue = queue
+
+    @property
+    def redis(self):
+        return self.task_queue.redis_conn
+
+    @property
+    def breaker(self):
+        from app.core.redis_client import get_breaker
+        return get_breaker(db=0)
+
+    def _flag(self, task_ids: list):
+        with self.redis.pipeline() as pipe:
+            for task_id in task_ids:
+                pipe.set(CANCEL_KEY.format(task_id=task_id), 1, ex=settings.CANCEL_FLAG_TTL)
+            pipe.execute()
+
+    def cancel(self, task_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Cancel the jobs of deleted tasks (job_id == task_id).
+
+        Returns:
+            {"queued": jobs removed from RQ, "flagged": cancel flags set}
+        """
+        task_ids = list(task_ids)
+        counts = {"queued": 0, "flagged": 0}
+        if not task_ids or self.task_queue.queue is None:
+            return counts
+
+        if not self.breaker.allow():
+            logger.warning(f"⚠️  Redis indisponível: cancelamento de {len(task_ids)} job(s) ignorado")
+            return counts
+
+        try:
+            self.breaker.call(self._flag, task_ids)
+            counts["flagged"] = len(task_ids)
+
+            for job in self.breaker.call(Job.fetch_many, task_ids, connection=self.redis):
+                if job is None:
+                    continue
+                if job.get_status() in (JobStatus.QUEUED, JobStatus.DEFERRED, JobStatus.SCHEDULED):
+                    try:
+                        job.cancel()
+                        counts["queued"] += 1
+                    except Exception as e:
+                        logger.debug(f"Falha ao cancelar job {job.id}: {e}")
+        except Exception as e:
+            logger.warning(f"⚠️  Cancelamento de {len(task_ids)} job(s) falhou: {e}")
+            return counts
+
+        if counts["queued"]:
+            from app.core.metrics import jobs_cancelled_total
+            jobs_cancelled_total.labels(state="queued").inc(counts["queued"])
+        logger.info(f"🚫 {counts['queued']} job(s) removido(s) da fila, {counts['flagged']} sinalizado(s)")
+        return counts
+
+    def is_cancelled(self, task_id: str) -> bool:
+        if not self.breaker.allow():
+            return False
+        try:
+            return bool(self.breaker.call(self.redis.exists, CANCEL_KEY.format(task_id=task_id)))
+        except Exception as e:
+            logger.debug(f"Falha ao consultar cancelamento de {task_id}: {e}")
+            return False
+
+    def clear(self, task_id: str):
+        if not self.breaker.allow():
+            return
+        try:
+            self.breaker.call(self.redis.delete, CANCEL_KEY.format(task_id=task_id))
+        except Exception as e:
+            logger.debug(f"Falha ao remover flag de cancelamento de {task_id}: {e}")
+
+    def checker(self, task_id: str) -> Callable[[], None]:
+        """
+        Callback for the segment loop: raises TranscriptionCancelled once the
+        flag is set (Redis is queried at most once per CHECK_INTERVAL_SECONDS).
+        """
+        last_check = 0.0
+
+        def check():
+            nonlocal last_check
+            now = monotonic()
+            if now - last_check < CHECK_INTERVAL_SECONDS:
+                return
+            last_check = now
+            if self.is_cancelled(task_id):
+                raise TranscriptionCancelled(task_id)
+
+        return check
+
+
+# Global instance
+job_canceller = JobCanceller()
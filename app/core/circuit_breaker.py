@@ -0,0 +1,146 @@
+"""
+Circuit breaker for optional dependencies (e.g. the Redis cache).
+
+After `failure_threshold` consecutive failures the circuit opens and
+callers short-circuit immediately instead of waiting on timeouts. Once the
+cool-down elapses a background probe checks the dependency; the circuit
+closes again only when the probe succeeds.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional, Tuple, Type
+
+from app.core.metrics import record_circuit_state, circuit_breaker_short_circuits
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with background recovery probe"""
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"  # Probe running, calls still short-circuited
+    OPEN = "open"
+
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], object],
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30,
+        failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+    ):
+        """
+        Args:
+            name: Label used in logs and metrics
+            probe: Callable that raises if the dependency is still unhealthy
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown_seconds: Time the circuit stays open before probing
+            failure_exceptions: Exception types counted as dependency failures
+        """
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failure_exceptions = failure_exceptions
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+        record_circuit_state(self.name, self.state)
+
+    def allow(self) -> bool:
+        """
+        True if calls may go through. While open, starts the recovery
+        probe in the background once the cool-down has elapsed.
+        """
+        if self.state == self.CLOSED:
+            return True
+
+        start_probe = False
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self._transition(self.HALF_OPEN)
+                start_probe = True
+
+        if start_probe:
+            threading.Thread(target=self._run_probe, name=f"{self.name}-probe", daemon=True).start()
+
+        circuit_breaker_short_circuits.labels(name=self.name).inc()
+        return False
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run fn, recording the outcome. Does not check allow()."""
+        try:
+            result = fn(*args, **kwargs)
+        except self.failure_exceptions:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def record_success(self):
+        if self.consecutive_failures or self.state != self.CLOSED:
+            with self._lock:
+                self.consecutive_failures = 0
+                if self.state != self.CLOSED:
+                    self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def trip(self):
+        """Open the circuit immediately (e.g. dependency down at startup)"""
+        with self._lock:
+            if self.state != self.OPEN:
+                self._open()
+
+    def _open(self):
+        """Caller must hold the lock"""
+        self.opened_at = time.monotonic()
+        self._transition(self.OPEN)
+
+    def _run_probe(self):
+        try:
+            self.probe()
+        except Exception as e:
+            logger.warning(f"⚠️ Circuit '{self.name}' probe failed, staying open: {e}")
+            with self._lock:
+                self._open()
+            return
+
+        with self._lock:
+            self.consecutive_failures = 0
+            self._transition(self.CLOSED)
+
+    def _transition(self, state: str):
+        """Caller must hold the lock"""
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        record_circuit_state(self.name, state)
+
+        if state == self.OPEN:
+            logger.error(
+                f"❌ Circuit '{self.name}' OPEN after {self.consecutive_failures} failures "
+                f"(cool-down {self.cooldown_seconds}s)"
+            )
+        elif state == self.CLOSED:
+            logger.info(f"✓ Circuit '{self.name}' closed (was {previous})")
+        else:
+            logger.info(f"Circuit '{self.name}' probing")
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "cooldown_seconds": self.cooldown_seconds,
+        }
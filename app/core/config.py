@@ -62,6 +62,59 @@ class Settings:
         self.DEVICE = os.getenv("DEVICE", "cpu")
         self.COMPUTE_TYPE = os.getenv("COMPUTE_TYPE", "int8")
         
+        # Decoding (may be overridden by the host profile)
+        self.WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", 5))
+        self.WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", 16))
+        
+        # Batched pipeline on CPU (opt-in): 30 s windows of one file decoded together.
+        # Changes the output: batched decoding needs the VAD filter, which the
+        # sequential CPU path (vad_filter=False) does not use and which can drop
+        # quiet speech. Smaller batches than GPU (activations per window stay in
+        # cache/RAM); clips shorter than BATCHED_MIN_SECONDS are decoded sequentially
+        self.WHISPER_CPU_BATCHED = os.getenv("WHISPER_CPU_BATCHED", "false").lower() == "true"
+        self.WHISPER_CPU_BATCH_SIZE = int(os.getenv("WHISPER_CPU_BATCH_SIZE", 4))
+        self.WHISPER_BATCHED_MIN_SECONDS = float(os.getenv("WHISPER_BATCHED_MIN_SECONDS", 60))
+        # VAD of the CPU pipeline (splits the file into batchable speech chunks)
+        self.WHISPER_CPU_VAD_THRESHOLD = float(os.getenv("WHISPER_CPU_VAD_THRESHOLD", 0.3))
+        self.WHISPER_CPU_VAD_MIN_SILENCE_MS = int(os.getenv("WHISPER_CPU_VAD_MIN_SILENCE_MS", 1000))
+        self.WHISPER_CPU_VAD_SPEECH_PAD_MS = int(os.getenv("WHISPER_CPU_VAD_SPEECH_PAD_MS", 400))
+        
+        # Quality profiles (app/services/quality.py): fast / balanced / accurate.
+        # Empty model = WHISPER_MODEL
+        self.QUALITY_DEFAULT_PROFILE = os.getenv("QUALITY_DEFAULT_PROFILE", "balanced")
+        self.QUALITY_FAST_MODEL = os.getenv("QUALITY_FAST_MODEL", "")
+        self.QUALITY_ACCURATE_MODEL = os.getenv("QUALITY_ACCURATE_MODEL", "")
+        # Step down one profile while queue wait exceeds the SLA; step back up
+        # once it falls below SLA * RECOVER_RATIO
+        self.QUALITY_AUTO_STEP_DOWN = os.getenv("QUALITY_AUTO_STEP_DOWN", "true").lower() == "true"
+        self.QUALITY_SLA_SECONDS = int(os.getenv("QUALITY_SLA_SECONDS", 900))
+        self.QUALITY_RECOVER_RATIO = float(os.getenv("QUALITY_RECOVER_RATIO", 0.5))
+        
+        # Two-pass (app/services/two_pass.py): greedy draft with a small model, then
+        # only low-confidence segments are re-transcribed with the profile's model
+        self.TWO_PASS_ENABLED = os.getenv("TWO_PASS_ENABLED", "false").lower() == "true"
+        self.TWO_PASS_DRAFT_MODEL = os.getenv("TWO_PASS_DRAFT_MODEL", "base")
+        self.TWO_PASS_LOGPROB_THRESHOLD = float(os.getenv("TWO_PASS_LOGPROB_THRESHOLD", -0.6))
+        self.TWO_PASS_COMPRESSION_THRESHOLD = float(os.getenv("TWO_PASS_COMPRESSION_THRESHOLD", 2.4))
+        self.TWO_PASS_NO_SPEECH_THRESHOLD = float(os.getenv("TWO_PASS_NO_SPEECH_THRESHOLD", 0.6))
+        # Context added around each refined segment (seconds; only up to the kept neighbours)
+        self.TWO_PASS_PAD_SECONDS = float(os.getenv("TWO_PASS_PAD_SECONDS", 0.5))
+        
+        # Host profile written by scripts/autotune.py (app/core/host_profile.py)
+        self.HOST_PROFILE_ENABLED = os.getenv("HOST_PROFILE_ENABLED", "true").lower() == "true"
+        self.HOST_PROFILE_PATH = os.getenv("HOST_PROFILE_PATH", "/app/data/host_profile.json")
+        # Reference clips for autotune: <name>.<audio ext> + <name>.txt
+        self.AUTOTUNE_REFERENCE_DIR = os.getenv("AUTOTUNE_REFERENCE_DIR", "/app/data/reference")
+        
+        # CTranslate2 threads: intra-op (0 = one per core / the worker's CPU slice)
+        # and inter-op (parallel transcriptions per model)
+        self.WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", 0))
+        self.WHISPER_NUM_WORKERS = int(os.getenv("WHISPER_NUM_WORKERS", 1))
+        # Split cores among co-located workers (app/core/cpu_partition.py; only
+        # with 2+ worker slots); affinity also pins each worker to its slice
+        self.WORKER_CPU_PARTITION = os.getenv("WORKER_CPU_PARTITION", "true").lower() == "true"
+        self.WORKER_CPU_AFFINITY = os.getenv("WORKER_CPU_AFFINITY", "false").lower() == "true"
+        
         self.MAX_FILE_SIZE_MB = int(os.getenv("MAX_FILE_SIZE_MB", 100))
         self.ALLOWED_EXTENSIONS = os.getenv("ALLOWED_EXTENSIONS", "mp3,wav,m4a,ogg,webm,flac,opus,ptt").split(",")
         
@@ -97,6 +150,137 @@ class Settings:
             self.REDIS_URL = f"redis://:{redis_password}@{redis_host}:{redis_port}/{redis_db}"
         
         self.ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:8000").split(",")
+        
+        # Batch upload (/api/upload/batch)
+        self.BATCH_UPLOAD_MAX_FILES = int(os.getenv("BATCH_UPLOAD_MAX_FILES", 500))
+        self.BATCH_UPLOAD_WRITE_CONCURRENCY = int(os.getenv("BATCH_UPLOAD_WRITE_CONCURRENCY", 4))
+        
+        # Cache serialization (app/services/cache_codec.py)
+        # auto = msgpack/json + zstd/lz4/gzip, whichever is installed
+        self.CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "auto")
+        self.CACHE_COMPRESSOR = os.getenv("CACHE_COMPRESSOR", "auto")
+        level = os.getenv("CACHE_COMPRESSION_LEVEL")
+        self.CACHE_COMPRESSION_LEVEL = int(level) if level else None
+        self.CACHE_MIN_COMPRESS_SIZE = int(os.getenv("CACHE_MIN_COMPRESS_SIZE", 1024))
+        # Pickle runs arbitrary code on load - only enable if Redis is private
+        self.CACHE_ALLOW_PICKLE = os.getenv("CACHE_ALLOW_PICKLE", "false").lower() == "true"
+        
+        # In-process L1 cache in front of Redis (per process; 0 disables)
+        self.CACHE_L1_MAX_MB = int(os.getenv("CACHE_L1_MAX_MB", 64))
+        self.CACHE_L1_TTL = int(os.getenv("CACHE_L1_TTL", 300))
+        
+        # Circuit breaker for the Redis cache: open after N consecutive
+        # failures, probe again after the cool-down
+        self.CACHE_BREAKER_FAILURES = int(os.getenv("CACHE_BREAKER_FAILURES", 3))
+        self.CACHE_BREAKER_COOLDOWN = int(os.getenv("CACHE_BREAKER_COOLDOWN", 30))
+        
+        # Single-flight: identical in-flight transcriptions run only once
+        self.SINGLE_FLIGHT_LEASE_TTL = int(os.getenv("SINGLE_FLIGHT_LEASE_TTL", 60))
+        self.SINGLE_FLIGHT_MAX_WAIT = int(os.getenv("SINGLE_FLIGHT_MAX_WAIT", 3600))
+        
+        # Priority queues by audio duration (app/core/queue.py):
+        # <= SHORT -> high, >= LONG -> low, otherwise default
+        self.PRIORITY_SHORT_MAX_SECONDS = int(os.getenv("PRIORITY_SHORT_MAX_SECONDS", 300))
+        self.PRIORITY_LONG_MIN_SECONDS = int(os.getenv("PRIORITY_LONG_MIN_SECONDS", 1800))
+        # Worker dequeue weights and anti-starvation wait (app/workers.py)
+        self.PRIORITY_WEIGHTS = os.getenv("PRIORITY_WEIGHTS", "high:6,default:3,low:1,transcription_tasks:3")
+        self.PRIORITY_MAX_WAIT_SECONDS = int(os.getenv("PRIORITY_MAX_WAIT_SECONDS", 1800))
+        
+        # Per-user fair share (app/core/fair_share.py): jobs are released to RQ
+        # only while fewer than one per live worker (at least READY_DEPTH) are
+        # waiting, by deficit round-robin over users weighted by audio seconds
+        self.FAIR_SHARE_ENABLED = os.getenv("FAIR_SHARE_ENABLED", "true").lower() == "true"
+        self.FAIR_SHARE_READY_DEPTH = int(os.getenv("FAIR_SHARE_READY_DEPTH", 2))
+        self.FAIR_SHARE_QUANTUM_SECONDS = int(os.getenv("FAIR_SHARE_QUANTUM_SECONDS", 600))
+        # Cost of files whose duration could not be probed
+        self.FAIR_SHARE_DEFAULT_COST_SECONDS = int(os.getenv("FAIR_SHARE_DEFAULT_COST_SECONDS", 300))
+        
+        # Micro-batch worker (python -m app.workers --microbatch): up to MAX_JOBS
+        # clips of <= MAX_SECONDS, waiting at most MAX_WAIT_MS, decoded in one batch
+        self.WORKER_MICROBATCH = os.getenv("WORKER_MICROBATCH", "false").lower() == "true"
+        self.MICROBATCH_MAX_JOBS = int(os.getenv("MICROBATCH_MAX_JOBS", 8))
+        self.MICROBATCH_MAX_WAIT_MS = int(os.getenv("MICROBATCH_MAX_WAIT_MS", 200))
+        self.MICROBATCH_MAX_SECONDS = int(os.getenv("MICROBATCH_MAX_SECONDS", 180))
+        
+        # Checkpoints of long transcriptions (app/services/checkpoint.py): segments
+        # and audio offset saved every INTERVAL so a retried job resumes there
+        self.CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+        self.CHECKPOINT_INTERVAL_SECONDS = int(os.getenv("CHECKPOINT_INTERVAL_SECONDS", 30))
+        self.CHECKPOINT_MIN_AUDIO_SECONDS = int(os.getenv("CHECKPOINT_MIN_AUDIO_SECONDS", 600))
+        self.CHECKPOINT_TTL_SECONDS = int(os.getenv("CHECKPOINT_TTL_SECONDS", 86400))
+        # RQ retries of a job whose worker died (0 disables)
+        self.JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", 2))
+        
+        # Stuck-job reaper (app/core/reaper.py): a worker without heartbeat for
+        # HEARTBEAT_TIMEOUT is dead; 'processing' tasks without a job for GRACE are requeued
+        self.REAPER_ENABLED = os.getenv("REAPER_ENABLED", "true").lower() == "true"
+        self.REAPER_HEARTBEAT_TIMEOUT = int(os.getenv("REAPER_HEARTBEAT_TIMEOUT", 420))
+        self.REAPER_GRACE_SECONDS = int(os.getenv("REAPER_GRACE_SECONDS", 600))
+        # Cancel flag of deleted tasks (app/core/cancellation.py); must outlive
+        # the time a job can wait in the fair-share and RQ queues
+        self.CANCEL_FLAG_TTL = int(os.getenv("CANCEL_FLAG_TTL", 86400))
+        
+        # ETA from rolling real-time factors (app/services/eta.py). RTF is
+        # processing/audio seconds; DEFAULT_RTF applies until there is history
+        self.ETA_RTF_ALPHA = float(os.getenv("ETA_RTF_ALPHA", 0.2))
+        self.ETA_DEFAULT_RTF = float(os.getenv("ETA_DEFAULT_RTF", 0.5))
+        self.ETA_OVERHEAD_SECONDS = float(os.getenv("ETA_OVERHEAD_SECONDS", 5))
+        # RQ job_timeout = predicted runtime (slowest host) x FACTOR, clamped
+        self.ETA_TIMEOUT_FACTOR = float(os.getenv("ETA_TIMEOUT_FACTOR", 3))
+        self.ETA_MIN_JOB_TIMEOUT = int(os.getenv("ETA_MIN_JOB_TIMEOUT", 600))
+        self.ETA_MAX_JOB_TIMEOUT = int(os.getenv("ETA_MAX_JOB_TIMEOUT", 14400))
+        self.ETA_DEFAULT_JOB_TIMEOUT = int(os.getenv("ETA_DEFAULT_JOB_TIMEOUT", 3600))
+        
+        # Upload-time audio probe (app/services/audio_probe.py): header parser for
+        # WAV/MP3/OGG/FLAC, ffprobe otherwise, in a pool of PROBE_WORKERS threads
+        self.AUDIO_PROBE_WORKERS = int(os.getenv("AUDIO_PROBE_WORKERS", 4))
+        
+        # Stereo call recordings (app/services/stereo.py): opt-in; with diarization on,
+        # a two-party stereo file is transcribed per channel and merged with labels
+        self.STEREO_SPLIT_ENABLED = os.getenv("STEREO_SPLIT_ENABLED", "false").lower() == "true"
+        self.STEREO_SPLIT_LABELS = os.getenv("STEREO_SPLIT_LABELS", "Atendente,Cliente")  # left,right
+        # Channels more correlated than this are duplicated mono
+        self.STEREO_SPLIT_MAX_CORRELATION = float(os.getenv("STEREO_SPLIT_MAX_CORRELATION", 0.8))
+        # Quieter/louder channel RMS below this means one side is (nearly) silent
+        self.STEREO_SPLIT_MIN_LEVEL_RATIO = float(os.getenv("STEREO_SPLIT_MIN_LEVEL_RATIO", 0.05))
+        
+        # Speaker diarization of mono recordings (app/services/diarization.py): opt-in per
+        # upload; MFCC window embeddings clustered into 1..MAX_SPEAKERS, cached in Redis db 1
+        self.DIARIZATION_ENABLED = os.getenv("DIARIZATION_ENABLED", "false").lower() == "true"
+        self.DIARIZATION_MAX_SPEAKERS = int(os.getenv("DIARIZATION_MAX_SPEAKERS", 6))
+        self.DIARIZATION_WINDOW_SECONDS = float(os.getenv("DIARIZATION_WINDOW_SECONDS", 1.5))
+        self.DIARIZATION_BATCH_SIZE = int(os.getenv("DIARIZATION_BATCH_SIZE", 64))
+        # Best split must reach this cosine silhouette, else one speaker (no labels)
+        self.DIARIZATION_MIN_SILHOUETTE = float(os.getenv("DIARIZATION_MIN_SILHOUETTE", 0.15))
+        self.DIARIZATION_CACHE_MAX_ENTRIES = int(os.getenv("DIARIZATION_CACHE_MAX_ENTRIES", 200000))
+        self.DIARIZATION_CACHE_TTL = int(os.getenv("DIARIZATION_CACHE_TTL", 86400))
+        
+        # Noise reduction (app/services/denoise.py): spectral gating of the 16 kHz WAV,
+        # per task (options["denoise"]) or automatically below SNR_THRESHOLD_DB
+        self.DENOISE_AUTO = os.getenv("DENOISE_AUTO", "true").lower() == "true"
+        self.DENOISE_SNR_THRESHOLD_DB = float(os.getenv("DENOISE_SNR_THRESHOLD_DB", 20))
+        self.DENOISE_N_STD = float(os.getenv("DENOISE_N_STD", 1.5))
+        self.DENOISE_MAX_ATTENUATION_DB = float(os.getenv("DENOISE_MAX_ATTENUATION_DB", 12))
+        # Block read/written at a time (bounds memory)
+        self.DENOISE_CHUNK_SECONDS = float(os.getenv("DENOISE_CHUNK_SECONDS", 10))
+        
+        # Worker supervisor (python -m app.workers --autoscale, app/core/autoscaler.py)
+        self.WORKER_AUTOSCALE = os.getenv("WORKER_AUTOSCALE", "false").lower() == "true"
+        self.AUTOSCALE_MIN_WORKERS = int(os.getenv("AUTOSCALE_MIN_WORKERS", 1))
+        self.AUTOSCALE_MAX_WORKERS = int(os.getenv("AUTOSCALE_MAX_WORKERS", 4))
+        # Audio backlog (seconds) that justifies one more worker
+        self.AUTOSCALE_BACKLOG_SECONDS_PER_WORKER = int(os.getenv("AUTOSCALE_BACKLOG_SECONDS_PER_WORKER", 1800))
+        self.AUTOSCALE_CORES_PER_WORKER = int(os.getenv("AUTOSCALE_CORES_PER_WORKER", 2))
+        self.AUTOSCALE_INTERVAL = int(os.getenv("AUTOSCALE_INTERVAL", 10))
+        self.AUTOSCALE_UP_COOLDOWN = int(os.getenv("AUTOSCALE_UP_COOLDOWN", 30))
+        self.AUTOSCALE_DOWN_COOLDOWN = int(os.getenv("AUTOSCALE_DOWN_COOLDOWN", 300))
+        
+        # Shared Redis pool (app/core/redis_client.py), per process and database.
+        # Callers wait up to REDIS_POOL_TIMEOUT for a free connection
+        self.REDIS_POOL_MAX_CONNECTIONS = int(os.getenv("REDIS_POOL_MAX_CONNECTIONS", 20))
+        self.REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
+        self.REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5))
+        self.REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 5))
 
 
     def validate(self):
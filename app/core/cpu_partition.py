@@ -0,0 +1,93 @@
+"""
+CPU partitioning for co-located workers.
+
+Without it every worker's CTranslate2 pool spawns one thread per core and
+N workers oversubscribe the host N times. Each worker instead gets a
+disjoint slice of the available cores: its intra-op thread count
+(`cpu_threads`) matches the slice, and with WORKER_CPU_AFFINITY the
+process is also pinned to it. A single worker per host is left alone, so
+an explicit or autotuned (app/core/host_profile.py) WHISPER_CPU_THREADS
+applies.
+"""
+import logging
+import os
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def usable_cores() -> List[int]:
+    """Core ids this process may run on (affinity mask), sorted"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def partition_cores(cores: List[int], slots: int) -> List[List[int]]:
+    """
+    Split cores into `slots` contiguous, disjoint, near-equal groups.
+    With more slots than cores, groups wrap around (shared single cores).
+
+    Args:
+        cores: Core ids to split
+        slots: Number of workers
+
+    Returns:
+        One core list per slot
+    """
+    slots = max(1, slots)
+    if slots > len(cores):
+        return [[cores[i % len(cores)]] for i in range(slots)]
+
+    size, extra = divmod(len(cores), slots)
+    groups, start = [], 0
+    for i in range(slots):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(cores[start:end])
+        start = end
+    return groups
+
+
+def apply_partition(settings, slot: int, slots: int, pin: Optional[bool] = None) -> List[int]:
+    """
+    Size this worker's thread pools for its share of the cores and optionally pin it.
+    Must run before the Whisper model is loaded. With a single slot nothing
+    changes (the worker already has every core).
+
+    Args:
+        settings: Settings instance (WHISPER_CPU_THREADS is updated in place)
+        slot: This worker's index (0-based)
+        slots: Total number of worker slots on the host
+        pin: Pin with CPU affinity (default: settings.WORKER_CPU_AFFINITY)
+
+    Returns:
+        The cores assigned to this worker
+    """
+    from app.core.autoscaler import available_cpus
+
+    if slots <= 1:
+        logger.info("🧮 Worker único no host: sem partição de CPU")
+        return usable_cores()
+
+    cores = usable_cores()
+    # Respect a cgroup CPU quota smaller than the affinity mask
+    cores = cores[:available_cpus()]
+    assigned = partition_cores(cores, slots)[slot % max(1, slots)]
+
+    if not settings.WHISPER_CPU_THREADS:
+        settings.WHISPER_CPU_THREADS = len(assigned)
+    # OpenMP / BLAS pools outside CTranslate2 (VAD, numpy) follow the same budget
+    os.environ["OMP_NUM_THREADS"] = str(settings.WHISPER_CPU_THREADS)
+
+    if pin if pin is not None else settings.WORKER_CPU_AFFINITY:
+        try:
+            os.sched_setaffinity(0, assigned)
+        except (AttributeError, OSError) as e:
+            logger.warning(f"⚠️  Não foi possível fixar afinidade de CPU: {e}")
+
+    logger.info(
+        f"🧮 Worker slot {slot + 1}/{slots}: cores {assigned} | "
+        f"cpu_threads={settings.WHISPER_CPU_THREADS} | num_workers={settings.WHISPER_NUM_WORKERS}"
+    )
+    return assigned
@@ -0,0 +1,317 @@
+"""
+Per-user fair-share dispatch in front of the RQ priority queues.
+
+Uploads are first parked in a per-user Redis list. A deficit round-robin
+(DRR) dispatcher moves them into the RQ queues only while the ready depth
+(jobs waiting in RQ) is below the target depth, so a user importing
+hundreds of files cannot fill the queues ahead of everybody else. The target
+is one waiting job per live worker slot (MICROBATCH_MAX_JOBS per worker in
+micro-batch mode), never below FAIR_SHARE_READY_DEPTH: every worker has its
+next job ready when it finishes, and the queue stays short.
+
+Cost is the audio duration, not the job count: each turn grants the user
+FAIR_SHARE_QUANTUM_SECONDS of credit, their files are released while the
+credit covers them, and then the turn passes to the next user. A newly
+arrived interactive user therefore waits for at most about one quantum of
+another user's audio plus the ready depth, however large the bulk
+backlog is.
+
+Each user has one sub-queue per priority class (queue_for_duration), so
+the short-job-first routing still holds behind fair share: within a turn,
+the user's short files are released before their long recordings, FIFO
+within a class. A head parked longer than PRIORITY_MAX_WAIT_SECONDS goes
+first, as in CustomWorker.reorder_queues.
+
+Parked tasks already exist in the database, so they count toward the
+user's transcription_limit exactly like jobs already in RQ.
+"""
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from redis.exceptions import LockError
+from rq import Worker
+from rq.job import Job
+
+from app.core.config import settings
+from app.core.queue import PRIORITY_QUEUES, TRANSCRIPTION_QUEUES, queue_for_duration, task_queue
+
+logger = logging.getLogger(__name__)
+
+USER_QUEUE_KEY = "fairshare:user:{user_id}:{priority}"  # One list per priority class
+RING_KEY = "fairshare:ring"          # Users with pending jobs, in service order
+MEMBERS_KEY = "fairshare:members"    # Same users, as a set (O(1) membership)
+DEFICIT_KEY = "fairshare:deficit"    # user_id -> remaining credit (audio seconds)
+TURN_KEY = "fairshare:turn"          # User at the head who already got this turn's quantum
+LOCK_KEY = "fairshare:lock"
+
+# Upper bound on dispatcher steps per pump (rotations + dispatches)
+MAX_PUMP_STEPS = 1000
+
+
+class FairShareScheduler:
+    """
+    Deficit round-robin over per-user sub-queues, weighted by audio seconds.
+    All state lives in Redis (db 0), so API processes and workers share it.
+    """
+
+    def __init__(self, queue=task_queue):
+        self.task_queue = queue
+        self.quantum = settings.FAIR_SHARE_QUANTUM_SECONDS
+        self.ready_depth = settings.FAIR_SHARE_READY_DEPTH
+        self.default_cost = settings.FAIR_SHARE_DEFAULT_COST_SECONDS
+        self.max_wait_seconds = settings.PRIORITY_MAX_WAIT_SECONDS
+
+    @property
+    def redis(self):
+        return self.task_queue.redis_conn
+
+    @property
+    def enabled(self) -> bool:
+        return settings.FAIR_SHARE_ENABLED and self.task_queue.queue is not None
+
+    @staticmethod
+    def user_keys(user_id: str) -> List[str]:
+        """Sub-queues of a user, in release order (high, default, low)"""
+        return [USER_QUEUE_KEY.format(user_id=user_id, priority=name) for name in PRIORITY_QUEUES]
+
+    def _lock(self):
+        return self.redis.lock(LOCK_KEY, timeout=30, blocking_timeout=5)
+
+    def submit(self, user_id: str, task_id: str, file_path: str, options: dict,
+               audio_seconds: Optional[float]):
+        """
+        Park a job in the user's sub-queue and dispatch whatever is eligible.
+        Falls back to direct enqueue if the scheduler lock is unavailable.
+        """
+        self.submit_many(user_id, [(task_id, file_path, options, audio_seconds)])
+
+    def submit_many(self, user_id: str, jobs: List[Tuple[str, str, dict, Optional[float]]]):
+        """
+        Park several jobs of one user at once (single RPUSH), then dispatch.
+        Jobs: [(task_id, file_path, options, audio_seconds)]
+        """
+        now = time.time()
+        entries = [
+            {
+                "task_id": task_id,
+                "file_path": file_path,
+                "options": options,
+                "audio_seconds": audio_seconds,
+                "parked_at": now,
+            }
+            for task_id, file_path, options, audio_seconds in jobs
+        ]
+        try:
+            with self._lock():
+                self._park(user_id, entries)
+                dispatched = self._pump_locked()
+            logger.info(f"{len(entries)} task(s) parked for user {user_id} (dispatched {dispatched})")
+        except LockError as e:
+            logger.warning(f"Fair-share lock unavailable, enqueueing {len(jobs)} task(s) directly: {e}")
+            self.task_queue.enqueue_jobs(jobs)
+
+    def _park(self, user_id: str, entries: List[dict]):
+        """Caller must hold the lock"""
+        by_priority: Dict[str, List[str]] = {}
+        for entry in entries:
+            priority = queue_for_duration(entry.get("audio_seconds"))
+            by_priority.setdefault(priority, []).append(json.dumps(entry))
+
+        pipe = self.redis.pipeline()
+        for priority, raw in by_priority.items():
+            pipe.rpush(USER_QUEUE_KEY.format(user_id=user_id, priority=priority), *raw)
+        pipe.sadd(MEMBERS_KEY, user_id)
+        added = pipe.execute()[-1]
+        if added:
+            self.redis.rpush(RING_KEY, user_id)
+
+    def _head(self, user_id: str) -> Optional[Tuple[str, dict]]:
+        """
+        Next parked job of a user: shortest priority class first, FIFO within
+        a class; a head parked longer than max_wait_seconds goes first.
+
+        Returns:
+            (sub-queue key, job), or None if the user has nothing parked
+        """
+        keys = self.user_keys(user_id)
+        pipe = self.redis.pipeline()
+        for key in keys:
+            pipe.lindex(key, 0)
+        heads = [(key, json.loads(raw)) for key, raw in zip(keys, pipe.execute()) if raw is not None]
+        if not heads:
+            return None
+
+        now = time.time()
+        overdue = [head for head in heads if now - (head[1].get("parked_at") or now) > self.max_wait_seconds]
+        if overdue:
+            return min(overdue, key=lambda head: head[1]["parked_at"])
+        return heads[0]
+
+    def _parked_count(self, user_id: str) -> int:
+        pipe = self.redis.pipeline()
+        for key in self.user_keys(user_id):
+            pipe.llen(key)
+        return sum(pipe.execute())
+
+    def pump(self) -> int:
+        """
+        Move eligible jobs into RQ (called after each job and periodically by workers).
+
+        Returns:
+            Number of jobs dispatched (0 if another process holds the lock)
+        """
+        if not self.enabled:
+            return 0
+        try:
+            lock = self.redis.lock(LOCK_KEY, timeout=30, blocking_timeout=0.5)
+            if not lock.acquire():
+                return 0
+            try:
+                return self._pump_locked()
+            finally:
+                try:
+                    lock.release()
+                except LockError:
+                    pass
+        except Exception as e:
+            logger.warning(f"Fair-share pump failed: {e}")
+            return 0
+
+    def _ready_jobs(self) -> int:
+        pipe = self.redis.pipeline()
+        for name in TRANSCRIPTION_QUEUES:
+            pipe.llen(f"rq:queue:{name}")
+        return sum(pipe.execute())
+
+    def _target_depth(self) -> int:
+        """Jobs to keep waiting in RQ: one per live worker slot, at least ready_depth"""
+        try:
+            workers = Worker.count(connection=self.redis)
+        except Exception as e:
+            logger.debug(f"Fair-share could not count workers: {e}")
+            workers = 0
+        per_worker = settings.MICROBATCH_MAX_JOBS if settings.WORKER_MICROBATCH else 1
+        return max(self.ready_depth, workers * per_worker)
+
+    def _pump_locked(self) -> int:
+        """DRR dispatch loop (caller must hold the lock)"""
+        ready = self._ready_jobs()
+        target = self._target_depth()
+        dispatched = 0
+
+        for _ in range(MAX_PUMP_STEPS):
+            if ready >= target:
+                break
+
+            user_id = self.redis.lindex(RING_KEY, 0)
+            if user_id is None:
+                break
+            user_id = user_id.decode() if isinstance(user_id, bytes) else user_id
+
+            head = self._head(user_id)
+            if head is None:
+                self._retire(user_id)
+                continue
+
+            user_key, job = head
+            cost = job.get("audio_seconds") or self.default_cost
+            credit = float(self.redis.hget(DEFICIT_KEY, user_id) or 0)
+
+            if credit < cost:
+                turn = self.redis.get(TURN_KEY)
+                if (turn.decode() if isinstance(turn, bytes) else turn) != user_id:
+                    # Start of this user's turn: grant the quantum
+                    pipe = self.redis.pipeline()
+                    pipe.hincrbyfloat(DEFICIT_KEY, user_id, self.quantum)
+                    pipe.set(TURN_KEY, user_id)
+                    pipe.execute()
+                else:
+                    # Turn used up: keep the credit and pass to the next user
+                    pipe = self.redis.pipeline()
+                    pipe.lpop(RING_KEY)
+                    pipe.rpush(RING_KEY, user_id)
+                    pipe.delete(TURN_KEY)
+                    pipe.execute()
+                continue
+
+            # Enfileira antes de retirar da sub-fila: se o enqueue falhar, o job
+            # continua estacionado (e o crédito intacto) para o próximo pump.
+            # Se o processo cair entre os dois passos, o job já existe no RQ
+            # e só é retirado, sem enfileirar de novo.
+            if not self.redis.exists(Job.key_for(job["task_id"])):
+                self.task_queue.enqueue_job(
+                    job["task_id"], job["file_path"], job["options"], job.get("audio_seconds"),
+                    queued_at=job.get("parked_at")
+                )
+            pipe = self.redis.pipeline()
+            pipe.lpop(user_key)
+            pipe.hincrbyfloat(DEFICIT_KEY, user_id, -cost)
+            pipe.execute()
+            ready += 1
+            dispatched += 1
+
+            if not self._parked_count(user_id):
+                self._retire(user_id)
+
+        return dispatched
+
+    def _retire(self, user_id: str):
+        """User has no pending jobs: leave the ring and forfeit unused credit"""
+        pipe = self.redis.pipeline()
+        pipe.lrem(RING_KEY, 0, user_id)
+        pipe.srem(MEMBERS_KEY, user_id)
+        pipe.hdel(DEFICIT_KEY, user_id)
+        pipe.execute()
+        turn = self.redis.get(TURN_KEY)
+        if (turn.decode() if isinstance(turn, bytes) else turn) == user_id:
+            self.redis.delete(TURN_KEY)
+
+    def remove(self, user_id: str, task_id: str) -> bool:
+        """Drop a parked (not yet dispatched) job, e.g. when its task is deleted"""
+        if not self.enabled:
+            return False
+        try:
+            with self._lock():
+                for user_key in self.user_keys(user_id):
+                    for raw in self.redis.lrange(user_key, 0, -1):
+                        if json.loads(raw).get("task_id") == task_id:
+                            self.redis.lrem(user_key, 1, raw)
+                            if not self._parked_count(user_id):
+                                self._retire(user_id)
+                            return True
+        except Exception as e:
+            logger.warning(f"Fair-share remove failed for {task_id}: {e}")
+        return False
+
+    def get_stats(self) -> Dict:
+        """Pending jobs, audio seconds and credit per user"""
+        if not self.enabled:
+            return {"enabled": False}
+
+        users = {}
+        for raw_user in self.redis.lrange(RING_KEY, 0, -1):
+            user_id = raw_user.decode() if isinstance(raw_user, bytes) else raw_user
+            by_priority = {
+                name: [json.loads(e) for e in self.redis.lrange(key, 0, -1)]
+                for name, key in zip(PRIORITY_QUEUES, self.user_keys(user_id))
+            }
+            entries = [entry for parked in by_priority.values() for entry in parked]
+            users[user_id] = {
+                "pending": len(entries),
+                "pending_by_priority": {name: len(parked) for name, parked in by_priority.items()},
+                "audio_seconds": round(sum(e.get("audio_seconds") or self.default_cost for e in entries), 1),
+                "credit": round(float(self.redis.hget(DEFICIT_KEY, user_id) or 0), 1),
+            }
+        return {
+            "enabled": True,
+            "ready_jobs": self._ready_jobs(),
+            "ready_depth": self._target_depth(),
+            "quantum_seconds": self.quantum,
+            "users": users,
+        }
+
+
+# Global instance
+fair_share = FairShareScheduler()
@@ -0,0 +1,116 @@
+"""
+Per-host Whisper profile written by `scripts/autotune.py`.
+
+The autotuner measures real-time factor and WER on this machine and stores
+the fastest configuration whose accuracy is acceptable. TranscriptionService
+applies it before loading the model. A profile measured on different
+hardware (CPU model, core count, device) is ignored.
+"""
+import json
+import logging
+import os
+import platform
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Settings a profile may override
+PROFILE_KEYS = (
+    "WHISPER_MODEL", "COMPUTE_TYPE", "WHISPER_CPU_THREADS", "WHISPER_BEAM_SIZE",
+    "WHISPER_BATCH_SIZE", "WHISPER_CPU_BATCH_SIZE",
+)
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def host_fingerprint(device: str) -> Dict:
+    """Hardware the profile was measured on"""
+    from app.core.autoscaler import available_cpus
+
+    try:
+        import ctranslate2
+        ct2_version = ctranslate2.__version__
+    except ImportError:
+        ct2_version = None
+
+    return {
+        "cpu_model": _cpu_model(),
+        "cpus": available_cpus(),
+        "device": device,
+        "ctranslate2": ct2_version,
+    }
+
+
+def save_host_profile(path: str, profile: Dict, device: str):
+    """
+    Write the chosen configuration with the host fingerprint.
+
+    Args:
+        path: Output JSON path (HOST_PROFILE_PATH)
+        profile: {"settings": {KEY: value}, "measurements": {...}}
+        device: Device the measurements ran on
+    """
+    data = dict(profile, host=host_fingerprint(device))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_host_profile(path: str, device: str) -> Optional[Dict]:
+    """Profile for this host, or None if missing, unreadable or from other hardware"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️  Perfil do host ilegível ({path}): {e}")
+        return None
+
+    current = host_fingerprint(device)
+    if profile.get("host") != current:
+        logger.warning(
+            f"⚠️  Perfil do host ignorado: medido em {profile.get('host')}, host atual {current}. "
+            "Rode scripts/autotune.py novamente."
+        )
+        return None
+    return profile
+
+
+def apply_host_profile(settings) -> Optional[Dict]:
+    """
+    Override Whisper settings with the host profile (if enabled and valid).
+    WHISPER_CPU_THREADS is kept when already set (e.g. by CPU partitioning).
+
+    Returns:
+        The applied profile, or None
+    """
+    if not settings.HOST_PROFILE_ENABLED:
+        return None
+
+    profile = load_host_profile(settings.HOST_PROFILE_PATH, settings.DEVICE)
+    if not profile:
+        return None
+
+    applied = {}
+    for key, value in profile.get("settings", {}).items():
+        if key not in PROFILE_KEYS:
+            continue
+        if key == "WHISPER_CPU_THREADS" and settings.WHISPER_CPU_THREADS:
+            continue
+        setattr(settings, key, value)
+        applied[key] = value
+
+    logger.info(f"⚙️  Perfil do host aplicado: {applied}")
+    return profile
@@ -37,6 +37,50 @@ audio_duration_seconds = Histogram(
     buckets=[30, 60, 120, 300, 600, 1200, 1800, 3600]  # 30s to 1h
 )
 
+# Duas passadas (rascunho + refino)
+two_pass_refined_fraction = Histogram(
+    'two_pass_refined_fraction',
+    'Fraction of the audio re-transcribed by the refine pass',
+    buckets=[0, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0]
+)
+
+two_pass_speedup = Histogram(
+    'two_pass_speedup',
+    'Estimated speedup of two-pass over the refine model on the whole file',
+    buckets=[0.5, 1, 1.5, 2, 3, 4, 6, 8]
+)
+
+# Checkpoints de transcrições longas
+transcription_resumed_seconds_total = Counter(
+    'transcription_resumed_seconds_total',
+    'Audio seconds skipped by resuming a retried job from its checkpoint'
+)
+
+reaped_jobs_total = Counter(
+    'reaped_jobs_total',
+    'Orphaned jobs and stale tasks handled by the reaper',
+    ['action']  # requeued, failed, reconciled
+)
+
+# Cancelamento (tarefa excluída com job na fila ou em execução)
+jobs_cancelled_total = Counter(
+    'jobs_cancelled_total',
+    'Jobs cancelled because their task was deleted',
+    ['state']  # queued, running
+)
+
+cancelled_work_seconds_total = Counter(
+    'cancelled_work_seconds_total',
+    'Worker seconds spent on jobs cancelled while running'
+)
+
+# Redução de ruído (spectral gating antes do Whisper)
+denoise_applied_total = Counter(
+    'denoise_applied_total',
+    'Files passed through the noise-reduction stage',
+    ['reason']  # requested, low_snr
+)
+
 # ============================================================================
 # CACHE METRICS (Métricas de Cache)
 # ============================================================================
@@ -44,7 +88,7 @@ audio_duration_seconds = Histogram(
 cache_operations_total = Counter(
     'cache_operations_total',
     'Total cache operations',
-    ['cache_type', 'operation', 'result']  # transcription/analysis, get/set, hit/miss
+    ['cache_type', 'operation', 'result', 'tier']  # transcription/analysis, get/set, hit/miss, l1/redis
 )
 
 cache_size_bytes = Gauge(
@@ -65,6 +109,53 @@ cache_hit_rate = Gauge(
     ['cache_type']
 )
 
+# ============================================================================
+# CIRCUIT BREAKER METRICS (Disjuntores de dependências)
+# ============================================================================
+
+CIRCUIT_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+circuit_breaker_state = Gauge(
+    'circuit_breaker_state',
+    'Circuit breaker state (0=closed, 1=half_open, 2=open)',
+    ['name']
+)
+
+circuit_breaker_transitions_total = Counter(
+    'circuit_breaker_transitions_total',
+    'Circuit breaker state transitions',
+    ['name', 'state']
+)
+
+circuit_breaker_short_circuits = Counter(
+    'circuit_breaker_short_circuits_total',
+    'Calls skipped because the circuit was open',
+    ['name']
+)
+
+# ============================================================================
+# REDIS POOL METRICS (Pool de conexões compartilhado)
+# ============================================================================
+
+redis_pool_in_use = Gauge(
+    'redis_pool_connections_in_use',
+    'Redis connections currently checked out of the shared pool',
+    ['db', 'role', 'pool']
+)
+
+redis_pool_max_connections = Gauge(
+    'redis_pool_max_connections',
+    'Configured size of the shared Redis pool',
+    ['db', 'role', 'pool']
+)
+
+redis_pool_checkout_wait = Histogram(
+    'redis_pool_checkout_wait_seconds',
+    'Time spent waiting for a free Redis connection',
+    ['db', 'role', 'pool'],
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5]
+)
+
 # ============================================================================
 # QUEUE METRICS (Métricas de Fila)
 # ============================================================================
@@ -74,10 +165,17 @@ queue_size = Gauge(
     'Number of tasks in queue'
 )
 
+queue_depth = Gauge(
+    'queue_depth',
+    'Number of tasks waiting per priority queue',
+    ['queue']  # high, default, low, transcription_tasks (legacy)
+)
+
 queue_wait_time = Histogram(
     'queue_wait_seconds',
     'Time tasks spend waiting in queue',
-    buckets=[1, 5, 10, 30, 60, 120, 300, 600]
+    ['queue'],
+    buckets=[1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600]
 )
 
 active_tasks = Gauge(
@@ -211,22 +309,37 @@ def record_transcription(status: str, duration: float, model: str = "medium",
         transcription_duration.observe(duration)
 
 
-def record_cache_operation(cache_type: str, operation: str, result: str):
+def record_cache_operation(cache_type: str, operation: str, result: str, tier: str = "redis"):
     """
     Record cache operation.
     
     Args:
-        cache_type: 'transcription' or 'analysis'
+        cache_type: 'transcription', 'analysis' or 'generic'
         operation: 'get' or 'set'
         result: 'hit' or 'miss' (for get), 'success' or 'error' (for set)
+        tier: 'l1' (in-process) or 'redis' - a get that misses L1 is
+              recorded again for the Redis tier
     """
     cache_operations_total.labels(
         cache_type=cache_type,
         operation=operation,
-        result=result
+        result=result,
+        tier=tier
     ).inc()
 
 
+def record_circuit_state(name: str, state: str):
+    """
+    Record a circuit breaker state change.
+    
+    Args:
+        name: Circuit name (e.g., 'redis_cache')
+        state: 'closed', 'half_open' or 'open'
+    """
+    circuit_breaker_state.labels(name=name).set(CIRCUIT_STATES[state])
+    circuit_breaker_transitions_total.labels(name=name, state=state).inc()
+
+
 def record_error(error_type: str, component: str):
     """
     Record error.
@@ -300,17 +413,40 @@ def update_resource_metrics():
         logger.warning(f"Failed to update GPU metrics: {e}")
 
 
-def update_queue_metrics(redis_conn):
+def record_queue_wait(queue: str, seconds: float):
+    """
+    Record how long a job waited before a worker picked it up.
+    
+    Args:
+        queue: Queue the job came from (high, default, low)
+        seconds: Time between enqueue and start
+    """
+    queue_wait_time.labels(queue=queue).observe(max(0.0, seconds))
+
+
+def update_queue_metrics(redis_conn=None):
     """
     Update queue metrics from Redis.
     
     Args:
-        redis_conn: Redis connection
+        redis_conn: Redis connection (default: shared pool, db 0)
     """
     try:
-        # Get queue size
-        size = redis_conn.llen('rq:queue:transcription_tasks')
-        queue_size.set(size)
+        if redis_conn is None:
+            from app.core.redis_client import get_redis
+            redis_conn = get_redis(db=0)
+        
+        from app.core.queue import TRANSCRIPTION_QUEUES
+        
+        # Get queue size (per priority queue and total)
+        pipe = redis_conn.pipeline()
+        for name in TRANSCRIPTION_QUEUES:
+            pipe.llen(f'rq:queue:{name}')
+        sizes = pipe.execute()
+        
+        for name, size in zip(TRANSCRIPTION_QUEUES, sizes):
+            queue_depth.labels(queue=name).set(size)
+        queue_size.set(sum(sizes))
         
     except Exception as e:
         logger.warning(f"Failed to update queue metrics: {e}")
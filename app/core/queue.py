@@ -1,57 +1,198 @@
 
-import os
+import asyncio
 import logging
-from redis import Redis
-from rq import Queue
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from rq import Queue, Retry
 from app.core.config import settings
+from app.core.redis_client import get_redis
 
 logger = logging.getLogger(__name__)
 
+# Priority queues by expected cost (audio duration), drained by workers in
+# weighted order (see CustomWorker.reorder_queues in app/workers.py)
+PRIORITY_QUEUES = ("high", "default", "low")
+# Single FIFO queue used before priority routing; still drained so jobs
+# enqueued by older versions are not lost
+LEGACY_QUEUE = "transcription_tasks"
+TRANSCRIPTION_QUEUES = PRIORITY_QUEUES + (LEGACY_QUEUE,)
+
+
+def queue_for_duration(duration: Optional[float]) -> str:
+    """
+    Route a job by audio duration: short calls jump ahead of long recordings.
+
+    Args:
+        duration: Audio length in seconds (None if it could not be probed)
+
+    Returns:
+        Queue name ('high', 'default' or 'low')
+    """
+    if duration is None:
+        return "default"
+    if duration <= settings.PRIORITY_SHORT_MAX_SECONDS:
+        return "high"
+    if duration >= settings.PRIORITY_LONG_MIN_SECONDS:
+        return "low"
+    return "default"
+
+
+def queue_wait_seconds(job) -> Optional[float]:
+    """
+    How long a job has been waiting since the upload was queued.
+
+    Fair-share parks jobs before RQ sees them, and RQ only sets enqueued_at
+    at dispatch; meta['queued_at'] keeps the original submit time, so the
+    parked time counts as queue wait (metrics, quality step-down, starvation).
+
+    Returns:
+        Seconds, or None if the job carries no timestamp
+    """
+    queued_at = (job.meta or {}).get("queued_at")
+    if queued_at:
+        return max(0.0, time.time() - queued_at)
+    if job.enqueued_at:
+        enqueued_at = job.enqueued_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (datetime.now(timezone.utc) - enqueued_at).total_seconds())
+    return None
+
+
+def job_retry() -> Optional[Retry]:
+    """
+    Retries of a job whose worker died mid-run (OOM, recycle, deploy).
+    Long transcriptions resume from their checkpoint (app/services/checkpoint.py).
+    """
+    if settings.JOB_MAX_RETRIES <= 0:
+        return None
+    return Retry(max=settings.JOB_MAX_RETRIES)
+
+
 class TaskQueue:
     def __init__(self):
-        # Use secrets module for Redis URL
-        try:
-            from app.core.secrets import get_redis_url
-            self.redis_url = get_redis_url()
-        except Exception as e:
-            logger.warning(f"Failed to load Redis URL from secrets: {e}")
-            # Fallback to environment
-            self.redis_url = os.getenv("REDIS_URL", "redis://redis:6379/0")
-        
         self.queue = None
+        self.queues = {}
         self._init_queue()
 
     def _init_queue(self):
         try:
-            self.redis_conn = Redis.from_url(self.redis_url)
-            self.queue = Queue("transcription_tasks", connection=self.redis_conn, default_timeout=3600)
-            logger.info(f"RQ Queue initialized: {self.redis_url}")
+            # Shared per-process pool (app/core/redis_client.py)
+            self.redis_conn = get_redis(db=0)
+            self.queues = {
+                name: Queue(name, connection=self.redis_conn, default_timeout=3600)
+                for name in TRANSCRIPTION_QUEUES
+            }
+            self.queue = self.queues["default"]
+            logger.info(f"RQ Queues initialized (shared Redis pool, db=0): {', '.join(PRIORITY_QUEUES)}")
         except Exception as e:
             logger.error(f"Failed to initialize RQ: {e}. Tasks will fail!")
-            # In a real enterprise app, we might want to crash or fallback, 
+            # In a real enterprise app, we might want to crash or fallback,
             # but for now we'll just log error as fallback to memory is tricky with RQ pattern change
 
-    async def put(self, item):
+    async def put(self, item, duration: Optional[float] = None):
         """
         Enqueue a task for the worker.
-        Item: (task_id, file_path, options)
+        Item: (task_id, file_path, options) or (task_id, file_path, options, owner_id)
+        With an owner, the job goes through the per-user fair-share dispatcher.
+        duration: seconds already probed at upload (skips ffprobe)
         """
-        task_id, file_path, options = item
-        
+        task_id, file_path, options = item[:3]
+        owner_id = item[3] if len(item) > 3 else None
+
         if self.queue:
-            # We enqueue the function reference string to avoid circular imports here if possible,
-            # but RQ usually needs the function. 
-            # We imported 'app.core.worker' inside the worker process, but here we specify the path.
-            job = self.queue.enqueue(
-                "app.core.worker.process_transcription",
-                args=(task_id, file_path, options),
-                job_id=task_id, # Use same ID for tracking
-                retry=None # Configurable
-            )
-            logger.info(f"Task {task_id} enqueued to RQ. Job ID: {job.id}")
+            if duration is None:
+                # Probe duration (ffprobe) off the event loop to pick the priority queue
+                from app.services.audio import AudioProcessor
+                duration = await asyncio.to_thread(AudioProcessor.probe_duration, file_path)
+
+            from app.core.fair_share import fair_share
+            if owner_id is not None and fair_share.enabled:
+                await asyncio.to_thread(fair_share.submit, owner_id, task_id, file_path, options, duration)
+            else:
+                self.enqueue_job(task_id, file_path, options, duration)
         else:
             logger.error(f"Queue not initialized! Task {task_id} lost.")
 
+    async def put_many(self, items, owner_id=None, durations=None):
+        """
+        Enqueue a batch of tasks with one Redis round trip.
+        Items: [(task_id, file_path, options)]
+        durations: seconds already probed at upload, one per item (skips ffprobe)
+        """
+        if not self.queue:
+            logger.error(f"Queue not initialized! {len(items)} tasks lost.")
+            return
+
+        if durations is None:
+            from app.services.audio import AudioProcessor
+            durations = await asyncio.gather(*(
+                asyncio.to_thread(AudioProcessor.probe_duration, file_path) for _, file_path, _ in items
+            ))
+        jobs = [(task_id, file_path, options, duration)
+                for (task_id, file_path, options), duration in zip(items, durations)]
+
+        from app.core.fair_share import fair_share
+        if owner_id is not None and fair_share.enabled:
+            await asyncio.to_thread(fair_share.submit_many, owner_id, jobs)
+        else:
+            self.enqueue_jobs(jobs)
+
+    def enqueue_jobs(self, jobs):
+        """
+        Push many jobs into their priority queues through a single pipeline.
+        Jobs: [(task_id, file_path, options, duration)]
+        """
+        from app.services.eta import eta_estimator
+
+        now = time.time()
+        by_queue = {}
+        for task_id, file_path, options, duration in jobs:
+            by_queue.setdefault(queue_for_duration(duration), []).append(
+                Queue.prepare_data(
+                    "app.core.worker.process_transcription",
+                    args=(task_id, file_path, options),
+                    timeout=eta_estimator.job_timeout(duration, (options or {}).get("profile")),
+                    job_id=task_id,
+                    meta={"audio_seconds": duration, "queued_at": now},
+                    retry=job_retry()
+                )
+            )
+
+        pipe = self.redis_conn.pipeline()
+        for name, job_datas in by_queue.items():
+            self.queues[name].enqueue_many(job_datas, pipeline=pipe)
+        pipe.execute()
+        logger.info(
+            f"{len(jobs)} tasks enqueued to RQ in one pipeline: "
+            + ", ".join(f"{name}={len(datas)}" for name, datas in by_queue.items())
+        )
+
+    def enqueue_job(self, task_id: str, file_path: str, options: dict, duration: Optional[float],
+                    queued_at: Optional[float] = None):
+        """
+        Push a job straight into the RQ priority queue matching its duration.
+        queued_at: when the upload was queued (fair-share park time), default now
+        """
+        from app.services.eta import eta_estimator
+        queue = self.queues[queue_for_duration(duration)]
+        # Timeout pelo tempo previsto (RTF histórico), não os 3600 s fixos da fila
+        job_timeout = eta_estimator.job_timeout(duration, (options or {}).get("profile"))
+
+        # We enqueue the function reference string to avoid circular imports here if possible,
+        # but RQ usually needs the function.
+        # We imported 'app.core.worker' inside the worker process, but here we specify the path.
+        job = queue.enqueue(
+            "app.core.worker.process_transcription",
+            args=(task_id, file_path, options),
+            job_timeout=job_timeout,
+            job_id=task_id, # Use same ID for tracking
+            retry=job_retry(),  # Retomada via checkpoint se o worker cair
+            meta={"audio_seconds": duration, "queued_at": queued_at or time.time()}
+        )
+        dur_label = f"{duration:.0f}s" if duration is not None else "unknown"
+        logger.info(f"Task {task_id} enqueued to RQ '{queue.name}' (audio {dur_label}, timeout {job_timeout}s). Job ID: {job.id}")
+        return job
+
     # get() and task_done() are no longer needed for RQ as the worker handles pulling
     # We keep them if existing code relies on them, but we should refactor usages.
     # The 'main.py' used to call consume, now it won't.
@@ -0,0 +1,232 @@
+"""
+Stuck-job reaper for the transcription queues.
+
+A worker that dies mid-job (OOM kill, container restart, deploy) leaves its
+job in the StartedJobRegistry until the job timeout expires, and the task in
+the database stays in 'processing' forever. The reaper runs from the
+workers' maintenance loop and once at API startup, and for every queue in
+TRANSCRIPTION_QUEUES:
+
+1. Started registry: jobs whose worker is gone (no heartbeat within
+   REAPER_HEARTBEAT_TIMEOUT), whose worker moved on to another job, or whose
+   registry entry expired are requeued as the same RQ job (same args and
+   options, resuming from their checkpoint) while retries are left, and
+   failed otherwise.
+2. Failed registry: tasks still 'queued'/'processing' in the database are
+   marked failed with the job's error.
+
+Finally, 'processing' tasks older than REAPER_GRACE_SECONDS whose job no
+longer exists in Redis are re-enqueued from the options saved in the
+database.
+"""
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+from rq import Worker
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+
+from app.core.config import settings
+from app.core.queue import TRANSCRIPTION_QUEUES, task_queue
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = "reaper:lock"
+
+# Estados em que o job ainda será (ou está sendo) executado
+PENDING_STATUSES = (JobStatus.QUEUED, JobStatus.STARTED, JobStatus.DEFERRED, JobStatus.SCHEDULED)
+
+
+class JobReaper:
+    """Requeues orphaned jobs and reconciles TranscriptionTask.status with RQ."""
+
+    def __init__(self, queue=task_queue):
+        self.task_queue = queue
+
+    @property
+    def redis(self):
+        return self.task_queue.redis_conn
+
+    def _live_workers(self) -> Dict[str, str]:
+        """Workers with a recent heartbeat -> id of the job they are running"""
+        live = {}
+        now = datetime.utcnow()
+        timeout = timedelta(seconds=settings.REAPER_HEARTBEAT_TIMEOUT)
+        for worker in Worker.all(connection=self.redis):
+            if worker.last_heartbeat and now - worker.last_heartbeat <= timeout:
+                live[worker.name] = worker.get_current_job_id()
+        return live
+
+    def reap(self) -> Dict[str, int]:
+        """
+        One reaper pass (skipped if another process holds the lock).
+
+        Returns:
+            Counts of requeued, failed and reconciled tasks
+        """
+        counts = {"requeued": 0, "failed": 0, "reconciled": 0}
+        if not settings.REAPER_ENABLED or self.task_queue.queue is None:
+            return counts
+
+        lock = self.redis.lock(LOCK_KEY, timeout=300, blocking_timeout=0)
+        if not lock.acquire(blocking=False):
+            return counts
+
+        from app.database import SessionLocal
+        from app import crud
+        db = SessionLocal()
+        try:
+            task_store = crud.TaskStore(db)
+            live = self._live_workers()
+            for name in TRANSCRIPTION_QUEUES:
+                queue = self.task_queue.queues[name]
+                self._reap_started(queue, live, task_store, counts)
+                self._reconcile_failed(queue, task_store, counts)
+            self._reconcile_processing(task_store, counts)
+        finally:
+            db.close()
+            try:
+                lock.release()
+            except Exception:
+                pass
+
+        if any(counts.values()):
+            from app.core.metrics import reaped_jobs_total
+            for action, count in counts.items():
+                if count:
+                    reaped_jobs_total.labels(action=action).inc(count)
+            logger.warning(
+                f"🧹 Reaper: {counts['requeued']} reenfileirado(s), {counts['failed']} falho(s), "
+                f"{counts['reconciled']} tarefa(s) reconciliada(s)"
+            )
+        return counts
+
+    # ------------------------------------------------------------------
+    # Registros do RQ
+    # ------------------------------------------------------------------
+
+    def _is_orphan(self, job: Job, score, live: Dict[str, str]) -> bool:
+        """Job in the started registry that no live worker is running"""
+        if score is not None and score != -1 and score < time.time():
+            return True  # Entrada expirada (timeout + heartbeat perdidos)
+        if not job.worker_name:
+            return False  # Job heartbeated sem worker (companheiro de micro-batch)
+        if job.worker_name not in live:
+            return True  # Worker sem heartbeat
+        # Worker vivo, mas em outro job: o registro ficou para trás (zumbi)
+        started_at = job.started_at or datetime.utcnow()
+        stale = datetime.utcnow() - started_at > timedelta(seconds=settings.REAPER_HEARTBEAT_TIMEOUT)
+        return live[job.worker_name] != job.id and stale
+
+    def _reap_started(self, queue, live: Dict[str, str], task_store, counts: Dict[str, int]):
+        registry = queue.started_job_registry
+        for job_id in registry.get_job_ids():
+            try:
+                job = Job.fetch(job_id, connection=self.redis)
+            except NoSuchJobError:
+                registry.remove(job_id)
+                continue
+
+            if not self._is_orphan(job, self.redis.zscore(registry.key, job_id), live):
+                continue
+
+            file_path = job.args[1] if len(job.args) > 1 else None
+            retries_left = job.retries_left if job.retries_left is not None else settings.JOB_MAX_RETRIES
+            with self.redis.pipeline() as pipe:
+                registry.remove(job, pipeline=pipe)
+                if retries_left > 0 and file_path and os.path.exists(file_path):
+                    # Mesmo job (mesmas opções); a transcrição retoma do checkpoint
+                    job.retries_left = retries_left - 1
+                    queue.enqueue_job(job, pipeline=pipe)
+                    requeued = True
+                else:
+                    job.set_status(JobStatus.FAILED, pipeline=pipe)
+                    queue.failed_job_registry.add(
+                        job, ttl=job.failure_ttl, exc_string="Worker perdido (reaper)", pipeline=pipe
+                    )
+                    requeued = False
+                pipe.execute()
+
+            if requeued:
+                logger.warning(f"🔁 Job órfão {job.id} ({job.worker_name or 'sem worker'}) reenfileirado em '{queue.name}'")
+                task_store.update_status(job.id, "queued")
+                task_store.update_processing_step(job.id, "Reenfileirada após falha do worker")
+                counts["requeued"] += 1
+            else:
+                logger.error(f"❌ Job órfão {job.id} sem tentativas restantes: marcado como falho")
+                task_store.update_status(job.id, "failed", error_message="Worker perdido durante o processamento")
+                counts["failed"] += 1
+
+    def _reconcile_failed(self, queue, task_store, counts: Dict[str, int]):
+        """Tasks whose RQ job failed but which the database still shows as running"""
+        from app.models import TranscriptionTask
+
+        job_ids = queue.failed_job_registry.get_job_ids()
+        for start in range(0, len(job_ids), 500):
+            chunk = job_ids[start:start + 500]
+            stale = task_store.db.query(TranscriptionTask).filter(
+                TranscriptionTask.task_id.in_(chunk),
+                TranscriptionTask.status.in_(["queued", "processing"])
+            ).all()
+            for task in stale:
+                error = "Job falhou no worker"
+                try:
+                    exc_info = Job.fetch(task.task_id, connection=self.redis).exc_info
+                    if exc_info:
+                        error = exc_info.strip().splitlines()[-1][:500]
+                except NoSuchJobError:
+                    pass
+                task_store.update_status(task.task_id, "failed", error_message=error)
+                counts["reconciled"] += 1
+
+    # ------------------------------------------------------------------
+    # Banco de dados
+    # ------------------------------------------------------------------
+
+    def _reconcile_processing(self, task_store, counts: Dict[str, int]):
+        """'processing' tasks whose job vanished from Redis are re-enqueued"""
+        from app.models import TranscriptionTask
+        from app.services.audio import AudioProcessor
+
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.REAPER_GRACE_SECONDS)
+        stale = task_store.db.query(TranscriptionTask).filter(
+            TranscriptionTask.status == "processing",
+            TranscriptionTask.started_at < cutoff
+        ).all()
+
+        for task in stale:
+            try:
+                job = Job.fetch(task.task_id, connection=self.redis)
+            except NoSuchJobError:
+                job = None
+
+            if job is not None:
+                status = job.get_status()
+                if status in PENDING_STATUSES:
+                    continue
+                if status != JobStatus.FAILED:
+                    continue  # Concluído/cancelado: o worker atualiza a tarefa
+                task_store.update_status(task.task_id, "failed", error_message="Job falhou no worker")
+                counts["reconciled"] += 1
+                continue
+
+            if not os.path.exists(task.file_path):
+                task_store.update_status(task.task_id, "failed", error_message="Arquivo não encontrado para reprocessar")
+                counts["failed"] += 1
+                continue
+
+            options = json.loads(task.options) if task.options else {}
+            self.task_queue.enqueue_job(
+                task.task_id, task.file_path, options, AudioProcessor.probe_duration(task.file_path)
+            )
+            task_store.update_status(task.task_id, "queued")
+            logger.warning(f"🔁 Tarefa {task.task_id} sem job no Redis: reenfileirada")
+            counts["requeued"] += 1
+
+
+# Global instance
+job_reaper = JobReaper()
@@ -0,0 +1,210 @@
+"""
+Shared Redis client factory.
+
+Every subsystem (RQ queue, workers, cache, metrics) gets its client here, so
+each process holds one sized, blocking ConnectionPool per logical database
+instead of one unbounded pool per caller. The connection count to Redis
+is therefore bounded by processes x pools x REDIS_POOL_MAX_CONNECTIONS,
+no matter how many gunicorn or RQ workers are started.
+"""
+import os
+import logging
+import threading
+from time import perf_counter
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse, urlunparse
+
+from redis import Redis, BlockingConnectionPool
+from redis.exceptions import RedisError
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.metrics import (
+    redis_pool_in_use,
+    redis_pool_checkout_wait,
+    redis_pool_max_connections,
+)
+
+logger = logging.getLogger(__name__)
+
+# (pid, url, db, decode_responses, blocking) -> pool
+_pools: Dict[Tuple, "InstrumentedConnectionPool"] = {}
+_pools_lock = threading.Lock()
+
+# db -> breaker shared by the small state stores of that database
+_breakers: Dict[int, CircuitBreaker] = {}
+
+
+def get_redis_url(db: Optional[int] = None) -> str:
+    """
+    Obtém URL do Redis de forma segura.
+    Tenta primeiro via módulo de secrets, depois variáveis de ambiente.
+
+    Args:
+        db: Substitui o database da URL (None mantém REDIS_DB)
+    """
+    url = None
+
+    # 1. Tentar via módulo de secrets
+    try:
+        from app.core.secrets import get_redis_url as secrets_redis_url
+        url = secrets_redis_url()
+    except Exception as e:
+        logger.warning(f"Falha ao carregar URL do Redis via secrets: {e}")
+
+    if not url:
+        url = os.getenv("REDIS_URL")
+
+    # 2. Fallback: variáveis de ambiente
+    if not url:
+        redis_host = os.getenv("REDIS_HOST", "redis")
+        redis_port = os.getenv("REDIS_PORT", "6379")
+        redis_db = os.getenv("REDIS_DB", "0")
+
+        # 3. Senha: priorizar arquivo de secret, depois env var
+        redis_password = ""
+        secret_path = os.getenv("REDIS_PASSWORD_FILE", "/run/secrets/redis_password")
+
+        if os.path.exists(secret_path):
+            try:
+                with open(secret_path, "r") as f:
+                    redis_password = f.read().strip()
+            except Exception as e:
+                logger.warning(f"Não foi possível ler secret do Redis: {e}")
+
+        if not redis_password:
+            redis_password = os.getenv("REDIS_PASSWORD", "")
+
+        url = f"redis://:{redis_password}@{redis_host}:{redis_port}/{redis_db}"
+
+    if db is not None:
+        parsed = urlparse(url)
+        url = urlunparse((
+            parsed.scheme, parsed.netloc, f"/{db}",
+            parsed.params, parsed.query, parsed.fragment
+        ))
+    return url
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    BlockingConnectionPool that exports checkout wait time and connections in use.
+    When all connections are busy, callers wait up to REDIS_POOL_TIMEOUT instead of
+    opening new sockets.
+    """
+
+    def __init__(self, *args, role: str = "default", pool: str = "bytes", **kwargs):
+        # pool distingue pools do mesmo db/role (decode_responses, URL explícita),
+        # senão um sobrescreveria os gauges do outro
+        self._labels = {"db": str(kwargs.get("db", 0)), "role": role, "pool": pool}
+        super().__init__(*args, **kwargs)
+        redis_pool_max_connections.labels(**self._labels).set(self.max_connections)
+
+    def reset(self):
+        super().reset()
+        # Called on init and after fork: nothing is checked out in this process
+        if hasattr(self, "_labels"):
+            redis_pool_in_use.labels(**self._labels).set(0)
+
+    def get_connection(self, *args, **kwargs):
+        start = perf_counter()
+        connection = super().get_connection(*args, **kwargs)
+        redis_pool_checkout_wait.labels(**self._labels).observe(perf_counter() - start)
+        redis_pool_in_use.labels(**self._labels).inc()
+        return connection
+
+    def release(self, connection):
+        owned = self.owns_connection(connection)
+        super().release(connection)
+        if owned:
+            redis_pool_in_use.labels(**self._labels).dec()
+
+
+def _pool_label(decode_responses: bool, url_kwargs: Optional[dict] = None) -> str:
+    """Metrics identity of a pool: response type, plus host:port for an explicit URL (no password)"""
+    label = "str" if decode_responses else "bytes"
+    if url_kwargs:
+        if "path" in url_kwargs:
+            label += f"@{url_kwargs['path']}"
+        else:
+            label += f"@{url_kwargs.get('host', 'localhost')}:{url_kwargs.get('port', 6379)}"
+    return label
+
+
+def get_connection_pool(db: int = 0, decode_responses: bool = False,
+                        blocking: bool = False, url: Optional[str] = None) -> InstrumentedConnectionPool:
+    """
+    Get (or create) this process's pool for a logical database.
+
+    Args:
+        db: Redis database number (0 = RQ, 1 = cache)
+        decode_responses: Return str instead of bytes
+        blocking: Pool for long blocking commands (RQ BLPOP, pub/sub listeners),
+                  created without socket_timeout
+        url: Explicit Redis URL (default: get_redis_url())
+    """
+    key = (os.getpid(), url, db, decode_responses, blocking)
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # Pool options parsed from the URL (host, port, password); db overridden
+            url_kwargs = BlockingConnectionPool.from_url(url or get_redis_url(db)).connection_kwargs
+            url_kwargs.update(
+                db=db,
+                decode_responses=decode_responses,
+                socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                socket_timeout=None if blocking else settings.REDIS_SOCKET_TIMEOUT,
+            )
+            pool = InstrumentedConnectionPool(
+                max_connections=settings.REDIS_POOL_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                role="blocking" if blocking else "default",
+                pool=_pool_label(decode_responses, url_kwargs if url else None),
+                **url_kwargs
+            )
+            _pools[key] = pool
+            logger.info(
+                f"Redis pool criado (pid={os.getpid()}, db={db}, "
+                f"max={settings.REDIS_POOL_MAX_CONNECTIONS}, blocking={blocking})"
+            )
+    return pool
+
+
+def get_redis(db: int = 0, decode_responses: bool = False,
+              blocking: bool = False, url: Optional[str] = None) -> Redis:
+    """
+    Redis client backed by the shared per-process pool.
+    Clients are cheap; the pool is what holds the connections.
+    """
+    return Redis(connection_pool=get_connection_pool(db, decode_responses, blocking, url))
+
+
+def get_breaker(db: int = 0) -> CircuitBreaker:
+    """
+    Per-process circuit breaker for a logical database.
+
+    Used by the best-effort state kept in Redis (checkpoints, quality
+    step-down level, cancel flags, diarization embeddings in db 1): while
+    Redis is unhealthy their calls short-circuit to the fallback instead of
+    waiting REDIS_SOCKET_TIMEOUT on every segment or job.
+    """
+    breaker = _breakers.get(db)
+    if breaker is not None:
+        return breaker
+
+    with _pools_lock:
+        breaker = _breakers.get(db)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                f"redis_db{db}",
+                probe=lambda: get_redis(db=db).ping(),
+                failure_threshold=settings.CACHE_BREAKER_FAILURES,
+                cooldown_seconds=settings.CACHE_BREAKER_COOLDOWN,
+                failure_exceptions=(RedisError,)
+            )
+            _breakers[db] = breaker
+    return breaker
@@ -97,6 +97,16 @@ class ConnectionManager:
         
         await self.broadcast_to_task(task_id, message)
     
+    async def send_eta_update(self, task_id: str, eta: dict):
+        """Envia posição na fila e previsão de início/término (app/services/eta.py)"""
+        message = {
+            "type": "eta_update",
+            "task_id": task_id,
+            **eta
+        }
+        
+        await self.broadcast_to_task(task_id, message)
+    
     async def send_completion(self, task_id: str, result: dict):
         """Envia notificação de conclusão com resultado"""
         message = {
@@ -11,24 +11,97 @@ from app.database import SessionLocal
 from app.core.config import logger
 from app.core.queue import task_queue
 from app.core.services import whisper_service
+from app.core.cancellation import job_canceller, TranscriptionCancelled
 
 # Métricas
 from app.core.metrics import (
     record_transcription,
     record_error,
+    record_queue_wait,
     file_size_bytes,
-    audio_duration_seconds
+    audio_duration_seconds,
+    jobs_cancelled_total,
+    cancelled_work_seconds_total
 )
 
 
+def _record_queue_wait():
+    """Registra quanto tempo o job atual esperou na fila, fair-share incluído (retorna os segundos, ou None)"""
+    try:
+        from rq import get_current_job
+        from app.core.queue import queue_wait_seconds
+        job = get_current_job()
+        wait = queue_wait_seconds(job) if job else None
+        if wait is not None:
+            record_queue_wait(job.origin, wait)
+            return wait
+    except Exception as e:
+        logger.debug(f"Falha ao registrar espera na fila: {e}")
+    return None
+
+
+def _quality_decision(options: dict, wait_seconds):
+    """
+    Perfil efetivo e motivo, decididos uma única vez por job e guardados em
+    job.meta['quality']: o micro-batch já decide antes, e um retry (worker morto)
+    reutiliza a decisão da 1ª tentativa - o perfil faz parte da chave de cache e
+    do checkpoint, então mudar de perfil perderia o progresso salvo.
+    """
+    job = None
+    try:
+        from rq import get_current_job
+        job = get_current_job()
+        if job and job.meta.get("quality"):
+            profile, reason = job.meta["quality"]
+            return profile, reason
+    except Exception as e:
+        logger.debug(f"Falha ao ler decisão de qualidade do job: {e}")
+    
+    from app.services.quality import quality_governor
+    profile, reason = quality_governor.resolve(options.get('profile'), wait_seconds)
+    if job:
+        try:
+            job.meta["quality"] = [profile, reason]
+            job.save_meta()
+        except Exception as e:
+            logger.debug(f"Falha ao gravar decisão de qualidade do job: {e}")
+    return profile, reason
+
+
+def _record_cancelled(task_id: str, wasted_seconds: float):
+    """Registra o trabalho descartado de um job cancelado em execução"""
+    logger.info(f"🚫 Tarefa {task_id} cancelada durante o processamento ({wasted_seconds:.1f}s de trabalho descartados)")
+    jobs_cancelled_total.labels(state="running").inc()
+    cancelled_work_seconds_total.inc(wasted_seconds)
+    job_canceller.clear(task_id)
+
+
 def process_transcription(task_id: str, file_path: str, options: dict = {}):
     """Processa uma tarefa de transcrição de áudio."""
     background_db = SessionLocal()
     task_store = crud.TaskStore(background_db)
+    start_ts = perf_counter()
     
     try:
         logger.info(f"Iniciando processamento da tarefa {task_id}")
         
+        # Tarefa excluída enquanto o job esperava (fila RQ ou fair-share)
+        if job_canceller.is_cancelled(task_id):
+            logger.info(f"🚫 Tarefa {task_id} cancelada antes de iniciar; job ignorado")
+            jobs_cancelled_total.labels(state="queued").inc()
+            job_canceller.clear(task_id)
+            return
+        
+        # MÉTRICAS: Tempo de espera na fila (por prioridade)
+        wait_seconds = _record_queue_wait()
+        
+        # Perfil de qualidade: o pedido no upload, rebaixado se a fila estourou o SLA.
+        # O perfil efetivo entra nas opções (e portanto na chave de cache)
+        profile, profile_reason = _quality_decision(options, wait_seconds)
+        options = dict(options, profile=profile)
+        task_store.set_quality_profile(task_id, profile, profile_reason)
+        logger.info(f"Tarefa {task_id}: perfil '{profile}' ({profile_reason})")
+        
         # ETAPA 1: Validação do arquivo
         task_store.update_processing_step(task_id, "Validando arquivo de áudio")
         if not os.path.exists(file_path):
@@ -49,11 +122,6 @@ def process_transcription(task_id: str, file_path: str, options: dict = {}):
         
         start_ts = perf_counter()
         
-        # PERFORMANCE: Redução de ruído desativada para velocidade
-        # Usar arquivo original diretamente
-        cleaned_audio_path = file_path
-        logger.info(f"Usando arquivo de áudio (sem redução de ruído): {cleaned_audio_path}")
-        
         # WebSocket: Broadcast de updates em tempo real
         async def broadcast_progress(pct):
             try:
@@ -86,7 +154,10 @@ def process_transcription(task_id: str, file_path: str, options: dict = {}):
 
         # ETAPA 3: Processamento (transcrição + análise)
         task_store.update_processing_step(task_id, "Transcrevendo áudio")
-        result = whisper_service.process_task(cleaned_audio_path, options=options, progress_callback=update_prog, rules=rules)
+        result = whisper_service.process_task(
+            file_path, options=options, progress_callback=update_prog, rules=rules,
+            cancel_check=job_canceller.checker(task_id)  # Aborta entre segmentos se a tarefa for excluída
+        )
         processing_time = perf_counter() - start_ts
         
         # MÉTRICAS: Registrar duração do áudio
@@ -122,11 +193,17 @@ def process_transcription(task_id: str, file_path: str, options: dict = {}):
             duration=result.get("duration", 0.0),
             processing_time=processing_time,
             summary=result.get("summary"),
-            topics=result.get("topics")
+            topics=result.get("topics"),
+            segments=result.get("segments")  # Blob do SegmentStore (legendas, seek, regras)
         )
         
         logger.info(f"Tarefa {task_id} concluída com sucesso.")
         
+        # ETA: RTF deste host/modelo/perfil (só quando houve transcrição, não cache)
+        if result.get("transcribed"):
+            from app.services.eta import eta_estimator
+            eta_estimator.record(profile, result.get("duration", 0.0), processing_time)
+        
         # MÉTRICAS: Registrar transcrição bem-sucedida
         record_transcription(
             status='success',
@@ -142,8 +219,14 @@ def process_transcription(task_id: str, file_path: str, options: dict = {}):
         except Exception as e:
             logger.warning(f"Limpeza pós-tarefa falhou: {e}")
 
+    except TranscriptionCancelled:
+        _record_cancelled(task_id, perf_counter() - start_ts)
     except Exception as e:
         processing_time = perf_counter() - start_ts
+        if job_canceller.is_cancelled(task_id):
+            # Falha causada pela exclusão (arquivo removido no meio do processamento)
+            _record_cancelled(task_id, processing_time)
+            return
         logger.error(f"Tarefa {task_id} falhou: {e}")
         task_store.update_status(task_id, "failed", error_message=str(e))
         
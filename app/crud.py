@@ -7,11 +7,23 @@ import os
 from app.core.config import logger
 
 
+def _audio_columns(audio_info) -> dict:
+    """AudioInfo (app/services/audio_probe.py) -> TranscriptionTask columns"""
+    if audio_info is None:
+        return {}
+    return {
+        "duration": audio_info.duration,
+        "codec": audio_info.codec,
+        "sample_rate": audio_info.sample_rate,
+        "channels": audio_info.channels,
+    }
+
+
 class TaskStore:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_task(self, filename: str, file_path: str, owner_id: str, options: dict = None) -> models.TranscriptionTask:
+    def create_task(self, filename: str, file_path: str, owner_id: str, options: dict = None, audio_info=None) -> models.TranscriptionTask:
         import json
         options_str = json.dumps(options) if options else None
         
@@ -21,13 +33,64 @@ class TaskStore:
             owner_id=owner_id,
             status="queued",
             progress=0,
-            options=options_str
+            options=options_str,
+            **_audio_columns(audio_info)
         )
         self.db.add(task)
         self.db.commit()
         self.db.refresh(task)
         return task
 
+    def create_tasks(self, rows: list, owner_id: str, options: dict = None) -> List[models.TranscriptionTask]:
+        """
+        Bulk-create queued tasks in one transaction.
+        rows: [{"task_id", "filename", "file_path", "audio_info" (optional AudioInfo)}]
+        """
+        import json
+        options_str = json.dumps(options) if options else None
+        
+        tasks = [
+            models.TranscriptionTask(
+                task_id=row["task_id"],
+                filename=row["filename"],
+                file_path=row["file_path"],
+                owner_id=owner_id,
+                status="queued",
+                progress=0,
+                options=options_str,
+                **_audio_columns(row.get("audio_info"))
+            )
+            for row in rows
+        ]
+        self.db.add_all(tasks)
+        self.db.commit()
+        return tasks
+
+    def set_audio_info(self, task_id: str, audio_info) -> Optional[models.TranscriptionTask]:
+        """Store metadata probed after the task was created (formats left to ffprobe)"""
+        task = self.get_task(task_id)
+        if task:
+            for column, value in _audio_columns(audio_info).items():
+                setattr(task, column, value)
+            self.db.commit()
+        return task
+
+    def active_task_ids(self, owner_id: str = None) -> List[str]:
+        """Ids of tasks that may still have a queued or running job"""
+        query = self.db.query(models.TranscriptionTask.task_id).filter(
+            models.TranscriptionTask.status.in_(["queued", "processing"])
+        )
+        if owner_id is not None:
+            query = query.filter(models.TranscriptionTask.owner_id == owner_id)
+        return [task_id for (task_id,) in query.all()]
+
+    def fail_tasks(self, task_ids: list, error_message: str):
+        """Mark several tasks as failed with one UPDATE"""
+        self.db.query(models.TranscriptionTask).filter(
+            models.TranscriptionTask.task_id.in_(task_ids)
+        ).update({"status": "failed", "error_message": error_message}, synchronize_session=False)
+        self.db.commit()
+
     def get_task(self, task_id: str) -> Optional[models.TranscriptionTask]:
         return self.db.query(models.TranscriptionTask).filter(
             models.TranscriptionTask.task_id == task_id
@@ -50,6 +113,14 @@ class TaskStore:
             self.db.refresh(task)
         return task
 
+    def set_quality_profile(self, task_id: str, profile: str, reason: str):
+        """Registra o perfil de qualidade efetivo da tarefa e o motivo da escolha"""
+        task = self.get_task(task_id)
+        if task:
+            task.profile = profile
+            task.profile_reason = reason[:200] if reason else reason  # Coluna String(200)
+            self.db.commit()
+        return task
 
     def update_status(self, task_id: str, status: str, error_message: str = None):
         task = self.get_task(task_id)
@@ -67,11 +138,12 @@ class TaskStore:
             self.db.refresh(task)
         return task
 
-    def save_result(self, task_id: str, text: str, language: str, duration: float, processing_time: float, summary: str = None, topics: str = None, text_corrected: str = None):
+    def save_result(self, task_id: str, text: str, language: str, duration: float, processing_time: float, summary: str = None, topics: str = None, text_corrected: str = None, segments: bytes = None):
         task = self.get_task(task_id)
         if task:
             task.status = "completed"
             task.result_text = text
+            task.segments = segments  # SegmentStore.to_bytes()
             task.result_text_corrected = text_corrected  # Texto com correção ortográfica
             task.language = language
             task.duration = duration
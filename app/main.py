@@ -98,12 +98,15 @@ async def startup_event():
         else:
             logger.info("Usuário admin já existe.")
             
-        # 3. RECUPERAÇÃO DE TAREFAS - DESABILITADO
-        # NOTA: Recuperação automática desabilitada para evitar duplicação de jobs
-        # Quando o app reinicia, ele não deve reenfileirar tarefas que já estão no Redis
-        # Se necessário, use o endpoint /api/admin/retry-failed para reprocessar tarefas específicas
-        
-        logger.info("Recuperação automática de tarefas desabilitada (evita duplicação)")
+        # 3. RECUPERAÇÃO DE TAREFAS (reaper)
+        # Não reenfileira às cegas (duplicaria jobs que ainda estão no Redis): o reaper
+        # só requeue jobs cujo worker morreu e tarefas cujo job sumiu do Redis
+        try:
+            from app.core.reaper import job_reaper
+            counts = await asyncio.to_thread(job_reaper.reap)
+            logger.info(f"Recuperação de tarefas (reaper): {counts}")
+        except Exception as e:
+            logger.warning(f"Reaper na inicialização falhou: {e}")
 
 
     finally:
@@ -1,5 +1,6 @@
 
-from sqlalchemy import Column, String, DateTime, Float, Text, Integer, Boolean, Index
+from sqlalchemy import Column, String, DateTime, Float, Text, Integer, Boolean, Index, LargeBinary
+from sqlalchemy.orm import deferred
 from datetime import datetime
 from .database import Base
 import uuid
@@ -17,8 +18,14 @@ class TranscriptionTask(Base):
     error_message = Column(Text, nullable=True)
     result_text = Column(Text, nullable=True)
     result_text_corrected = Column(Text, nullable=True)  # Spell-corrected version
+    # Segmentos com timestamps (app/services/segment_store.py), blob comprimido;
+    # deferred: listagens não carregam o blob
+    segments = deferred(Column(LargeBinary, nullable=True))
     language = Column(String, nullable=True)
     duration = Column(Float, nullable=True)
+    codec = Column(String, nullable=True)  # Metadados lidos no upload (app/services/audio_probe.py)
+    sample_rate = Column(Integer, nullable=True)
+    channels = Column(Integer, nullable=True)
     progress = Column(Integer, default=0, nullable=False)
     processing_step = Column(String, nullable=True)  # Etapa atual: "Verificando cache", "Otimizando áudio", etc.
     processing_time = Column(Float, nullable=True)
@@ -26,6 +33,8 @@ class TranscriptionTask(Base):
     summary = Column(Text, nullable=True)
     topics = Column(Text, nullable=True)
     options = Column(Text, nullable=True)
+    profile = Column(String(20), nullable=True)  # Perfil de qualidade efetivo: fast, balanced, accurate
+    profile_reason = Column(String(200), nullable=True)  # "requested", "default" ou motivo do step-down
     notes = Column(Text, nullable=True)
     owner_id = Column(String, nullable=True, index=True) # ForeignKey to User.id
     is_archived = Column(Boolean, default=False, nullable=False, index=True)  # For auto-cleanup
@@ -49,6 +58,9 @@ class TranscriptionTask(Base):
             "error_message": self.error_message,
             "language": self.language,
             "duration": self.duration,
+            "codec": self.codec,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
             "progress": self.progress,
             "processing_step": self.processing_step,
             "processing_time": self.processing_time,
@@ -56,6 +68,8 @@ class TranscriptionTask(Base):
             "summary": self.summary,
             "topics": self.topics,
             "options": self.options,
+            "profile": self.profile,
+            "profile_reason": self.profile_reason,
             "notes": self.notes,
             "is_archived": self.is_archived if hasattr(self, 'is_archived') else False
         }
@@ -56,8 +56,9 @@ class PaginationParams(BaseModel):
         return (self.page - 1) * self.page_size
 
 class UploadOptions(BaseModel):
-    timestamp: bool = True
-    diarization: bool = True
+    timestamp: bool = False
+    diarization: bool = False
+    denoise: Optional[bool] = None  # None = automático pelo SNR
 
 # Admin Schemas - Phase 1 Security
 class RuleCreate(BaseModel):
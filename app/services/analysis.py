@@ -65,7 +65,11 @@ class BusinessAnalyzer:
                 if r == 'tokenizers/punkt_tab': pkg = 'punkt_tab'
                 nltk.download(pkg, quiet=True)
 
-    def _check_compliance(self, text_lower: str, rules: list = None) -> Dict[str, Any]:
+    def indicator_terms(self, rules: list = None) -> Dict[str, List[str]]:
+        """
+        Terms scanned by the compliance check, by category, including the
+        dynamic rules (also used to timestamp rule hits in the segment store).
+        """
         # Positive (Green) - Core Product Terms
         pos_indicators = [
             "economia premiável", "economia programada", "título de capitalização",
@@ -89,9 +93,6 @@ class BusinessAnalyzer:
             "pressão", "banco central"
         ]
         
-        VALID_PARCELS = ["20", "30", "40", "50", "60", "70", "80", "90", "100", 
-                        "110", "120", "130", "140", "150", "160", "170", "180", "190", "200"]
-
         # Merge with Dynamic Rules
         if rules:
             for rule in rules:
@@ -103,6 +104,18 @@ class BusinessAnalyzer:
                 elif rule['category'] == 'critical': # Map 'critical' to Forbidden (Red)
                      neg_indicators.extend(clean_keys)
 
+        return {
+            "positivos": sorted(set(pos_indicators)),
+            "neutros": sorted(set(neu_indicators)),
+            "negativos": sorted(set(neg_indicators)),
+        }
+
+    def _check_compliance(self, text_lower: str, rules: list = None) -> Dict[str, Any]:
+        terms = self.indicator_terms(rules)
+        
+        VALID_PARCELS = ["20", "30", "40", "50", "60", "70", "80", "90", "100", 
+                        "110", "120", "130", "140", "150", "160", "170", "180", "190", "200"]
+
         conformidade = {
             "positivos": [],
             "neutros": [],
@@ -112,12 +125,9 @@ class BusinessAnalyzer:
         }
 
         # Unique sets for scanning
-        for i in set(pos_indicators):
-            if i in text_lower: conformidade["positivos"].append(i)
-        for i in set(neu_indicators):
-            if i in text_lower: conformidade["neutros"].append(i)
-        for i in set(neg_indicators):
-            if i in text_lower: conformidade["negativos"].append(i)
+        for category, category_terms in terms.items():
+            for i in category_terms:
+                if i in text_lower: conformidade[category].append(i)
 
         # Money
         money_matches = re.findall(r'r\$\s?(\d+(?:[.,]\d{2})?)', text_lower)
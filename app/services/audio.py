@@ -7,6 +7,34 @@ import os
 logger = logging.getLogger(__name__)
 
 class AudioProcessor:
+    @staticmethod
+    def probe_duration(input_path: str):
+        """
+        Audio duration in seconds read from the container (no decoding).
+        WAV/MP3/OGG/FLAC headers are parsed in-process, other formats use ffprobe.
+        Returns None if it cannot be determined.
+        """
+        from app.services.audio_probe import InvalidAudioError, probe_header
+        try:
+            info = probe_header(input_path)
+            if info is not None and info.duration:
+                return info.duration
+        except (OSError, InvalidAudioError) as e:
+            logger.debug(f"Header probe of {input_path} failed, using ffprobe: {e}")
+
+        command = [
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            input_path
+        ]
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=15, check=True)
+            return float(result.stdout.strip())
+        except Exception as e:
+            logger.warning(f"Could not probe duration of {input_path}: {e}")
+            return None
+
     @staticmethod
     def enhance_audio(input_path: str) -> str:
         """
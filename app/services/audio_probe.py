@@ -0,0 +1,311 @@
+"""
+Upload-time audio probing.
+
+Reads duration, codec, sample rate and channel count from the container
+header without decoding. WAV, MP3, OGG (Vorbis/Opus) and FLAC are parsed
+in-process from the first and last PROBE_BYTES of the file; anything else
+(M4A, WebM, MP4, ...) goes to ffprobe. Probes run in a dedicated thread pool
+(AUDIO_PROBE_WORKERS) so bursts of uploads never start more ffprobe
+processes than that.
+
+A file whose header is recognised but broken, or that ffprobe cannot read,
+raises InvalidAudioError: the upload is rejected before it reaches a worker.
+"""
+import asyncio
+import json
+import logging
+import os
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bytes lidos do início e do fim do arquivo (cabeçalhos; última página OGG)
+PROBE_BYTES = 64 * 1024
+
+
+class InvalidAudioError(ValueError):
+    """File is not decodable audio"""
+
+
+class AudioInfo(NamedTuple):
+    duration: Optional[float]
+    codec: Optional[str]
+    sample_rate: Optional[int]
+    channels: Optional[int]
+
+
+# ----------------------------------------------------------------------
+# WAV
+# ----------------------------------------------------------------------
+
+_WAV_CODECS = {1: "pcm_s{bits}le", 3: "pcm_f{bits}le", 6: "pcm_alaw", 7: "pcm_mulaw", 0xFFFE: "pcm_s{bits}le"}
+
+
+def _parse_wav(head: bytes, size: int) -> AudioInfo:
+    position, fmt, data_size = 12, None, None
+    while position + 8 <= len(head):
+        chunk_id, chunk_size = head[position:position + 4], struct.unpack_from("<I", head, position + 4)[0]
+        if chunk_id == b"fmt " and position + 24 <= len(head):
+            fmt = struct.unpack_from("<HHIIHH", head, position + 8)
+        elif chunk_id == b"data":
+            # Tamanho 0/0xFFFFFFFF (gravação em streaming): usa o resto do arquivo
+            remaining = size - (position + 8)
+            data_size = chunk_size if 0 < chunk_size <= remaining else remaining
+            break
+        position += 8 + chunk_size + (chunk_size & 1)
+
+    if fmt is None or data_size is None:
+        raise InvalidAudioError("WAV sem chunk 'fmt ' ou 'data'")
+    audio_format, channels, sample_rate, byte_rate, _, bits = fmt
+    if not channels or not sample_rate or not byte_rate:
+        raise InvalidAudioError("WAV com cabeçalho 'fmt ' inválido")
+    codec = _WAV_CODECS.get(audio_format, f"wav_0x{audio_format:04x}").format(bits=bits)
+    return AudioInfo(data_size / byte_rate, codec, sample_rate, channels)
+
+
+# ----------------------------------------------------------------------
+# FLAC
+# ----------------------------------------------------------------------
+
+def _parse_flac(head: bytes) -> AudioInfo:
+    # Primeiro bloco de metadados é sempre STREAMINFO (tipo 0, 34 bytes)
+    if len(head) < 42 or head[4] & 0x7F != 0:
+        raise InvalidAudioError("FLAC sem STREAMINFO")
+    info = int.from_bytes(head[18:26], "big")
+    sample_rate = info >> 44
+    channels = ((info >> 41) & 0x7) + 1
+    total_samples = info & 0xFFFFFFFFF
+    if not sample_rate:
+        raise InvalidAudioError("FLAC com taxa de amostragem inválida")
+    return AudioInfo(total_samples / sample_rate if total_samples else None, "flac", sample_rate, channels)
+
+
+# ----------------------------------------------------------------------
+# OGG (Vorbis / Opus)
+# ----------------------------------------------------------------------
+
+def _last_granule(tail: bytes) -> Optional[int]:
+    position = tail.rfind(b"OggS")
+    while position != -1:
+        if position + 14 <= len(tail):
+            granule = struct.unpack_from("<q", tail, position + 6)[0]
+            if granule >= 0:
+                return granule
+        position = tail.rfind(b"OggS", 0, position)
+    return None
+
+
+def _parse_ogg(head: bytes, tail: bytes) -> AudioInfo:
+    if len(head) < 28:
+        raise InvalidAudioError("OGG truncado")
+    segments = head[26]
+    packet = head[27 + segments:27 + segments + 32]
+    granule = _last_granule(tail)
+
+    if packet.startswith(b"\x01vorbis") and len(packet) >= 16:
+        channels, sample_rate = packet[11], struct.unpack_from("<I", packet, 12)[0]
+        if not channels or not sample_rate:
+            raise InvalidAudioError("Vorbis com cabeçalho inválido")
+        duration = granule / sample_rate if granule else None
+        return AudioInfo(duration, "vorbis", sample_rate, channels)
+
+    if packet.startswith(b"OpusHead") and len(packet) >= 16:
+        channels = packet[9]
+        pre_skip = struct.unpack_from("<H", packet, 10)[0]
+        input_rate = struct.unpack_from("<I", packet, 12)[0]
+        if not channels:
+            raise InvalidAudioError("Opus com cabeçalho inválido")
+        # Opus decodifica sempre a 48 kHz; granule conta amostras a 48 kHz
+        duration = max(0, granule - pre_skip) / 48000 if granule else None
+        return AudioInfo(duration, "opus", input_rate or 48000, channels)
+
+    raise InvalidAudioError("OGG sem stream Vorbis/Opus")
+
+
+# ----------------------------------------------------------------------
+# MP3 (MPEG-1/2/2.5, camadas I-III)
+# ----------------------------------------------------------------------
+
+_MPEG_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MPEG_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+_MPEG_VERSIONS = {0: 2.5, 2: 2, 3: 1}
+
+
+def _mpeg_frame(head: bytes, position: int):
+    """(version, layer, bitrate bps, sample_rate, channels, frame length) or None"""
+    if position + 4 > len(head) or head[position] != 0xFF or head[position + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = head[position + 1], head[position + 2], head[position + 3]
+    version = _MPEG_VERSIONS.get((b1 >> 3) & 0x3)
+    layer = 4 - ((b1 >> 1) & 0x3)
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 0x3
+    if version is None or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = _MPEG_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MPEG_SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x1
+    channels = 1 if b3 >> 6 == 3 else 2
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        length = 144 * bitrate // sample_rate + padding
+    return version, layer, bitrate, sample_rate, channels, length
+
+
+def _vbr_frames(head: bytes, position: int, version, channels) -> Optional[int]:
+    """Frame count from a Xing/Info or VBRI header in the first frame"""
+    side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+    xing = position + 4 + side_info
+    if head[xing:xing + 4] in (b"Xing", b"Info") and len(head) >= xing + 12:
+        flags = struct.unpack_from(">I", head, xing + 4)[0]
+        if flags & 0x1:
+            return struct.unpack_from(">I", head, xing + 8)[0]
+    vbri = position + 4 + 32
+    if head[vbri:vbri + 4] == b"VBRI" and len(head) >= vbri + 18:
+        return struct.unpack_from(">I", head, vbri + 14)[0]
+    return None
+
+
+def _parse_mp3(head: bytes, size: int) -> AudioInfo:
+    position = 0
+    if head.startswith(b"ID3") and len(head) >= 10:
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        position = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+        if position >= len(head):
+            return None  # Tag ID3 maior que o trecho lido: deixa para o ffprobe
+
+    # Primeiro frame seguido de outro frame válido (evita falsos sincronismos)
+    limit = min(len(head) - 4, position + 16 * 1024)
+    while position < limit:
+        frame = _mpeg_frame(head, position)
+        if frame and (position + frame[5] >= len(head) - 4 or _mpeg_frame(head, position + frame[5])):
+            break
+        position += 1
+    else:
+        raise InvalidAudioError("MP3 sem frames MPEG válidos")
+
+    version, layer, bitrate, sample_rate, channels, _ = frame
+    samples_per_frame = 384 if layer == 1 else (576 if layer == 3 and version != 1 else 1152)
+    frames = _vbr_frames(head, position, version, channels)
+    if frames:
+        duration = frames * samples_per_frame / sample_rate
+    else:
+        duration = (size - position) * 8 / bitrate  # CBR
+    return AudioInfo(duration, f"mp{layer}", sample_rate, channels)
+
+
+# ----------------------------------------------------------------------
+# Entrada
+# ----------------------------------------------------------------------
+
+def parse_header(head: bytes, tail: bytes, size: int) -> Optional[AudioInfo]:
+    """
+    Parse a known container from its first/last bytes.
+
+    Args:
+        head: First PROBE_BYTES of the file
+        tail: Last PROBE_BYTES of the file (OGG duration)
+        size: File size in bytes
+
+    Returns:
+        AudioInfo, or None for formats left to ffprobe
+
+    Raises:
+        InvalidAudioError: Recognised container with a broken header
+    """
+    try:
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            return _parse_wav(head, size)
+        if head[:4] == b"fLaC":
+            return _parse_flac(head)
+        if head[:4] == b"OggS":
+            return _parse_ogg(head, tail)
+        if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+            return _parse_mp3(head, size)
+    except (struct.error, IndexError, ZeroDivisionError) as e:
+        raise InvalidAudioError(f"Cabeçalho de áudio truncado: {e}")
+    return None
+
+
+def probe_content(content: bytes) -> Optional[AudioInfo]:
+    """Header probe of an upload held in memory (None if ffprobe is needed)"""
+    return parse_header(content[:PROBE_BYTES], content[-PROBE_BYTES:], len(content))
+
+
+def _ffprobe(path: str) -> AudioInfo:
+    command = [
+        "ffprobe", "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,sample_rate,channels:format=duration",
+        "-of", "json", path
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=30, check=True)
+        data = json.loads(result.stdout or "{}")
+    except Exception as e:
+        raise InvalidAudioError(f"ffprobe não conseguiu ler o arquivo: {e}")
+
+    streams = data.get("streams") or []
+    if not streams:
+        raise InvalidAudioError("Arquivo sem stream de áudio")
+    stream = streams[0]
+    duration = (data.get("format") or {}).get("duration")
+    return AudioInfo(
+        float(duration) if duration not in (None, "N/A") else None,
+        stream.get("codec_name"),
+        int(stream["sample_rate"]) if stream.get("sample_rate") else None,
+        stream.get("channels"),
+    )
+
+
+def probe_header(path: str) -> Optional[AudioInfo]:
+    """Header probe of a file on disk (None if ffprobe is needed)"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(PROBE_BYTES)
+        f.seek(max(0, size - PROBE_BYTES))
+        tail = f.read(PROBE_BYTES)
+    return parse_header(head, tail, size)
+
+
+def probe_file(path: str) -> AudioInfo:
+    """
+    Probe a file on disk: header parser first, ffprobe for other formats.
+
+    Raises:
+        InvalidAudioError: Not decodable audio
+    """
+    info = probe_header(path)
+    if info is None or info.duration is None:
+        info = _ffprobe(path)
+    if info.duration is not None and info.duration <= 0:
+        raise InvalidAudioError("Áudio sem duração")
+    return info
+
+
+# Pool dedicado: limita ffprobes simultâneos em rajadas de upload
+_executor = ThreadPoolExecutor(max_workers=settings.AUDIO_PROBE_WORKERS, thread_name_prefix="audio-probe")
+
+
+async def probe_file_async(path: str) -> AudioInfo:
+    """probe_file in the probe thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, probe_file, path)
+
+
+async def probe_content_async(content: bytes) -> Optional[AudioInfo]:
+    """probe_content in the probe thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, probe_content, content)
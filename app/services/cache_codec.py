@@ -0,0 +1,238 @@
+"""
+Pluggable serializer/compressor layer for cache entries.
+
+Every encoded entry starts with a one-byte format header:
+    high nibble -> serializer id, low nibble -> compressor id
+Legacy entries (pickle + gzip, written before the header existed) start
+with the gzip magic bytes; they are pickle, so they are only decoded when
+allow_pickle is on and are refused (cache miss) otherwise.
+"""
+
+import gzip
+import json
+import logging
+import pickle
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional fast backends - fall back to json/gzip when not installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Payloads smaller than this are stored uncompressed (header still present)
+DEFAULT_MIN_COMPRESS_SIZE = 1024
+
+DEFAULT_LEVELS = {
+    "zstd": 3,
+    "lz4": 0,
+    "gzip": 1,
+    "none": 0,
+}
+
+
+class CodecError(ValueError):
+    """Raised when an entry cannot be encoded or decoded"""
+
+
+# ============================================================================
+# SERIALIZERS
+# ============================================================================
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    return json.loads(data.decode("utf-8"))
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+# name -> (id, dumps, loads, available)
+SERIALIZERS: Dict[str, Tuple[int, Callable, Callable, bool]] = {
+    "json": (1, _json_dumps, _json_loads, True),
+    "msgpack": (2, _msgpack_dumps, _msgpack_loads, msgpack is not None),
+    "pickle": (3, pickle.dumps, pickle.loads, True),
+}
+
+# ============================================================================
+# COMPRESSORS
+# ============================================================================
+
+def _zstd_compress(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _lz4_compress(data: bytes, level: int) -> bytes:
+    return lz4_frame.compress(data, compression_level=level)
+
+
+def _lz4_decompress(data: bytes) -> bytes:
+    return lz4_frame.decompress(data)
+
+
+def _gzip_compress(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=level)
+
+
+# name -> (id, compress, decompress, available)
+COMPRESSORS: Dict[str, Tuple[int, Callable, Callable, bool]] = {
+    "none": (0, lambda data, level: data, lambda data: data, True),
+    "gzip": (1, _gzip_compress, gzip.decompress, True),
+    "zstd": (2, _zstd_compress, _zstd_decompress, zstandard is not None),
+    "lz4": (3, _lz4_compress, _lz4_decompress, lz4_frame is not None),
+}
+
+_SERIALIZERS_BY_ID = {spec[0]: name for name, spec in SERIALIZERS.items()}
+_COMPRESSORS_BY_ID = {spec[0]: name for name, spec in COMPRESSORS.items()}
+
+
+def available_serializers() -> list:
+    """Names of serializers usable in this process"""
+    return [name for name, spec in SERIALIZERS.items() if spec[3]]
+
+
+def available_compressors() -> list:
+    """Names of compressors usable in this process"""
+    return [name for name, spec in COMPRESSORS.items() if spec[3]]
+
+
+def _resolve(kind: str, requested: str, table: Dict, preference: list) -> str:
+    """Resolve 'auto' or an unavailable backend to the best installed one"""
+    if requested != "auto":
+        if requested not in table:
+            raise CodecError(f"Unknown cache {kind}: {requested}")
+        if table[requested][3]:
+            return requested
+        logger.warning(f"Cache {kind} '{requested}' not installed, falling back to auto")
+    for name in preference:
+        if table[name][3]:
+            return name
+    raise CodecError(f"No cache {kind} available")
+
+
+class CacheCodec:
+    """
+    Encodes/decodes cache values with a selectable serializer and compressor.
+
+    Decoding is driven by the header byte, so entries written with any
+    codec stay readable after a config change (pickle ones, including legacy
+    pickle+gzip, only with allow_pickle).
+    """
+
+    def __init__(
+        self,
+        serializer: str = "auto",
+        compressor: str = "auto",
+        level: Optional[int] = None,
+        min_compress_size: int = DEFAULT_MIN_COMPRESS_SIZE,
+        allow_pickle: bool = False,
+    ):
+        """
+        Args:
+            serializer: 'auto', 'msgpack', 'json' or 'pickle'
+            compressor: 'auto', 'zstd', 'lz4', 'gzip' or 'none'
+            level: Compression level (None uses the backend default)
+            min_compress_size: Skip compression below this many bytes
+            allow_pickle: Allow writing and reading pickle entries. Pickle
+                executes arbitrary code on load, so keep this off when Redis
+                is shared. Also gates legacy gzip+pickle entries.
+        """
+        self.serializer = _resolve("serializer", serializer, SERIALIZERS, ["msgpack", "json"])
+        self.compressor = _resolve("compressor", compressor, COMPRESSORS, ["zstd", "lz4", "gzip"])
+        self.level = DEFAULT_LEVELS[self.compressor] if level is None else level
+        self.min_compress_size = min_compress_size
+        self.allow_pickle = allow_pickle
+        self._legacy_logged = False
+
+        if self.serializer == "pickle" and not allow_pickle:
+            raise CodecError("Pickle serializer requires allow_pickle=True")
+
+    @classmethod
+    def from_settings(cls, settings) -> "CacheCodec":
+        """Build a codec from the CACHE_* settings"""
+        return cls(
+            serializer=settings.CACHE_SERIALIZER,
+            compressor=settings.CACHE_COMPRESSOR,
+            level=settings.CACHE_COMPRESSION_LEVEL,
+            min_compress_size=settings.CACHE_MIN_COMPRESS_SIZE,
+            allow_pickle=settings.CACHE_ALLOW_PICKLE,
+        )
+
+    def describe(self) -> str:
+        return f"{self.serializer}+{self.compressor}(level={self.level})"
+
+    def serialize(self, value: Any) -> bytes:
+        """Serialize without compressing (no header)"""
+        return SERIALIZERS[self.serializer][1](value)
+
+    def encode_with_size(self, value: Any) -> Tuple[bytes, int]:
+        """
+        Encode a value.
+
+        Returns:
+            (encoded bytes with header, serialized size before compression)
+        """
+        raw = self.serialize(value)
+        compressor = self.compressor if len(raw) >= self.min_compress_size else "none"
+
+        serializer_id = SERIALIZERS[self.serializer][0]
+        compressor_id, compress = COMPRESSORS[compressor][0], COMPRESSORS[compressor][1]
+        header = bytes([(serializer_id << 4) | compressor_id])
+        return header + compress(raw, self.level), len(raw)
+
+    def encode(self, value: Any) -> bytes:
+        """Encode a value (header + compressed payload)"""
+        return self.encode_with_size(value)[0]
+
+    def decode(self, data: bytes) -> Any:
+        """Decode an entry written by any codec, including legacy gzip+pickle"""
+        if not data:
+            raise CodecError("Empty cache entry")
+
+        if data[:2] == GZIP_MAGIC:
+            # Legacy format: gzip(pickle(value)) without header
+            if not self.allow_pickle:
+                raise CodecError("Refusing to load legacy pickle cache entry (allow_pickle=False)")
+            if not self._legacy_logged:
+                logger.warning("Reading legacy gzip+pickle cache entries (allow_pickle=True)")
+                self._legacy_logged = True
+            return pickle.loads(gzip.decompress(data))
+
+        header = data[0]
+        serializer = _SERIALIZERS_BY_ID.get(header >> 4)
+        compressor = _COMPRESSORS_BY_ID.get(header & 0x0F)
+        if serializer is None or compressor is None:
+            raise CodecError(f"Unknown cache entry header: 0x{header:02x}")
+        if not SERIALIZERS[serializer][3] or not COMPRESSORS[compressor][3]:
+            raise CodecError(f"Cache entry needs {serializer}+{compressor}, not installed")
+        if serializer == "pickle" and not self.allow_pickle:
+            raise CodecError("Refusing to load pickle cache entry (allow_pickle=False)")
+
+        raw = COMPRESSORS[compressor][2](data[1:])
+        return SERIALIZERS[serializer][2](raw)
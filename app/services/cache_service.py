@@ -5,14 +5,97 @@ Provides shared cache across all workers with TTL and compression.
 
 import hashlib
 import logging
-import pickle
-import gzip
+import os
+import threading
+import time
 from typing import Optional, Any, Dict
-from redis import Redis
+
 from redis.exceptions import RedisError
 
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.metrics import cache_entries, cache_size_bytes, record_cache_operation
+from app.core.redis_client import get_redis
+from app.services.cache_codec import CacheCodec, CodecError
+from app.services.local_cache import LocalCache
+
 logger = logging.getLogger(__name__)
 
+# Key namespaces tracked by the O(1) statistics counters
+NAMESPACES = ("transcription", "analysis", "generic")
+
+# Bookkeeping keys (outside every namespace so SCAN patterns never match them)
+STATS_KEY = "_meta:stats"
+EXPIRY_KEY = "_meta:expiry:{namespace}"
+SIZES_KEY = "_meta:sizes:{namespace}"
+
+# Pub/sub channel used to drop in-process (L1) entries in every process
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Batch sizes for incremental SCAN/UNLINK and expired-counter pruning
+SCAN_BATCH_SIZE = 500
+PRUNE_BATCH_SIZE = 500
+# Expired entries dropped from the bookkeeping on every write; writes outpace
+# expirations, so the expiry/sizes structures stay bounded by the live keys
+STORE_PRUNE_BATCH = 50
+# get_stats prunes at most this many batches before reading the counters
+STATS_PRUNE_ROUNDS = 20
+
+# Atomically stores an entry and keeps the namespace counters in sync, after
+# dropping up to ARGV[6] already-expired entries from the bookkeeping.
+# KEYS: entry, stats hash, expiry zset, sizes hash
+# ARGV: payload, ttl, expire_at, namespace, now, prune limit
+_STORE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[5], 'LIMIT', 0, ARGV[6])
+if #expired > 0 then
+    local freed = 0
+    for _, key in ipairs(expired) do
+        local size = redis.call('HGET', KEYS[4], key)
+        if size then
+            freed = freed + tonumber(size)
+        end
+    end
+    redis.call('HDEL', KEYS[4], unpack(expired))
+    redis.call('ZREM', KEYS[3], unpack(expired))
+    redis.call('HINCRBY', KEYS[2], ARGV[4] .. ':keys', -#expired)
+    redis.call('HINCRBY', KEYS[2], ARGV[4] .. ':bytes', -freed)
+end
+local old = redis.call('HGET', KEYS[4], KEYS[1])
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+local size = string.len(ARGV[1])
+redis.call('HSET', KEYS[4], KEYS[1], size)
+redis.call('ZADD', KEYS[3], ARGV[3], KEYS[1])
+if old then
+    redis.call('HINCRBY', KEYS[2], ARGV[4] .. ':bytes', size - tonumber(old))
+else
+    redis.call('HINCRBY', KEYS[2], ARGV[4] .. ':keys', 1)
+    redis.call('HINCRBY', KEYS[2], ARGV[4] .. ':bytes', size)
+end
+return size
+"""
+
+# Removes up to ARGV[3] expired entries from the counters of one namespace.
+# KEYS: stats hash, expiry zset, sizes hash
+# ARGV: now, namespace, limit
+_PRUNE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, ARGV[3])
+if #expired == 0 then
+    return 0
+end
+local freed = 0
+for _, key in ipairs(expired) do
+    local size = redis.call('HGET', KEYS[3], key)
+    if size then
+        freed = freed + tonumber(size)
+    end
+end
+redis.call('HDEL', KEYS[3], unpack(expired))
+redis.call('ZREM', KEYS[2], unpack(expired))
+redis.call('HINCRBY', KEYS[1], ARGV[2] .. ':keys', -#expired)
+redis.call('HINCRBY', KEYS[1], ARGV[2] .. ':bytes', -freed)
+return #expired
+"""
+
 
 class CacheService:
     """
@@ -20,79 +103,276 @@ class CacheService:
     Supports transcriptions, analysis, and generic caching with compression.
     """
     
-    def __init__(self, redis_url: str = None, redis_db: int = 1):
+    def __init__(self, redis_url: str = None, redis_db: int = 1, codec: CacheCodec = None):
         """
         Initialize cache service.
         
         Args:
-            redis_url: Redis connection URL (if None, uses REDIS_URL env var)
+            redis_url: Redis connection URL (if None, uses the shared Redis settings)
             redis_db: Redis database number (0 is used by RQ, we use 1)
+            codec: Serializer/compressor for entries (default: from settings)
         """
-        import os
+        self.codec = codec or CacheCodec.from_settings(settings)
+        
+        # In-process L1 tier in front of Redis
+        self.l1 = LocalCache(
+            max_bytes=settings.CACHE_L1_MAX_MB * 1024 * 1024,
+            default_ttl=settings.CACHE_L1_TTL
+        )
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        
+        # Short-circuits cache calls to misses while Redis is unhealthy,
+        # instead of paying socket_timeout on every call
+        self.redis = None
+        self.breaker = CircuitBreaker(
+            "redis_cache",
+            probe=lambda: self.redis.ping(),
+            failure_threshold=settings.CACHE_BREAKER_FAILURES,
+            cooldown_seconds=settings.CACHE_BREAKER_COOLDOWN,
+            failure_exceptions=(RedisError,)
+        )
         
         try:
-            # Get Redis URL from env if not provided
-            if not redis_url:
-                try:
-                    from app.core.secrets import get_redis_url
-                    redis_url = get_redis_url()
-                except Exception as e:
-                    logger.warning(f"Failed to load Redis URL from secrets: {e}")
-                    redis_url = os.getenv('REDIS_URL', 'redis://redis:6379/0')
-            
-            # Parse URL and change database
-            from urllib.parse import urlparse, urlunparse
-            parsed = urlparse(redis_url)
-            # Replace database in path
-            new_path = f'/{redis_db}'
-            redis_url_with_db = urlunparse((
-                parsed.scheme, parsed.netloc, new_path,
-                parsed.params, parsed.query, parsed.fragment
-            ))
-            
-            self.redis = Redis.from_url(
-                redis_url_with_db,
-                decode_responses=False,  # We handle binary data
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
-            # Test connection
-            self.redis.ping()
-            logger.info(f"✓ Cache service connected to Redis (db={redis_db})")
+            # Shared per-process pool (app/core/redis_client.py); an explicit
+            # URL still gets its own pool
+            self.redis = get_redis(db=redis_db, url=redis_url)
+            self._store_script = self.redis.register_script(_STORE_SCRIPT)
+            self._prune_script = self.redis.register_script(_PRUNE_SCRIPT)
         except RedisError as e:
-            logger.error(f"Failed to connect to Redis: {e}")
+            logger.error(f"Failed to create Redis client: {e}")
             self.redis = None
+            return
+        
+        # Test connection (if down, the breaker probes until it comes back)
+        try:
+            self.redis.ping()
+            logger.info(f"✓ Cache service connected to Redis (db={redis_db}, codec={self.codec.describe()})")
+        except RedisError as e:
+            logger.error(f"Failed to connect to Redis, cache degraded until it recovers: {e}")
+            self.breaker.trip()
+    
+    def is_available(self) -> bool:
+        """True if Redis calls should be attempted (client exists and circuit closed)"""
+        return self.redis is not None and self.breaker.allow()
     
     def _get_file_hash(self, file_path: str) -> str:
         """
-        Generate MD5 hash of file for cache key.
-        Uses file metadata for speed (not content).
+        Generate hash of file content for cache key.
+        Identical recordings uploaded under different names share the key
+        (see app.services.single_flight.content_digest).
         
         Args:
             file_path: Path to file
             
         Returns:
-            MD5 hash string
+            Hex digest string
         """
-        import os
+        from app.services.single_flight import content_digest
         
         if not os.path.exists(file_path):
             return hashlib.md5(file_path.encode()).hexdigest()
         
-        # Hash based on file path + size + mtime (fast)
-        stat = os.stat(file_path)
-        key_data = f"{file_path}_{stat.st_size}_{stat.st_mtime}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        return content_digest(file_path)
+    
+    def transcription_key(self, file_path: str, options: Dict = None) -> str:
+        """Cache key of a transcription (audio content + options)"""
+        file_hash = self._get_file_hash(file_path)
+        options_hash = hashlib.md5(str(sorted((options or {}).items())).encode()).hexdigest()[:8]
+        return f"transcription:{file_hash}:{options_hash}"
     
     def _compress(self, data: Any) -> bytes:
-        """Compress data using gzip"""
-        pickled = pickle.dumps(data)
-        return gzip.compress(pickled, compresslevel=6)
+        """Serialize and compress data with the configured codec"""
+        return self.codec.encode(data)
     
     def _decompress(self, data: bytes) -> Any:
-        """Decompress gzipped data"""
-        decompressed = gzip.decompress(data)
-        return pickle.loads(decompressed)
+        """Decode data written by any codec (pickle entries only with CACHE_ALLOW_PICKLE)"""
+        return self.codec.decode(data)
+    
+    # ========================================================================
+    # TIERED ACCESS (L1 in-process + L2 Redis)
+    # ========================================================================
+    
+    def _fetch(self, namespace: str, cache_key: str) -> Optional[Any]:
+        """
+        Read through both tiers: in-process L1 first, then Redis.
+        Redis hits are promoted into L1. Hits and misses are recorded per tier.
+        
+        Args:
+            namespace: One of NAMESPACES (metrics label)
+            cache_key: Full Redis key
+            
+        Returns:
+            Decoded value or None
+        """
+        self._ensure_invalidation_listener()
+        
+        value = self.l1.get(cache_key)
+        if value is not None:
+            record_cache_operation(namespace, 'get', 'hit', tier='l1')
+            return value
+        if self.l1.enabled:
+            record_cache_operation(namespace, 'get', 'miss', tier='l1')
+        
+        if not self.is_available():
+            return None
+        
+        cached_data = self.breaker.call(self.redis.get, cache_key)
+        if not cached_data:
+            record_cache_operation(namespace, 'get', 'miss', tier='redis')
+            return None
+        
+        try:
+            value = self._decompress(cached_data)
+        except CodecError as e:
+            # Entrada recusada (pickle sem CACHE_ALLOW_PICKLE) ou ilegível: conta como miss
+            logger.debug(f"Cache entry {cache_key} not decoded: {e}")
+            record_cache_operation(namespace, 'get', 'miss', tier='redis')
+            return None
+        record_cache_operation(namespace, 'get', 'hit', tier='redis')
+        self.l1.set(cache_key, value)
+        return value
+    
+    def _put(self, namespace: str, cache_key: str, value: Any, ttl: int) -> Optional[tuple]:
+        """
+        Write through both tiers.
+        
+        Returns:
+            (compressed size, serialized size) or None if Redis is unavailable
+        """
+        self.l1.set(cache_key, value, ttl=min(ttl, self.l1.default_ttl))
+        
+        if not self.is_available():
+            return None
+        
+        compressed, original_size = self.codec.encode_with_size(value)
+        self.breaker.call(self._store, namespace, cache_key, compressed, ttl)
+        record_cache_operation(namespace, 'set', 'success')
+        return len(compressed), original_size
+    
+    def _broadcast_invalidation(self, namespace: str = None):
+        """
+        Drop L1 entries of a namespace (None = everything) in this process
+        and tell every other process to do the same.
+        """
+        self.l1.clear(f"{namespace}:" if namespace else None)
+        if self.is_available():
+            self.breaker.call(self.redis.publish, INVALIDATION_CHANNEL, namespace or "*")
+    
+    def _ensure_invalidation_listener(self):
+        """
+        Start the invalidation listener thread once per process.
+        Checked by PID because gunicorn --preload forks after import
+        and threads do not survive the fork.
+        """
+        if not self.redis or not self.l1.enabled or self._listener_pid == os.getpid():
+            return
+        
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            threading.Thread(
+                target=self._invalidation_loop,
+                name="cache-invalidation",
+                daemon=True
+            ).start()
+    
+    def _invalidation_loop(self):
+        """Apply invalidations published by any process (runs forever)"""
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Messages sent while we were disconnected are lost: start clean
+                self.l1.clear()
+                
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        data = message["data"]
+                        namespace = data.decode() if isinstance(data, bytes) else data
+                        self.l1.clear(None if namespace == "*" else f"{namespace}:")
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener error: {e}")
+                time.sleep(5)
+    
+    # ========================================================================
+    # REDIS BOOKKEEPING
+    # ========================================================================
+    
+    def _store(self, namespace: str, cache_key: str, payload: bytes, ttl: int):
+        """
+        Store an entry and update the per-namespace counters in one round trip.
+        Also prunes up to STORE_PRUNE_BATCH expired entries of the namespace.
+        
+        Args:
+            namespace: One of NAMESPACES
+            cache_key: Full Redis key (already prefixed with the namespace)
+            payload: Compressed value
+            ttl: Time to live in seconds
+        """
+        self._store_script(
+            keys=[
+                cache_key,
+                STATS_KEY,
+                EXPIRY_KEY.format(namespace=namespace),
+                SIZES_KEY.format(namespace=namespace),
+            ],
+            args=[payload, ttl, time.time() + ttl, namespace, time.time(), STORE_PRUNE_BATCH],
+        )
+    
+    def _prune_expired(self, namespace: str) -> int:
+        """
+        Drop counters of entries whose TTL already elapsed.
+        Bounded to PRUNE_BATCH_SIZE entries per call so it never blocks Redis.
+        
+        Returns:
+            Number of expired entries removed from the counters
+        """
+        return self._prune_script(
+            keys=[
+                STATS_KEY,
+                EXPIRY_KEY.format(namespace=namespace),
+                SIZES_KEY.format(namespace=namespace),
+            ],
+            args=[time.time(), namespace, PRUNE_BATCH_SIZE],
+        )
+    
+    def _scan_unlink(self, pattern: str) -> int:
+        """
+        Delete keys matching pattern using incremental SCAN and batched UNLINK.
+        Unlike KEYS + DEL, neither call blocks Redis for the whole keyspace
+        (the same instance serves the RQ queue).
+        
+        Args:
+            pattern: Glob-style key pattern
+            
+        Returns:
+            Number of keys removed
+        """
+        removed = 0
+        batch = []
+        for key in self.redis.scan_iter(match=pattern, count=SCAN_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= SCAN_BATCH_SIZE:
+                removed += self.redis.unlink(*batch)
+                batch = []
+        if batch:
+            removed += self.redis.unlink(*batch)
+        return removed
+    
+    def _clear_namespace(self, namespace: str) -> int:
+        """Remove all entries of a namespace and reset its counters"""
+        removed = self._scan_unlink(f"{namespace}:*")
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.unlink(
+            EXPIRY_KEY.format(namespace=namespace),
+            SIZES_KEY.format(namespace=namespace),
+        )
+        pipe.hdel(STATS_KEY, f"{namespace}:keys", f"{namespace}:bytes")
+        pipe.execute()
+        return removed
     
     # ========================================================================
     # TRANSCRIPTION CACHE
@@ -109,19 +389,13 @@ class CacheService:
         Returns:
             Cached transcription dict or None
         """
-        if not self.redis:
-            return None
-        
         try:
             # Generate cache key
-            file_hash = self._get_file_hash(file_path)
-            options_hash = hashlib.md5(str(sorted((options or {}).items())).encode()).hexdigest()[:8]
-            cache_key = f"transcription:{file_hash}:{options_hash}"
+            cache_key = self.transcription_key(file_path, options)
             
             # Get from cache
-            cached_data = self.redis.get(cache_key)
-            if cached_data:
-                result = self._decompress(cached_data)
+            result = self._fetch("transcription", cache_key)
+            if result is not None:
                 logger.info(f"✓ TRANSCRIPTION CACHE HIT: {file_path}")
                 return result
             
@@ -142,22 +416,17 @@ class CacheService:
             options: Transcription options used
             ttl: Time to live in seconds (default: 24h)
         """
-        if not self.redis:
-            return
-        
         try:
             # Generate cache key
-            file_hash = self._get_file_hash(file_path)
-            options_hash = hashlib.md5(str(sorted((options or {}).items())).encode()).hexdigest()[:8]
-            cache_key = f"transcription:{file_hash}:{options_hash}"
+            cache_key = self.transcription_key(file_path, options)
             
             # Compress and save
-            compressed = self._compress(result)
-            self.redis.setex(cache_key, ttl, compressed)
+            sizes = self._put("transcription", cache_key, result, ttl)
+            if not sizes:
+                return
             
             # Log size savings
-            original_size = len(pickle.dumps(result))
-            compressed_size = len(compressed)
+            compressed_size, original_size = sizes
             ratio = (1 - compressed_size / original_size) * 100
             
             logger.info(
@@ -167,6 +436,7 @@ class CacheService:
             )
             
         except Exception as e:
+            record_cache_operation('transcription', 'set', 'error')
             logger.warning(f"Cache set error: {e}")
     
     # ========================================================================
@@ -184,9 +454,6 @@ class CacheService:
         Returns:
             Cached analysis dict or None
         """
-        if not self.redis:
-            return None
-        
         try:
             # Generate cache key from text + rules
             text_hash = hashlib.md5(text.encode()).hexdigest()
@@ -194,9 +461,8 @@ class CacheService:
             cache_key = f"analysis:{text_hash}:{rules_hash}"
             
             # Get from cache
-            cached_data = self.redis.get(cache_key)
-            if cached_data:
-                result = self._decompress(cached_data)
+            result = self._fetch("analysis", cache_key)
+            if result is not None:
                 logger.info(f"✓ ANALYSIS CACHE HIT (text length: {len(text)})")
                 return result
             
@@ -217,9 +483,6 @@ class CacheService:
             rules: Analysis rules used
             ttl: Time to live in seconds (default: 7 days)
         """
-        if not self.redis:
-            return
-        
         try:
             # Generate cache key
             text_hash = hashlib.md5(text.encode()).hexdigest()
@@ -227,12 +490,12 @@ class CacheService:
             cache_key = f"analysis:{text_hash}:{rules_hash}"
             
             # Compress and save
-            compressed = self._compress(result)
-            self.redis.setex(cache_key, ttl, compressed)
-            
-            logger.info(f"✓ Cached analysis (text length: {len(text)}, size: {len(compressed)/1024:.1f}KB)")
+            sizes = self._put("analysis", cache_key, result, ttl)
+            if sizes:
+                logger.info(f"✓ Cached analysis (text length: {len(text)}, size: {sizes[0]/1024:.1f}KB)")
             
         except Exception as e:
+            record_cache_operation('analysis', 'set', 'error')
             logger.warning(f"Cache set error: {e}")
     
     # ========================================================================
@@ -241,27 +504,18 @@ class CacheService:
     
     def get(self, key: str) -> Optional[Any]:
         """Generic cache get"""
-        if not self.redis:
-            return None
-        
         try:
-            cached_data = self.redis.get(f"generic:{key}")
-            if cached_data:
-                return self._decompress(cached_data)
-            return None
+            return self._fetch("generic", f"generic:{key}")
         except Exception as e:
             logger.warning(f"Cache get error: {e}")
             return None
     
     def set(self, key: str, value: Any, ttl: int = 3600):
         """Generic cache set"""
-        if not self.redis:
-            return
-        
         try:
-            compressed = self._compress(value)
-            self.redis.setex(f"generic:{key}", ttl, compressed)
+            self._put("generic", f"generic:{key}", value, ttl)
         except Exception as e:
+            record_cache_operation('generic', 'set', 'error')
             logger.warning(f"Cache set error: {e}")
     
     # ========================================================================
@@ -270,15 +524,15 @@ class CacheService:
     
     def clear_all(self):
         """Clear all cache entries"""
-        if not self.redis:
+        if not self.is_available():
+            self.l1.clear()
             return
         
         try:
-            # Get all keys in our database
-            keys = self.redis.keys("*")
-            if keys:
-                self.redis.delete(*keys)
-                logger.info(f"✓ Cleared {len(keys)} cache entries")
+            removed = sum(self.breaker.call(self._clear_namespace, ns) for ns in NAMESPACES)
+            self._broadcast_invalidation()
+            if removed:
+                logger.info(f"✓ Cleared {removed} cache entries")
             else:
                 logger.info("Cache already empty")
         except Exception as e:
@@ -286,52 +540,79 @@ class CacheService:
     
     def clear_transcriptions(self):
         """Clear only transcription cache"""
-        if not self.redis:
+        if not self.is_available():
+            self.l1.clear("transcription:")
             return
         
         try:
-            keys = self.redis.keys("transcription:*")
-            if keys:
-                self.redis.delete(*keys)
-                logger.info(f"✓ Cleared {len(keys)} transcription cache entries")
+            removed = self.breaker.call(self._clear_namespace, "transcription")
+            self._broadcast_invalidation("transcription")
+            if removed:
+                logger.info(f"✓ Cleared {removed} transcription cache entries")
         except Exception as e:
             logger.error(f"Cache clear error: {e}")
     
     def clear_analysis(self):
         """Clear only analysis cache"""
-        if not self.redis:
+        if not self.is_available():
+            self.l1.clear("analysis:")
             return
         
         try:
-            keys = self.redis.keys("analysis:*")
-            if keys:
-                self.redis.delete(*keys)
-                logger.info(f"✓ Cleared {len(keys)} analysis cache entries")
+            removed = self.breaker.call(self._clear_namespace, "analysis")
+            self._broadcast_invalidation("analysis")
+            if removed:
+                logger.info(f"✓ Cleared {removed} analysis cache entries")
         except Exception as e:
             logger.error(f"Cache clear error: {e}")
     
     def get_stats(self) -> Dict:
-        """Get cache statistics"""
+        """
+        Get cache statistics.
+        Served from counters maintained on every set, so the cost does not
+        grow with the keyspace.
+        """
         if not self.redis:
             return {"error": "Redis not connected"}
+        if not self.is_available():
+            return {"error": "Redis circuit open", "connected": False, "circuit": self.breaker.get_stats()}
         
         try:
-            # Count keys by type
-            transcription_keys = len(self.redis.keys("transcription:*"))
-            analysis_keys = len(self.redis.keys("analysis:*"))
-            generic_keys = len(self.redis.keys("generic:*"))
-            total_keys = transcription_keys + analysis_keys + generic_keys
+            for namespace in NAMESPACES:
+                for _ in range(STATS_PRUNE_ROUNDS):
+                    if self.breaker.call(self._prune_expired, namespace) < PRUNE_BATCH_SIZE:
+                        break
+            
+            counters = {
+                k.decode() if isinstance(k, bytes) else k: int(v)
+                for k, v in self.breaker.call(self.redis.hgetall, STATS_KEY).items()
+            }
+            
+            stats = {}
+            total_keys = 0
+            total_bytes = 0
+            for namespace in NAMESPACES:
+                keys = max(0, counters.get(f"{namespace}:keys", 0))
+                size = max(0, counters.get(f"{namespace}:bytes", 0))
+                stats[f"{namespace}_keys"] = keys
+                stats[f"{namespace}_bytes"] = size
+                total_keys += keys
+                total_bytes += size
+                
+                cache_entries.labels(cache_type=namespace).set(keys)
+                cache_size_bytes.labels(cache_type=namespace).set(size)
             
             # Get memory usage
-            info = self.redis.info("memory")
+            info = self.breaker.call(self.redis.info, "memory")
             used_memory_mb = info.get("used_memory", 0) / 1024 / 1024
             
             return {
                 "total_keys": total_keys,
-                "transcription_keys": transcription_keys,
-                "analysis_keys": analysis_keys,
-                "generic_keys": generic_keys,
+                **stats,
+                "total_bytes": total_bytes,
                 "used_memory_mb": round(used_memory_mb, 2),
+                "l1": self.l1.get_stats(),  # This process only
+                "circuit": self.breaker.get_stats(),
                 "connected": True
             }
         except Exception as e:
@@ -0,0 +1,116 @@
+"""
+Checkpoints of long transcriptions.
+
+While a long file is transcribed, the segments emitted so far (SegmentStore
+blob) and the audio offset they reach are saved to Redis every
+CHECKPOINT_INTERVAL_SECONDS. If the worker dies (OOM, max_jobs recycle,
+deploy), RQ retries the job (Retry set on enqueue; abandoned jobs are
+retried by StartedJobRegistry.cleanup) and the transcription resumes by
+decoding only the audio after the offset. A crash costs at most one
+interval of compute.
+
+Checkpoints are keyed by the transcription cache key (audio content +
+options), so only the exact same work is resumed, and they are removed
+once the result is in the cache.
+"""
+import logging
+import struct
+from time import monotonic
+from typing import Callable, Optional, Tuple
+
+from app.core.config import settings
+from app.services.segment_store import SegmentStore
+
+logger = logging.getLogger(__name__)
+
+_OFFSET = struct.Struct("<d")
+
+
+class TranscriptionCheckpoint:
+    """Saves and loads (offset, segments) of in-progress transcriptions."""
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    @property
+    def redis(self):
+        from app.core.redis_client import get_redis
+        return get_redis(db=0)
+
+    @property
+    def breaker(self):
+        from app.core.redis_client import get_breaker
+        return get_breaker(db=0)
+
+    @staticmethod
+    def key(transcription_key: str) -> str:
+        return f"checkpoint:{transcription_key}"
+
+    def applies(self, duration: Optional[float]) -> bool:
+        """Only long files are worth checkpointing"""
+        return (
+            self.settings.CHECKPOINT_ENABLED
+            and duration is not None
+            and duration >= self.settings.CHECKPOINT_MIN_AUDIO_SECONDS
+        )
+
+    def load(self, transcription_key: str) -> Optional[Tuple[float, SegmentStore]]:
+        """
+        Last checkpoint of a transcription.
+
+        Returns:
+            (offset in seconds, segments up to the offset), or None
+        """
+        if not self.breaker.allow():
+            return None
+        try:
+            blob = self.breaker.call(self.redis.get, self.key(transcription_key))
+            if not blob:
+                return None
+            (offset,) = _OFFSET.unpack_from(blob)
+            return offset, SegmentStore.from_bytes(blob[_OFFSET.size:])
+        except Exception as e:
+            logger.warning(f"Checkpoint ilegível, recomeçando do início: {e}")
+            return None
+
+    def save(self, transcription_key: str, offset: float, store: SegmentStore):
+        if not self.breaker.allow():
+            return
+        try:
+            self.breaker.call(
+                self.redis.set,
+                self.key(transcription_key),
+                _OFFSET.pack(offset) + store.to_bytes(),
+                ex=self.settings.CHECKPOINT_TTL_SECONDS
+            )
+            logger.debug(f"💾 Checkpoint em {offset:.0f}s ({len(store)} segmentos)")
+        except Exception as e:
+            logger.debug(f"Falha ao gravar checkpoint: {e}")
+
+    def clear(self, transcription_key: str):
+        if not self.breaker.allow():
+            return
+        try:
+            self.breaker.call(self.redis.delete, self.key(transcription_key))
+        except Exception as e:
+            logger.debug(f"Falha ao remover checkpoint: {e}")
+
+    def writer(self, transcription_key: str) -> Callable[[SegmentStore, float], None]:
+        """
+        Callback for the segment loop: saves at most once per
+        CHECKPOINT_INTERVAL_SECONDS (wall clock).
+        """
+        last_save = monotonic()
+
+        def maybe_save(store: SegmentStore, offset: float):
+            nonlocal last_save
+            now = monotonic()
+            if now - last_save >= self.settings.CHECKPOINT_INTERVAL_SECONDS:
+                self.save(transcription_key, offset, store)
+                last_save = now
+
+        return maybe_save
+
+
+# Global instance
+transcription_checkpoint = TranscriptionCheckpoint(settings)
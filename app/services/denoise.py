@@ -0,0 +1,209 @@
+"""
+Streaming spectral-gating noise reduction.
+
+Runs on the 16 kHz mono WAV written by AudioProcessor.enhance_audio, before
+Whisper. The file is read and written in DENOISE_CHUNK_SECONDS blocks, so
+memory does not grow with the recording length.
+
+1. Profile: the first PROFILE_SECONDS are framed (sqrt-Hann, 512 samples,
+   50% overlap); the quietest frames give the noise level and spread per
+   frequency bin, and the ratio between loud and quiet frames gives an SNR
+   estimate in dB.
+2. Gate: every STFT bin above noise mean + DENOISE_N_STD x std passes;
+   bins below are attenuated by up to DENOISE_MAX_ATTENUATION_DB. The mask
+   is smoothed across neighbouring bins and frames to avoid musical noise.
+3. Overlap-add: with a sqrt-Hann window on analysis and synthesis at 50%
+   overlap, the windows sum to one, so an all-pass mask returns the input.
+
+The stage runs when the task asks for it (options["denoise"] = true) or,
+with DENOISE_AUTO, when the estimated SNR is below DENOISE_SNR_THRESHOLD_DB.
+scripts/benchmark_denoise.py measures its real-time factor.
+"""
+import logging
+import wave
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+N_FFT = 512
+HOP = N_FFT // 2
+# Trecho inicial usado para o perfil de ruído e a estimativa de SNR
+PROFILE_SECONDS = 30
+# Fração de quadros mais silenciosos que define o ruído
+NOISE_QUANTILE = 0.2
+EPS = 1e-10
+
+_WINDOW = np.sqrt(np.hanning(N_FFT + 1)[:-1]).astype(np.float32)  # Hann periódica
+
+
+def _frames(audio: np.ndarray) -> np.ndarray:
+    """Windowed STFT frames (n, N_FFT) of a block (no padding)"""
+    if len(audio) < N_FFT:
+        return np.empty((0, N_FFT), dtype=np.float32)
+    n = 1 + (len(audio) - N_FFT) // HOP
+    index = np.arange(N_FFT)[None, :] + HOP * np.arange(n)[:, None]
+    return audio[index] * _WINDOW
+
+
+def noise_profile(audio: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Noise statistics of a recording excerpt.
+
+    Args:
+        audio: Float32 samples (first PROFILE_SECONDS are enough)
+
+    Returns:
+        (mean dB per bin, std dB per bin, estimated SNR in dB)
+    """
+    frames = _frames(audio)
+    if len(frames) < 10:
+        bins = N_FFT // 2 + 1
+        return np.full(bins, -100.0, dtype=np.float32), np.zeros(bins, dtype=np.float32), float("inf")
+
+    spectrum_db = 20 * np.log10(np.abs(np.fft.rfft(frames)) + EPS)
+    energy = np.mean(frames ** 2, axis=1)
+    quiet = energy <= np.quantile(energy, NOISE_QUANTILE)
+
+    noise_energy = float(np.mean(energy[quiet]))
+    loud_energy = float(np.mean(energy[energy >= np.quantile(energy, 0.9)]))
+    snr = 10 * np.log10((loud_energy + EPS) / (noise_energy + EPS))
+    return (
+        spectrum_db[quiet].mean(axis=0).astype(np.float32),
+        spectrum_db[quiet].std(axis=0).astype(np.float32),
+        float(snr),
+    )
+
+
+class SpectralGate:
+    """Stateful gate: feed consecutive blocks, get denoised blocks back."""
+
+    def __init__(self, noise_mean_db: np.ndarray, noise_std_db: np.ndarray, n_std: float = 1.5,
+                 max_attenuation_db: float = 12.0):
+        self.threshold_db = noise_mean_db + n_std * noise_std_db
+        self.floor = float(10 ** (-max_attenuation_db / 20))
+        self._carry = np.zeros(HOP, dtype=np.float32)   # Entrada ainda sem quadro completo
+        self._tail = np.zeros(HOP, dtype=np.float32)    # 2ª metade do último quadro de saída
+        self._last_mask = None
+        self._skip = HOP                                # Saída do preenchimento inicial
+
+    def _mask(self, spectrum: np.ndarray) -> np.ndarray:
+        above = (20 * np.log10(np.abs(spectrum) + EPS) > self.threshold_db).astype(np.float32)
+        # Suavização em frequência (1-2-1) e no tempo (média com o quadro anterior)
+        smoothed = above.copy()
+        smoothed[:, 1:-1] = 0.25 * above[:, :-2] + 0.5 * above[:, 1:-1] + 0.25 * above[:, 2:]
+        previous = np.vstack([smoothed[:1] if self._last_mask is None else self._last_mask, smoothed[:-1]])
+        self._last_mask = smoothed[-1:]
+        mask = np.maximum(smoothed, 0.5 * (smoothed + previous))
+        return self.floor + (1 - self.floor) * mask
+
+    def _process(self, block: np.ndarray) -> np.ndarray:
+        buffer = np.concatenate([self._carry, block])
+        frames = _frames(buffer)
+        if not len(frames):
+            self._carry = buffer
+            return np.empty(0, dtype=np.float32)
+
+        spectrum = np.fft.rfft(frames)
+        output = np.fft.irfft(spectrum * self._mask(spectrum), n=N_FFT).astype(np.float32) * _WINDOW
+
+        # Overlap-add: metade inicial de cada quadro + metade final do anterior
+        emitted = output[:, :HOP].copy()
+        emitted[0] += self._tail
+        emitted[1:] += output[:-1, HOP:]
+        self._tail = output[-1, HOP:].copy()
+        self._carry = buffer[len(frames) * HOP:]
+
+        emitted = emitted.ravel()
+        if self._skip:
+            drop = min(self._skip, len(emitted))
+            emitted, self._skip = emitted[drop:], self._skip - drop
+        return emitted
+
+    def process(self, blocks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """
+        Denoise a stream of float32 blocks (any sizes).
+
+        Yields:
+            Denoised samples; the total equals the total input length
+        """
+        total = 0
+        produced = 0
+        for block in blocks:
+            total += len(block)
+            out = self._process(block)
+            produced += len(out)
+            yield out
+        # Esvazia o último quadro com zeros e corta no tamanho da entrada
+        out = self._process(np.zeros(N_FFT, dtype=np.float32))
+        yield out[:max(0, total - produced)]
+
+
+# ----------------------------------------------------------------------
+# Arquivo WAV (saída do enhance_audio)
+# ----------------------------------------------------------------------
+
+def _read_blocks(reader: wave.Wave_read, block_frames: int) -> Iterator[np.ndarray]:
+    while True:
+        data = reader.readframes(block_frames)
+        if not data:
+            return
+        yield np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def probe_wav(path: str) -> Tuple[np.ndarray, np.ndarray, float]:
+    """noise_profile() of the first PROFILE_SECONDS of a 16-bit mono WAV"""
+    with wave.open(path, "rb") as reader:
+        head = reader.readframes(PROFILE_SECONDS * reader.getframerate())
+    return noise_profile(np.frombuffer(head, dtype=np.int16).astype(np.float32) / 32768.0)
+
+
+def denoise_wav(src: str, dst: str, settings, requested: Optional[bool] = None) -> Optional[Dict]:
+    """
+    Gate a 16-bit mono WAV into dst, when requested or when its SNR is low.
+
+    Args:
+        src: WAV from enhance_audio (16 kHz, mono, s16le)
+        dst: Output path
+        requested: True/False from the task options; None = automatic (SNR)
+
+    Returns:
+        {"snr_db", "reason", "seconds", "rtf"} if dst was written, None if skipped
+    """
+    if requested is False:
+        return None
+    with wave.open(src, "rb") as reader:
+        if reader.getnchannels() != 1 or reader.getsampwidth() != 2:
+            logger.warning(f"Redução de ruído ignorada: WAV não é mono 16-bit ({src})")
+            return None
+
+    noise_mean, noise_std, snr = probe_wav(src)
+    if requested:
+        reason = "requested"
+    elif settings.DENOISE_AUTO and snr < settings.DENOISE_SNR_THRESHOLD_DB:
+        reason = "low_snr"
+    else:
+        logger.debug(f"SNR estimado {snr:.1f} dB: sem redução de ruído")
+        return None
+
+    start = perf_counter()
+    gate = SpectralGate(noise_mean, noise_std, settings.DENOISE_N_STD, settings.DENOISE_MAX_ATTENUATION_DB)
+    with wave.open(src, "rb") as reader, wave.open(dst, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(reader.getframerate())
+        block_frames = int(settings.DENOISE_CHUNK_SECONDS * reader.getframerate())
+        for out in gate.process(_read_blocks(reader, block_frames)):
+            writer.writeframes((np.clip(out, -1.0, 1.0) * 32767).astype(np.int16).tobytes())
+        seconds = reader.getnframes() / reader.getframerate()
+
+    elapsed = perf_counter() - start
+    report = {"snr_db": round(snr, 1), "reason": reason, "seconds": seconds, "rtf": elapsed / max(seconds, 1e-9)}
+    logger.info(
+        f"🔇 Redução de ruído ({reason}, SNR {snr:.1f} dB): {seconds:.0f}s de áudio em {elapsed:.2f}s "
+        f"(RTF {report['rtf']:.4f})"
+    )
+    return report
@@ -0,0 +1,443 @@
+"""
+CPU speaker diarization for mono recordings.
+
+Pipeline (NumPy only, no extra model beyond faster-whisper's Silero VAD):
+
+1. VAD splits the audio into speech regions, cut into fixed windows of
+   DIARIZATION_WINDOW_SECONDS.
+2. Each window gets a speaker embedding: mean and standard deviation of its
+   MFCCs (pre-emphasis, 25 ms Hamming frames, 40 mel bands, DCT). Windows
+   are processed DIARIZATION_BATCH_SIZE at a time as one array.
+3. Embeddings are standardized per recording, L2-normalized and clustered
+   with spherical k-means for 2..DIARIZATION_MAX_SPEAKERS; the count with
+   the best cosine silhouette wins, or one speaker when no split reaches
+   DIARIZATION_MIN_SILHOUETTE.
+4. Window labels are smoothed and each transcription segment takes the
+   majority speaker of the windows inside it ("Falante N"), stored in the
+   SegmentStore speaker column; the segment text itself is left unlabelled.
+
+Window embeddings are cached in Redis (db 1, next to the transcription
+cache) by SHA-1 of the window samples, so a re-run with other options or a
+retried job skips feature extraction. Entries expire after
+DIARIZATION_CACHE_TTL and the least recently used ones are evicted beyond
+DIARIZATION_CACHE_MAX_ENTRIES. The cache and its counters are shared by
+all processes, so the admin endpoints in the API see the workers' activity.
+Redis calls go through the db 1 circuit breaker: while Redis is down,
+diarization computes every embedding instead of waiting on timeouts.
+"""
+import hashlib
+import logging
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from app.services.segment_store import SegmentStore
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+SPEAKER_LABEL = "Falante {n}"
+
+# Extração de características (versão entra na chave do cache)
+FEATURE_VERSION = 1
+FRAME = 400        # 25 ms
+HOP = 160          # 10 ms
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 20        # Sem c0 (energia)
+PRE_EMPHASIS = 0.97
+
+ENTRY_KEY = "diarization:emb:{digest}"
+LRU_KEY = "diarization:lru"      # zset: entrada -> último acesso
+STATS_KEY = "diarization:stats"  # hash: hits, misses, diarizations, cached_diarizations
+
+# Pontos usados no silhouette (O(n²)) e iterações do k-means
+SILHOUETTE_SAMPLE = 600
+KMEANS_ITERATIONS = 20
+EVICT_BATCH = 500
+
+
+# ----------------------------------------------------------------------
+# Embeddings
+# ----------------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def _filters():
+    """(Hamming window, mel filterbank (N_MELS, N_FFT//2+1), DCT-II matrix (N_MFCC, N_MELS))"""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(20.0), hz_to_mel(7600.0), N_MELS + 2)
+    bins = np.floor((N_FFT + 1) * mel_to_hz(mels) / SAMPLE_RATE).astype(int)
+    bank = np.zeros((N_MELS, N_FFT // 2 + 1), dtype=np.float32)
+    for m in range(1, N_MELS + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            bank[m - 1, k] = (k - left) / max(1, center - left)
+        for k in range(center, right):
+            bank[m - 1, k] = (right - k) / max(1, right - center)
+
+    n = np.arange(N_MELS)
+    dct = np.cos(np.pi / N_MELS * (n[None, :] + 0.5) * np.arange(1, N_MFCC + 1)[:, None])
+    dct *= np.sqrt(2.0 / N_MELS)
+    return np.hamming(FRAME).astype(np.float32), bank, dct.astype(np.float32)
+
+
+def embed_windows(windows: np.ndarray) -> np.ndarray:
+    """
+    MFCC-statistics embeddings of equal-length windows, in one batch.
+
+    Args:
+        windows: (n, samples) float32 at 16 kHz
+
+    Returns:
+        (n, 2 * N_MFCC) float32: per-coefficient mean and std
+    """
+    hamming, bank, dct = _filters()
+    emphasized = np.concatenate(
+        [windows[:, :1], windows[:, 1:] - PRE_EMPHASIS * windows[:, :-1]], axis=1
+    )
+    n_frames = 1 + (windows.shape[1] - FRAME) // HOP
+    index = np.arange(FRAME)[None, :] + HOP * np.arange(n_frames)[:, None]
+    frames = emphasized[:, index] * hamming                      # (n, frames, FRAME)
+    power = np.abs(np.fft.rfft(frames, n=N_FFT)) ** 2            # (n, frames, bins)
+    mfcc = np.log(power @ bank.T + 1e-10) @ dct.T                # (n, frames, N_MFCC)
+    return np.concatenate([mfcc.mean(axis=1), mfcc.std(axis=1)], axis=1).astype(np.float32)
+
+
+# ----------------------------------------------------------------------
+# Agrupamento
+# ----------------------------------------------------------------------
+
+def _kmeans(x: np.ndarray, k: int, rng) -> np.ndarray:
+    """Spherical k-means (cosine) with k-means++ seeding; x rows are unit vectors"""
+    centers = [x[rng.integers(len(x))]]
+    for _ in range(1, k):
+        distance = np.min(1.0 - x @ np.array(centers).T, axis=1).clip(min=0)
+        total = distance.sum()
+        probabilities = distance / total if total > 0 else None
+        centers.append(x[rng.choice(len(x), p=probabilities)])
+    centers = np.array(centers)
+
+    labels = None
+    for _ in range(KMEANS_ITERATIONS):
+        new_labels = np.argmax(x @ centers.T, axis=1)
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = x[labels == c]
+            if len(members):
+                center = members.sum(axis=0)
+                centers[c] = center / (np.linalg.norm(center) or 1.0)
+    return labels
+
+
+def _silhouette(x: np.ndarray, labels: np.ndarray) -> float:
+    """Mean cosine silhouette (x rows are unit vectors)"""
+    clusters = np.unique(labels)
+    if len(clusters) < 2:
+        return -1.0
+    distance = 1.0 - x @ x.T
+    scores = []
+    for i in range(len(x)):
+        own = labels == labels[i]
+        if own.sum() < 2:
+            scores.append(0.0)
+            continue
+        a = distance[i, own].sum() / (own.sum() - 1)
+        b = min(distance[i, labels == c].mean() for c in clusters if c != labels[i])
+        scores.append((b - a) / max(a, b, 1e-9))
+    return float(np.mean(scores))
+
+
+def cluster(embeddings: np.ndarray, max_speakers: int, min_silhouette: float) -> np.ndarray:
+    """
+    Speaker label per window.
+
+    Returns:
+        Labels 0..k-1 (all zeros when no split is convincing)
+    """
+    x = embeddings - embeddings.mean(axis=0)
+    x /= x.std(axis=0) + 1e-6
+    x /= np.linalg.norm(x, axis=1, keepdims=True) + 1e-9
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(x), min(len(x), SILHOUETTE_SAMPLE), replace=False)
+    best, best_score = np.zeros(len(x), dtype=int), min_silhouette
+    for k in range(2, max_speakers + 1):
+        if len(x) < 2 * k:
+            break
+        labels = _kmeans(x, k, np.random.default_rng(k))
+        score = _silhouette(x[sample], labels[sample])
+        logger.debug(f"Diarização: k={k}, silhouette {score:.3f}")
+        if score > best_score:
+            best, best_score = labels, score
+    return best
+
+
+def _smooth(labels: np.ndarray) -> np.ndarray:
+    """Majority of each window and its neighbours (removes one-window flips)"""
+    if len(labels) < 3:
+        return labels
+    smoothed = labels.copy()
+    for i in range(1, len(labels) - 1):
+        if labels[i - 1] == labels[i + 1] != labels[i]:
+            smoothed[i] = labels[i - 1]
+    return smoothed
+
+
+# ----------------------------------------------------------------------
+# Diarizador
+# ----------------------------------------------------------------------
+
+class SpeakerDiarizer:
+    """Labels transcription segments by speaker, with a shared embedding cache."""
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    @property
+    def redis(self):
+        from app.core.redis_client import get_redis
+        return get_redis(db=1)
+
+    @property
+    def breaker(self):
+        from app.core.redis_client import get_breaker
+        return get_breaker(db=1)
+
+    def _call(self, fn, *args, **kwargs):
+        """Redis call through the circuit breaker (RedisError while it is open)"""
+        if not self.breaker.allow():
+            raise RedisError("Circuito do Redis (db 1) aberto")
+        return self.breaker.call(fn, *args, **kwargs)
+
+    @property
+    def window_samples(self) -> int:
+        return int(self.settings.DIARIZATION_WINDOW_SECONDS * SAMPLE_RATE)
+
+    # ----- Janelas de fala -----
+
+    def _windows(self, audio: np.ndarray) -> List[int]:
+        """Start sample of each window over the VAD speech regions"""
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        size = self.window_samples
+        if len(audio) < size:
+            return []
+        speech = get_speech_timestamps(
+            audio,
+            VadOptions(min_speech_duration_ms=250, min_silence_duration_ms=300, speech_pad_ms=100),
+        )
+        starts = []
+        for region in speech:
+            begin, end = region["start"], region["end"]
+            if end - begin < size // 2:
+                continue
+            last = max(begin, end - size)
+            positions = list(range(begin, last + 1, size))
+            if positions[-1] != last:
+                positions.append(last)  # Última janela termina no fim da fala
+            starts.extend(min(p, len(audio) - size) for p in positions)
+        return starts
+
+    # ----- Cache de embeddings -----
+
+    def _keys(self, audio: np.ndarray, starts: List[int]) -> List[str]:
+        size = self.window_samples
+        keys = []
+        for start in starts:
+            digest = hashlib.sha1(audio[start:start + size].tobytes())
+            digest.update(f"|{FEATURE_VERSION}|{size}".encode())
+            keys.append(ENTRY_KEY.format(digest=digest.hexdigest()))
+        return keys
+
+    def _cache_get(self, keys: List[str]) -> List[Optional[bytes]]:
+        try:
+            values = self._call(self.redis.mget, keys)
+            hits = [key for key, value in zip(keys, values) if value is not None]
+            if hits:
+                now = time.time()
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.zadd(LRU_KEY, {key: now for key in hits})
+                for key in hits:
+                    pipe.expire(key, self.settings.DIARIZATION_CACHE_TTL)
+                self._call(pipe.execute)
+            return values
+        except RedisError as e:
+            logger.debug(f"Cache de diarização indisponível: {e}")
+            return [None] * len(keys)
+
+    def _cache_put(self, entries: Dict[str, bytes]):
+        if not entries:
+            return
+        try:
+            now = time.time()
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value in entries.items():
+                pipe.set(key, value, ex=self.settings.DIARIZATION_CACHE_TTL)
+            pipe.zadd(LRU_KEY, {key: now for key in entries})
+            pipe.zcard(LRU_KEY)
+            size = self._call(pipe.execute)[-1]
+
+            # LRU: remove os menos usados além do limite
+            excess = size - self.settings.DIARIZATION_CACHE_MAX_ENTRIES
+            while excess > 0:
+                evicted = [key for key, _ in self._call(self.redis.zpopmin, LRU_KEY, min(excess, EVICT_BATCH))]
+                if not evicted:
+                    break
+                self._call(self.redis.unlink, *evicted)
+                excess -= len(evicted)
+        except RedisError as e:
+            logger.debug(f"Falha ao gravar cache de diarização: {e}")
+
+    def _count(self, **increments):
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for field, amount in increments.items():
+                if amount:
+                    pipe.hincrby(STATS_KEY, field, amount)
+            self._call(pipe.execute)
+        except RedisError:
+            pass
+
+    def _embeddings(self, audio: np.ndarray, starts: List[int]) -> np.ndarray:
+        """Window embeddings, from the cache or computed in batches"""
+        size = self.window_samples
+        keys = self._keys(audio, starts)
+        cached = self._cache_get(keys)
+        dims = 2 * N_MFCC
+        embeddings = np.empty((len(starts), dims), dtype=np.float32)
+
+        missing = []
+        for i, value in enumerate(cached):
+            if value is not None and len(value) == dims * 4:
+                embeddings[i] = np.frombuffer(value, dtype=np.float32)
+            else:
+                missing.append(i)
+
+        batch_size = self.settings.DIARIZATION_BATCH_SIZE
+        computed = {}
+        for offset in range(0, len(missing), batch_size):
+            chunk = missing[offset:offset + batch_size]
+            windows = np.stack([audio[starts[i]:starts[i] + size] for i in chunk])
+            for i, embedding in zip(chunk, embed_windows(windows)):
+                embeddings[i] = embedding
+                computed[keys[i]] = embedding.tobytes()
+        self._cache_put(computed)
+
+        hits = len(starts) - len(missing)
+        self._count(hits=hits, misses=len(missing), diarizations=1, cached_diarizations=int(not missing))
+        return embeddings
+
+    # ----- Diarização -----
+
+    def diarize(self, audio: np.ndarray, store: SegmentStore) -> SegmentStore:
+        """
+        Tag each segment with its speaker (SegmentStore speaker column).
+
+        Args:
+            audio: 16 kHz mono float32 (same timeline as the segments)
+            store: Transcription segments
+
+        Returns:
+            Labelled SegmentStore, or `store` unchanged for a single speaker
+        """
+        if not len(store):
+            return store
+        start_time = time.perf_counter()
+
+        starts = self._windows(audio)
+        if len(starts) < 4:
+            return store
+        labels = _smooth(cluster(
+            self._embeddings(audio, starts),
+            self.settings.DIARIZATION_MAX_SPEAKERS,
+            self.settings.DIARIZATION_MIN_SILHOUETTE,
+        ))
+        if labels.max() == 0:
+            logger.info("🗣️  Diarização: um único falante")
+            return store
+
+        centers = (np.array(starts) + self.window_samples / 2) / SAMPLE_RATE
+        names: Dict[int, str] = {}
+        labelled = SegmentStore()
+        for seg in store:
+            inside = labels[(centers >= seg.start) & (centers <= seg.end)]
+            if len(inside):
+                speaker = Counter(inside.tolist()).most_common(1)[0][0]
+            else:
+                speaker = int(labels[np.argmin(np.abs(centers - (seg.start + seg.end) / 2))])
+            name = names.setdefault(speaker, SPEAKER_LABEL.format(n=len(names) + 1))
+            labelled.append(seg.start, seg.end, seg.text, seg.confidence, speaker=name)
+
+        logger.info(
+            f"🗣️  Diarização: {len(names)} falante(s), {len(starts)} janelas "
+            f"em {time.perf_counter() - start_time:.1f}s"
+        )
+        return labelled
+
+    # ------------------------------------------------------------------
+    # Administração (/admin/diarization/*)
+    # ------------------------------------------------------------------
+
+    def get_cache_stats(self) -> Dict:
+        """Embedding cache statistics shared by every process"""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zcard(LRU_KEY)
+            pipe.hgetall(STATS_KEY)
+            size, raw = self._call(pipe.execute)
+        except RedisError as e:
+            raise RuntimeError(f"Redis indisponível: {e}")
+
+        counters = {(k.decode() if isinstance(k, bytes) else k): int(v) for k, v in raw.items()}
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        diarizations = counters.get("diarizations", 0)
+        lookups = hits + misses
+        return {
+            "cache_size": size,
+            "max_size": self.settings.DIARIZATION_CACHE_MAX_ENTRIES,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": f"{100.0 * hits / lookups if lookups else 0.0:.1f}%",
+            "ttl_seconds": self.settings.DIARIZATION_CACHE_TTL,
+            "total_diarizations": diarizations,
+            # Diarizações servidas inteiramente do cache
+            "overall_hit_rate": (
+                f"{100.0 * counters.get('cached_diarizations', 0) / diarizations if diarizations else 0.0:.1f}%"
+            ),
+        }
+
+    def clear_cache(self) -> int:
+        """Remove every cached embedding and reset the counters"""
+        removed = 0
+        while True:
+            keys = self._call(self.redis.zrange, LRU_KEY, 0, EVICT_BATCH - 1)
+            if not keys:
+                break
+            removed += self._call(self.redis.unlink, *keys)
+            self._call(self.redis.zrem, LRU_KEY, *keys)
+        self._call(self.redis.unlink, STATS_KEY)
+        logger.info(f"🗑️  Cache de diarização limpo ({removed} embeddings)")
+        return removed
+
+    def clear_expired_cache(self) -> int:
+        """Drop index entries whose embedding expired (TTL runs from the last access)"""
+        cutoff = time.time() - self.settings.DIARIZATION_CACHE_TTL
+        expired = self._call(self.redis.zrangebyscore, LRU_KEY, "-inf", cutoff)
+        for offset in range(0, len(expired), EVICT_BATCH):
+            batch = expired[offset:offset + EVICT_BATCH]
+            self._call(self.redis.unlink, *batch)
+            self._call(self.redis.zrem, LRU_KEY, *batch)
+        if expired:
+            logger.info(f"🗑️  {len(expired)} embeddings expirados removidos do índice")
+        return len(expired)
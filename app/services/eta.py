@@ -0,0 +1,382 @@
+"""
+Job ETA from historical real-time factors.
+
+RTF = processing seconds / audio seconds. Every job that actually
+transcribed (cache hits excluded) updates an exponentially weighted RTF for
+its model|profile|host in Redis (ETA_RTF_ALPHA), shared by API and workers.
+Which host will run a queued job is unknown, so estimates use the mean over
+hosts; the slowest host sizes the RQ job_timeout. Before the first sample
+the median RTF of recent completed tasks in the database is used, then
+ETA_DEFAULT_RTF.
+
+Queued task:  eta_start = now + (work ahead + remaining work of running jobs) / workers
+              "ahead" is the audio before the job in its own queue plus, from the
+              other queues, what the weighted dequeue (PRIORITY_WEIGHTS) serves
+              meanwhile. A task still parked in fair share (app/core/fair_share.py)
+              is behind everything in RQ, its user's earlier parked files and,
+              from every other user in the ring, about one quantum of audio per
+              turn its own user needs.
+Running task: eta_finish extrapolated from progress (or the prediction early on).
+"""
+import json
+import logging
+import math
+import socket
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from rq import Worker
+from rq.job import Job
+
+from app.core.config import settings
+from app.core.queue import TRANSCRIPTION_QUEUES, task_queue
+from app.services.quality import profile_params
+
+logger = logging.getLogger(__name__)
+
+RTF_KEY = "eta:rtf"  # hash: "model|profile|host" -> {"rtf", "n"}
+
+# Cache local das estatísticas (evita HGETALL a cada /status ou enqueue)
+STATS_TTL_SECONDS = 30
+# Jobs lidos por fila para somar áudio à frente (o resto é extrapolado)
+MAX_SCAN_JOBS = 500
+# Progresso mínimo (%) para extrapolar o término pelo tempo decorrido
+MIN_PROGRESS_FOR_EXTRAPOLATION = 10
+# Tarefa ausente da foto das filas (recém-enfileirada) força releitura, no máximo nesse intervalo
+SNAPSHOT_MIN_AGE_SECONDS = 2
+
+
+class EtaEstimator:
+    """Rolling RTF statistics, ETAs and predicted job timeouts."""
+
+    def __init__(self, settings, queue=task_queue):
+        self.settings = settings
+        self.task_queue = queue
+        self.host = socket.gethostname()
+        self._stats: Dict[str, dict] = {}
+        self._stats_at = 0.0
+        self._history: Dict[str, Optional[float]] = {}
+        self._snapshot: Optional[dict] = None
+        self._snapshot_at = 0.0
+
+    @property
+    def redis(self):
+        return self.task_queue.redis_conn
+
+    # ------------------------------------------------------------------
+    # Estatísticas de RTF
+    # ------------------------------------------------------------------
+
+    def _model_key(self, profile: Optional[str]) -> str:
+        return f"{profile_params(profile, self.settings)['model']}|{profile or self.settings.QUALITY_DEFAULT_PROFILE}"
+
+    def record(self, profile: Optional[str], audio_seconds: float, processing_seconds: float):
+        """Fold one finished transcription into the EWMA of this host"""
+        if not audio_seconds or audio_seconds <= 0 or processing_seconds <= 0:
+            return
+        field = f"{self._model_key(profile)}|{self.host}"
+        rtf = processing_seconds / audio_seconds
+        try:
+            raw = self.redis.hget(RTF_KEY, field)
+            current = json.loads(raw) if raw else None
+            if current:
+                alpha = self.settings.ETA_RTF_ALPHA
+                current = {"rtf": alpha * rtf + (1 - alpha) * current["rtf"], "n": current["n"] + 1}
+            else:
+                current = {"rtf": rtf, "n": 1}
+            self.redis.hset(RTF_KEY, field, json.dumps(current))
+            self._stats_at = 0.0
+        except Exception as e:
+            logger.debug(f"Falha ao registrar RTF: {e}")
+
+    def _load_stats(self) -> Dict[str, dict]:
+        if time.monotonic() - self._stats_at < STATS_TTL_SECONDS:
+            return self._stats
+        try:
+            raw = self.redis.hgetall(RTF_KEY)
+            self._stats = {
+                (k.decode() if isinstance(k, bytes) else k): json.loads(v) for k, v in raw.items()
+            }
+        except Exception as e:
+            logger.debug(f"Estatísticas de RTF indisponíveis: {e}")
+        self._stats_at = time.monotonic()
+        return self._stats
+
+    def _host_rtfs(self, profile: Optional[str]) -> List[float]:
+        prefix = self._model_key(profile) + "|"
+        return [s["rtf"] for field, s in self._load_stats().items() if field.startswith(prefix)]
+
+    def _history_rtf(self, profile: Optional[str]) -> Optional[float]:
+        """Median RTF of recent completed tasks of the profile (cold start)"""
+        key = profile or ""
+        if key in self._history:
+            return self._history[key]
+
+        from sqlalchemy import or_
+        from app.database import SessionLocal
+        from app.models import TranscriptionTask
+
+        db = SessionLocal()
+        try:
+            query = db.query(TranscriptionTask.processing_time, TranscriptionTask.duration).filter(
+                TranscriptionTask.status == "completed",
+                TranscriptionTask.duration > 0,
+                TranscriptionTask.processing_time > 0
+            )
+            if profile:
+                query = query.filter(or_(TranscriptionTask.profile == profile, TranscriptionTask.profile.is_(None)))
+            rows = query.order_by(TranscriptionTask.completed_at.desc()).limit(200).all()
+            rtfs = sorted(p / d for p, d in rows)
+            self._history[key] = rtfs[len(rtfs) // 2] if rtfs else None
+        except Exception as e:
+            # Falha do banco não é memorizada: a próxima chamada tenta de novo
+            logger.debug(f"Histórico de RTF indisponível: {e}")
+            return None
+        finally:
+            db.close()
+        return self._history[key]
+
+    def rtf(self, profile: Optional[str], slowest: bool = False) -> float:
+        """Expected RTF of a profile (mean over hosts, or the slowest host)"""
+        rtfs = self._host_rtfs(profile)
+        if rtfs:
+            return max(rtfs) if slowest else sum(rtfs) / len(rtfs)
+        return self._history_rtf(profile) or self.settings.ETA_DEFAULT_RTF
+
+    def predict_runtime(self, audio_seconds: Optional[float], profile: Optional[str], slowest: bool = False) -> float:
+        if audio_seconds is None:
+            audio_seconds = self.settings.FAIR_SHARE_DEFAULT_COST_SECONDS
+        return audio_seconds * self.rtf(profile, slowest) + self.settings.ETA_OVERHEAD_SECONDS
+
+    def job_timeout(self, audio_seconds: Optional[float], profile: Optional[str]) -> int:
+        """
+        RQ job_timeout from the predicted runtime on the slowest host.
+
+        Returns:
+            Seconds, within [ETA_MIN_JOB_TIMEOUT, ETA_MAX_JOB_TIMEOUT];
+            ETA_DEFAULT_JOB_TIMEOUT when the duration is unknown
+        """
+        if audio_seconds is None:
+            return self.settings.ETA_DEFAULT_JOB_TIMEOUT
+        predicted = self.predict_runtime(audio_seconds, profile, slowest=True)
+        timeout = int(predicted * self.settings.ETA_TIMEOUT_FACTOR)
+        return max(self.settings.ETA_MIN_JOB_TIMEOUT, min(self.settings.ETA_MAX_JOB_TIMEOUT, timeout))
+
+    # ------------------------------------------------------------------
+    # Filas
+    # ------------------------------------------------------------------
+
+    def _weights(self) -> Dict[str, int]:
+        """PRIORITY_WEIGHTS ('high:6,default:3,...'), como em CustomWorker._parse_weights"""
+        weights = {}
+        for item in self.settings.PRIORITY_WEIGHTS.split(","):
+            name, _, weight = item.strip().partition(":")
+            if name:
+                weights[name] = max(1, int(weight or 1))
+        return weights
+
+    def _job_runtime(self, job: Job) -> float:
+        options = (job.args[2] if len(job.args) > 2 else None) or {}
+        return self.predict_runtime(job.meta.get("audio_seconds"), options.get("profile"))
+
+    def _queue_snapshot(self, task_id: Optional[str] = None) -> dict:
+        """
+        Job ids and cumulative predicted work of each queue (first MAX_SCAN_JOBS),
+        running jobs and worker count, reused for STATS_TTL_SECONDS so /status
+        polls do not fetch hundreds of jobs each. A task_id missing from the
+        snapshot (just enqueued) refreshes it, at most every SNAPSHOT_MIN_AGE_SECONDS.
+        """
+        age = time.monotonic() - self._snapshot_at
+        if self._snapshot is not None and age < STATS_TTL_SECONDS:
+            missing = task_id is not None and task_id not in self._snapshot["parked"]["index"] and not any(
+                task_id in queue["index"] for queue in self._snapshot["queues"].values()
+            )
+            if not missing or age < SNAPSHOT_MIN_AGE_SECONDS:
+                return self._snapshot
+
+        queues = {}
+        for name in TRANSCRIPTION_QUEUES:
+            job_ids = self.task_queue.queues[name].get_job_ids()
+            cumulative, total = [], 0.0
+            for job in Job.fetch_many(job_ids[:MAX_SCAN_JOBS], connection=self.redis):
+                total += self._job_runtime(job) if job is not None else 0.0
+                cumulative.append(total)
+            queues[name] = {
+                "index": {job_id: i for i, job_id in enumerate(job_ids)},
+                "cumulative": cumulative,
+                "count": len(job_ids),
+            }
+
+        running = []  # (predicted runtime, started_at)
+        for name in TRANSCRIPTION_QUEUES:
+            job_ids = self.task_queue.queues[name].started_job_registry.get_job_ids()
+            for job in Job.fetch_many(job_ids, connection=self.redis):
+                if job is not None:
+                    running.append((self._job_runtime(job), job.started_at))
+
+        self._snapshot = {
+            "queues": queues,
+            "parked": self._parked_snapshot(),
+            "running": running,
+            "workers": max(1, Worker.count(connection=self.redis)),
+        }
+        self._snapshot_at = time.monotonic()
+        return self._snapshot
+
+    def _parked_snapshot(self) -> dict:
+        """
+        Fair-share entries per user in release order (priority class, then FIFO),
+        with cumulative audio and predicted work, plus task_id -> (user, index).
+        """
+        parked = {"users": {}, "index": {}}
+        if not self.settings.FAIR_SHARE_ENABLED:
+            return parked
+        from app.core.fair_share import RING_KEY, FairShareScheduler
+
+        users = [u.decode() if isinstance(u, bytes) else u for u in self.redis.lrange(RING_KEY, 0, -1)]
+        pipe = self.redis.pipeline()
+        for user_id in users:
+            for key in FairShareScheduler.user_keys(user_id):
+                pipe.lrange(key, 0, -1)
+        lists = pipe.execute()
+        per_user = len(lists) // len(users) if users else 0
+
+        for n, user_id in enumerate(users):
+            ids, audio, cumulative = [], [], []
+            total_audio, total_work = 0.0, 0.0
+            for raw in (raw for parked_list in lists[n * per_user:(n + 1) * per_user] for raw in parked_list):
+                entry = json.loads(raw)
+                seconds = entry.get("audio_seconds") or self.settings.FAIR_SHARE_DEFAULT_COST_SECONDS
+                total_audio += seconds
+                total_work += self.predict_runtime(seconds, (entry.get("options") or {}).get("profile"))
+                parked["index"][entry["task_id"]] = (user_id, len(ids))
+                ids.append(entry["task_id"])
+                audio.append(total_audio)
+                cumulative.append(total_work)
+            parked["users"][user_id] = {"audio": audio, "cumulative": cumulative}
+        return parked
+
+    def _parked_ahead(self, parked: dict, task_id: str):
+        """(jobs, predicted seconds) released from fair share before a parked task"""
+        user_id, index = parked["index"][task_id]
+        own = parked["users"][user_id]
+        jobs, work = index, own["cumulative"][index - 1] if index else 0.0
+
+        # Turnos do próprio usuário até liberar a tarefa; a cada turno os outros
+        # usuários do anel liberam até um quantum de áudio cada
+        quantum = self.settings.FAIR_SHARE_QUANTUM_SECONDS
+        budget = math.ceil(own["audio"][index] / quantum) * quantum
+        for other, entries in parked["users"].items():
+            if other == user_id or not entries["audio"]:
+                continue
+            released = max(1, bisect_right(entries["audio"], budget))
+            jobs += released
+            work += entries["cumulative"][released - 1]
+        return jobs, work
+
+    @staticmethod
+    def _work_ahead(cumulative: List[float], jobs: int) -> float:
+        """Predicted seconds of the first `jobs` queued jobs, extrapolated past the scanned ones"""
+        if jobs <= 0 or not cumulative:
+            return 0.0
+        scanned = min(jobs, len(cumulative))
+        return cumulative[scanned - 1] * jobs / scanned
+
+    @staticmethod
+    def _running_remaining(running: list, now: datetime) -> float:
+        """Predicted seconds still needed by the jobs currently running"""
+        remaining = 0.0
+        for predicted, started_at in running:
+            elapsed = (now - started_at).total_seconds() if started_at else 0.0
+            remaining += max(0.0, predicted - elapsed)
+        return remaining
+
+    def _queued_wait(self, task_id: str, now: datetime):
+        """(1-based queue position or None, seconds until a worker picks the job)"""
+        weights = self._weights()
+        snapshot = self._queue_snapshot(task_id)
+        running = self._running_remaining(snapshot["running"], now)
+
+        if task_id in snapshot["parked"]["index"]:
+            # Ainda no fair-share: atrás de tudo que já está no RQ e do que sai antes dele
+            jobs, work = self._parked_ahead(snapshot["parked"], task_id)
+            for queue in snapshot["queues"].values():
+                jobs += queue["count"]
+                work += self._work_ahead(queue["cumulative"], queue["count"])
+            return jobs + 1, (work + running) / snapshot["workers"]
+
+        position, own_queue, own_work = None, None, 0.0
+        for name, queue in snapshot["queues"].items():
+            index = queue["index"].get(task_id)
+            if index is not None:
+                position, own_queue = index + 1, name
+                own_work = self._work_ahead(queue["cumulative"], index)
+                break
+
+        ahead = own_work
+        for name, queue in snapshot["queues"].items():
+            if name == own_queue:
+                continue
+            work = self._work_ahead(queue["cumulative"], queue["count"])
+            if own_queue is None:
+                ahead += work  # Fora das filas (despachando agora): atrás de tudo que está no RQ
+            else:
+                share = weights.get(name, 1) / weights.get(own_queue, 1)
+                ahead += min(work, own_work * share)
+
+        return position, (ahead + running) / snapshot["workers"]
+
+    # ------------------------------------------------------------------
+    # ETA de uma tarefa
+    # ------------------------------------------------------------------
+
+    def estimate(self, task) -> Dict:
+        """
+        ETA fields for /status and WebSocket.
+
+        Args:
+            task: TranscriptionTask
+
+        Returns:
+            {"queue_position", "eta_start", "eta_finish"} (ISO UTC; empty for finished tasks)
+        """
+        if task.status not in ("queued", "processing") or self.task_queue.queue is None:
+            return {}
+
+        now = datetime.utcnow()
+        try:
+            job = Job.fetch(task.task_id, connection=self.redis)
+            audio_seconds = job.meta.get("audio_seconds")
+        except Exception:
+            audio_seconds = None
+        if audio_seconds is None:
+            audio_seconds = task.duration  # Probed at upload (app/services/audio_probe.py)
+        profile = task.profile or json.loads(task.options or "{}").get("profile")
+        runtime = self.predict_runtime(audio_seconds, profile)
+
+        if task.status == "processing":
+            started = task.started_at or now
+            elapsed = (now - started).total_seconds()
+            if task.progress and task.progress >= MIN_PROGRESS_FOR_EXTRAPOLATION:
+                remaining = elapsed * (100 - task.progress) / task.progress
+            else:
+                remaining = max(0.0, runtime - elapsed)
+            return {
+                "queue_position": 0,
+                "eta_start": started.isoformat(),
+                "eta_finish": (now + timedelta(seconds=remaining)).isoformat(),
+            }
+
+        position, wait = self._queued_wait(task.task_id, now)
+        start = now + timedelta(seconds=wait)
+        return {
+            "queue_position": position,
+            "eta_start": start.isoformat(),
+            "eta_finish": (start + timedelta(seconds=runtime)).isoformat(),
+        }
+
+
+# Global instance
+eta_estimator = EtaEstimator(settings)
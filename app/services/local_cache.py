@@ -0,0 +1,142 @@
+"""
+In-process L1 cache (byte-bounded LRU with TTL).
+Sits in front of the Redis cache so hot keys skip the network round trip
+and decompression. Each process keeps its own copy; invalidation of
+cleared namespaces is broadcast over Redis pub/sub by CacheService.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate memory footprint of a cached value in bytes.
+    Walks dicts/lists recursively; exact enough to bound the cache.
+    """
+    if isinstance(value, (str, bytes, bytearray)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LocalCache:
+    """
+    Thread-safe LRU cache bounded by total estimated bytes, with per-entry TTL.
+
+    Values are returned as-is (not copied): callers must treat them as
+    read-only, exactly like values decoded from Redis.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, default_ttl: int = 300):
+        """
+        Args:
+            max_bytes: Upper bound for the sum of entry sizes (0 disables the cache)
+            default_ttl: Entry lifetime in seconds
+        """
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # key -> (value, size, expires_at)
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None (expired entries count as misses)"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Insert or replace an entry, evicting least recently used ones to fit"""
+        if not self.enabled:
+            return
+
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            # Larger than the whole cache: never worth keeping in-process
+            with self._lock:
+                self._remove(key)
+            return
+
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self, prefix: str = None) -> int:
+        """
+        Drop entries whose key starts with prefix (all entries if None).
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if prefix is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                return removed
+
+            keys = [k for k in self._entries if k.startswith(prefix)]
+            for k in keys:
+                self._remove(k)
+            return len(keys)
+
+    def _remove(self, key: str):
+        """Remove an entry (caller must hold the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total * 100, 1) if total else 0.0,
+            }
@@ -0,0 +1,70 @@
+"""
+Cross-job micro-batching of short clips.
+
+Whisper's encoder always sees 30 s windows, so a 1-3 minute call fills only
+a few of them and a batch of one leaves the encoder idle. Several clips are
+packed into one array, each padded with silence to a multiple of 30 s,
+with one clip_timestamps window per 30 s slot. The padding costs nothing
+(every window is padded to 30 s anyway) and it guarantees that no window
+mixes two clips. The batched pipeline then decodes all windows together and
+the segments are split back per clip by offset.
+"""
+import dataclasses
+from typing import List, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+WINDOW = 30 * SAMPLE_RATE
+
+
+def pack_clips(audios: List[np.ndarray]) -> Tuple[np.ndarray, List[dict], List[float]]:
+    """
+    Concatenate clips on 30 s boundaries.
+
+    Args:
+        audios: Decoded 16 kHz mono clips
+
+    Returns:
+        (packed audio, clip_timestamps in samples, start offset of each clip in seconds)
+    """
+    parts, windows, offsets = [], [], []
+    position = 0
+    for audio in audios:
+        slots = max(1, -(-len(audio) // WINDOW))  # ceil
+        padded = np.zeros(slots * WINDOW, dtype=np.float32)
+        padded[:len(audio)] = audio
+        parts.append(padded)
+        offsets.append(position / SAMPLE_RATE)
+        # Janelas cheias de 30 s: o pipeline só junta janelas vizinhas que caibam
+        # em 30 s, então nenhuma janela mistura dois clipes (o silêncio do fim é
+        # o mesmo padding que o Whisper aplicaria)
+        for slot in range(slots):
+            start = position + slot * WINDOW
+            windows.append({"start": start, "end": start + WINDOW})
+        position += slots * WINDOW
+    return np.concatenate(parts), windows, offsets
+
+
+def unpack_segments(segments, offsets: List[float]) -> List[list]:
+    """
+    Split segments of the packed audio back per clip, with clip-relative timestamps.
+
+    Args:
+        segments: Segments from the packed transcription (absolute time)
+        offsets: Clip offsets returned by pack_clips
+
+    Returns:
+        One segment list per clip
+    """
+    per_clip = [[] for _ in offsets]
+    for seg in segments:
+        # Último clipe cujo offset é <= início do segmento
+        index = max(0, int(np.searchsorted(offsets, seg.start, side="right")) - 1)
+        offset = offsets[index]
+        if dataclasses.is_dataclass(seg):
+            seg = dataclasses.replace(seg, start=seg.start - offset, end=seg.end - offset, words=None)
+        else:
+            seg = seg._replace(start=seg.start - offset, end=seg.end - offset)
+        per_clip[index].append(seg)
+    return per_clip
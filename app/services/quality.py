@@ -0,0 +1,149 @@
+"""
+Quality profiles for transcription.
+
+fast      greedy decoding, no temperature fallback, optional smaller model
+balanced  WHISPER_BEAM_SIZE (the autotuned production setting)
+accurate  wider beam, best_of 5, optional larger model
+
+The profile is chosen per upload and stored in the task options, so it is
+part of the transcription cache key. Under backlog the worker steps down
+(accurate -> balanced -> fast) while queue wait exceeds QUALITY_SLA_SECONDS
+and steps back up, one profile at a time, once the wait falls below
+SLA * QUALITY_RECOVER_RATIO. The step-down level is shared by all workers
+through Redis.
+"""
+import logging
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ordered from cheapest to most accurate
+QUALITY_PROFILES = ("fast", "balanced", "accurate")
+
+STEP_DOWN_KEY = "quality:step_down"
+
+
+def profile_params(profile: Optional[str], settings) -> Dict:
+    """
+    Model and decoding options for a profile.
+
+    Args:
+        profile: Profile name (unknown/None -> QUALITY_DEFAULT_PROFILE)
+        settings: Settings instance
+
+    Returns:
+        {"model", "beam_size", "best_of", "temperature"}; temperature None keeps
+        the faster-whisper fallback schedule
+    """
+    if profile not in QUALITY_PROFILES:
+        profile = settings.QUALITY_DEFAULT_PROFILE
+
+    if profile == "fast":
+        return {
+            "model": settings.QUALITY_FAST_MODEL or settings.WHISPER_MODEL,
+            "beam_size": 1,
+            "best_of": 1,
+            "temperature": 0.0,  # Sem re-decodificação por fallback
+        }
+    if profile == "accurate":
+        return {
+            "model": settings.QUALITY_ACCURATE_MODEL or settings.WHISPER_MODEL,
+            "beam_size": max(5, settings.WHISPER_BEAM_SIZE),
+            "best_of": 5,
+            "temperature": None,
+        }
+    return {
+        "model": settings.WHISPER_MODEL,
+        "beam_size": settings.WHISPER_BEAM_SIZE,
+        "best_of": 5,
+        "temperature": None,
+    }
+
+
+class QualityGovernor:
+    """Chooses the effective profile of each job from the queue wait."""
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    @property
+    def redis(self):
+        from app.core.redis_client import get_redis
+        return get_redis(db=0)
+
+    @property
+    def breaker(self):
+        from app.core.redis_client import get_breaker
+        return get_breaker(db=0)
+
+    def _update_level(self, wait_seconds: float) -> int:
+        """
+        Hysteresis: jump down to the level the wait calls for (1 above the SLA,
+        2 above twice the SLA), recover one level per job below the recover mark.
+        """
+        sla = self.settings.QUALITY_SLA_SECONDS
+        max_level = len(QUALITY_PROFILES) - 1
+        # Circuito aberto: decide só pela espera deste job, sem estado compartilhado
+        shared = self.breaker.allow()
+        level = 0
+        if shared:
+            try:
+                level = int(self.breaker.call(self.redis.get, STEP_DOWN_KEY) or 0)
+            except Exception as e:
+                logger.debug(f"Nível de step-down indisponível: {e}")
+
+        target = min(max_level, int(wait_seconds // sla)) if sla > 0 else 0
+        if target > level:
+            level = target
+            logger.warning(f"⏬ Qualidade reduzida (nível {level}): espera na fila {wait_seconds:.0f}s > SLA {sla}s")
+        elif level and wait_seconds < sla * self.settings.QUALITY_RECOVER_RATIO:
+            level -= 1
+            logger.info(f"⏫ Qualidade restaurada (nível {level}): espera na fila {wait_seconds:.0f}s")
+
+        if not shared:
+            return level
+        try:
+            if level:
+                # Expira sozinho se nenhum worker observar a fila por um tempo
+                self.breaker.call(self.redis.set, STEP_DOWN_KEY, level, ex=max(60, sla * 4))
+            else:
+                self.breaker.call(self.redis.delete, STEP_DOWN_KEY)
+        except Exception as e:
+            logger.debug(f"Falha ao gravar nível de step-down: {e}")
+        return level
+
+    def resolve(self, requested: Optional[str], wait_seconds: Optional[float]) -> Tuple[str, str]:
+        """
+        Effective profile for a job about to run.
+
+        Args:
+            requested: Profile from the upload options (None = default)
+            wait_seconds: Time the job spent in the queue (None if unknown)
+
+        Returns:
+            (profile, reason)
+        """
+        if requested in QUALITY_PROFILES:
+            base, reason = requested, "requested"
+        else:
+            base, reason = self.settings.QUALITY_DEFAULT_PROFILE, "default"
+            if base not in QUALITY_PROFILES:
+                base = "balanced"
+
+        if not self.settings.QUALITY_AUTO_STEP_DOWN or wait_seconds is None:
+            return base, reason
+
+        level = self._update_level(wait_seconds)
+        profile = QUALITY_PROFILES[max(0, QUALITY_PROFILES.index(base) - level)]
+        if profile != base:
+            reason = (
+                f"auto step-down {base} -> {profile}: queue wait {wait_seconds:.0f}s "
+                f"(SLA {self.settings.QUALITY_SLA_SECONDS}s)"
+            )
+        return profile, reason
+
+
+# Global instance
+quality_governor = QualityGovernor(settings)
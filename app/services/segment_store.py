@@ -0,0 +1,258 @@
+"""
+Compact, array-backed store of timestamped segments.
+
+faster-whisper Segment objects carry token lists and word data we never
+use; a call with a few hundred segments keeps all of that alive until the
+task ends. The store keeps only what the product needs:
+
+    starts, ends     float32 arrays (seconds)
+    offsets          uint32 array, start of each segment in `text`
+    confidence       float32 array, exp(avg_logprob) of the segment
+    speakers         uint8 array, 1-based index into `labels` (0 = no speaker)
+    text             one string, segments joined by newlines
+
+`text` is exactly the plain transcription saved as result_text, so the
+blob persisted per task (to_bytes) is enough for subtitles, click-to-seek
+and rule-hit timestamps without re-transcribing. Speaker labels (stereo
+split, diarization) live in their own column: they show up in subtitles,
+timestamped text and the API segments, never in `text`, which is what the
+analyzer and the rule hits read.
+"""
+import math
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import Iterator, List, NamedTuple, Optional
+
+MAGIC = b"SEGS"
+VERSION = 2
+_HEADER = struct.Struct("<4sBII")  # magic, version, segment count, labels size (bytes)
+_HEADER_V1 = struct.Struct("<4sBI")  # Sem coluna de falantes
+
+
+class StoredSegment(NamedTuple):
+    start: float
+    end: float
+    text: str
+    confidence: float
+    speaker: Optional[str] = None
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    """HH:MM:SS<sep>mmm"""
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def _labelled(seg: StoredSegment) -> str:
+    return f"[{seg.speaker}] {seg.text}" if seg.speaker else seg.text
+
+
+class SegmentStore:
+    """Segments of one transcription in parallel arrays"""
+
+    __slots__ = ("starts", "ends", "offsets", "confidence", "speakers", "labels", "_parts", "_length", "_text")
+
+    def __init__(self):
+        self.starts = array("f")
+        self.ends = array("f")
+        self.offsets = array("I")
+        self.confidence = array("f")
+        self.speakers = array("B")
+        self.labels: List[str] = []
+        self._parts: List[str] = []
+        self._length = 0
+        self._text = None
+
+    # ------------------------------------------------------------------
+    # Construção
+    # ------------------------------------------------------------------
+
+    def append(self, start: float, end: float, text: str, confidence: float = 1.0,
+               speaker: Optional[str] = None):
+        """Add one segment (empty text is skipped, as in the plain transcription)"""
+        text = text.strip()
+        if not text:
+            return
+        if speaker is None:
+            speaker_index = 0
+        else:
+            if speaker not in self.labels:
+                if len(self.labels) == 255:
+                    raise ValueError("Mais de 255 falantes num SegmentStore")
+                self.labels.append(speaker)
+            speaker_index = self.labels.index(speaker) + 1
+        if self._parts:
+            self._length += 1  # "\n"
+        self.starts.append(start)
+        self.ends.append(end)
+        self.offsets.append(self._length)
+        self.confidence.append(confidence)
+        self.speakers.append(speaker_index)
+        self._parts.append(text)
+        self._length += len(text)
+        self._text = None
+
+    def add_segment(self, segment):
+        """Add a faster-whisper Segment (or any object with start/end/text)"""
+        avg_logprob = getattr(segment, "avg_logprob", None)
+        confidence = math.exp(avg_logprob) if avg_logprob is not None else 1.0
+        self.append(segment.start, segment.end, segment.text, confidence)
+
+    @classmethod
+    def from_segments(cls, segments) -> "SegmentStore":
+        store = cls()
+        for segment in segments:
+            store.add_segment(segment)
+        return store
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    @property
+    def text(self) -> str:
+        """Plain transcription: segment texts joined by newlines"""
+        if self._text is None:
+            self._text = "\n".join(self._parts)
+        return self._text
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def segment_text(self, index: int) -> str:
+        return self._parts[index]
+
+    def speaker(self, index: int) -> Optional[str]:
+        speaker_index = self.speakers[index]
+        return self.labels[speaker_index - 1] if speaker_index else None
+
+    def __getitem__(self, index: int) -> StoredSegment:
+        return StoredSegment(
+            self.starts[index], self.ends[index], self._parts[index], self.confidence[index],
+            self.speaker(index)
+        )
+
+    def __iter__(self) -> Iterator[StoredSegment]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def index_at(self, char_offset: int) -> int:
+        """Segment containing a character position of `text`"""
+        return max(0, bisect_right(self.offsets, char_offset) - 1)
+
+    def locate(self, term: str) -> List[StoredSegment]:
+        """Segments where a (case-insensitive) term occurs, once per occurrence"""
+        term = term.lower()
+        if not term or not len(self):
+            return []
+        haystack = self.text.lower()
+        hits, position = [], haystack.find(term)
+        while position != -1:
+            hits.append(self[self.index_at(position)])
+            position = haystack.find(term, position + len(term))
+        return hits
+
+    def to_dicts(self) -> List[dict]:
+        """JSON-friendly list for the API (player click-to-seek)"""
+        return [
+            {
+                "start": round(seg.start, 2),
+                "end": round(seg.end, 2),
+                "text": seg.text,
+                "confidence": round(seg.confidence, 3),
+                "speaker": seg.speaker,
+            }
+            for seg in self
+        ]
+
+    @property
+    def labelled_text(self) -> str:
+        """Plain transcription with a "[speaker] " prefix on labelled segments (display only)"""
+        return "\n".join(_labelled(seg) for seg in self)
+
+    # ------------------------------------------------------------------
+    # Exportação
+    # ------------------------------------------------------------------
+
+    def to_srt(self) -> str:
+        blocks = []
+        for i, seg in enumerate(self, 1):
+            blocks.append(f"{i}\n{_timestamp(seg.start, ',')} --> {_timestamp(seg.end, ',')}\n{_labelled(seg)}\n")
+        return "\n".join(blocks)
+
+    def to_vtt(self) -> str:
+        blocks = ["WEBVTT\n"]
+        for seg in self:
+            blocks.append(f"{_timestamp(seg.start, '.')} --> {_timestamp(seg.end, '.')}\n{_labelled(seg)}\n")
+        return "\n".join(blocks)
+
+    def to_timestamped_text(self) -> str:
+        """Plain text with a [mm:ss] prefix per segment"""
+        lines = []
+        for seg in self:
+            minutes, seconds = divmod(int(seg.start), 60)
+            lines.append(f"[{minutes:02d}:{seconds:02d}] {_labelled(seg)}")
+        return "\n".join(lines)
+
+    # ------------------------------------------------------------------
+    # Persistência (blob binário comprimido)
+    # ------------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """
+        Header + zlib(starts | ends | offsets | confidence | speakers | labels | utf-8 text),
+        little-endian; labels are joined by newlines
+        """
+        columns = []
+        for column in (self.starts, self.ends, self.offsets, self.confidence):
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            columns.append(column.tobytes())
+        labels = "\n".join(self.labels).encode("utf-8")
+        payload = b"".join(columns) + self.speakers.tobytes() + labels + self.text.encode("utf-8")
+        return _HEADER.pack(MAGIC, VERSION, len(self), len(labels)) + zlib.compress(payload, 6)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "SegmentStore":
+        magic, version = struct.unpack_from("<4sB", blob)
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError(f"Blob de segmentos inválido (magic={magic!r}, versão={version})")
+        if version == 1:
+            _, _, count = _HEADER_V1.unpack_from(blob)
+            labels_size, header_size = None, _HEADER_V1.size
+        else:
+            _, _, count, labels_size = _HEADER.unpack_from(blob)
+            header_size = _HEADER.size
+        payload = zlib.decompress(blob[header_size:])
+
+        store = cls()
+        position = 0
+        for column in (store.starts, store.ends, store.offsets, store.confidence):
+            size = count * column.itemsize
+            column.frombytes(payload[position:position + size])
+            if sys.byteorder == "big":
+                column.byteswap()
+            position += size
+
+        if labels_size is None:
+            store.speakers = array("B", bytes(count))  # v1: sem falantes
+        else:
+            store.speakers.frombytes(payload[position:position + count])
+            position += count
+            labels = payload[position:position + labels_size].decode("utf-8")
+            store.labels = labels.split("\n") if labels else []
+            position += labels_size
+
+        text = payload[position:].decode("utf-8")
+        bounds = list(store.offsets) + [len(text) + 1]
+        store._parts = [text[bounds[i]:bounds[i + 1] - 1] for i in range(count)]
+        store._length = len(text)
+        store._text = text
+        return store
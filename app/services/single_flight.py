@@ -0,0 +1,247 @@
+"""
+Single-flight deduplication of identical transcriptions across workers.
+
+The first worker to start transcribing a given (audio content, options)
+key takes a Redis lease and keeps renewing it while Whisper runs. Workers
+that pick up the same key meanwhile wait for the completion message and
+reuse the cached result instead of recomputing it. If the lease owner
+crashes, the lease expires and one of the waiters takes over.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LEASE_KEY = "singleflight:lease:{key}"
+DONE_CHANNEL = "singleflight:done:{key}"
+
+# Read size for content hashing
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# (path, size, mtime) -> digest, so get + set of the same file hash it once
+_digest_memo: Dict[Tuple[str, int, float], str] = {}
+_digest_lock = threading.Lock()
+_DIGEST_MEMO_MAX = 1024
+
+# Delete/renew only if we still own the lease
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def content_digest(file_path: str) -> str:
+    """
+    SHA-256 of the file content, memoized by path/size/mtime.
+
+    Args:
+        file_path: Path to file
+
+    Returns:
+        Hex digest string
+    """
+    stat = os.stat(file_path)
+    memo_key = (file_path, stat.st_size, stat.st_mtime)
+
+    with _digest_lock:
+        digest = _digest_memo.get(memo_key)
+    if digest:
+        return digest
+
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _digest_lock:
+        if len(_digest_memo) >= _DIGEST_MEMO_MAX:
+            _digest_memo.clear()
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+class SingleFlight:
+    """
+    Redis lease based single-flight executor.
+    """
+
+    def __init__(self, redis_provider: Callable, lease_ttl: int = 60, max_wait: int = 3600):
+        """
+        Args:
+            redis_provider: Callable returning a Redis client (or None when unavailable)
+            lease_ttl: Lease lifetime in seconds; renewed every lease_ttl/3 while
+                computing, so a crashed owner blocks others for at most this long
+            max_wait: Give up waiting for another worker after this many seconds
+        """
+        self._redis_provider = redis_provider
+        self.lease_ttl = lease_ttl
+        self.max_wait = max_wait
+
+    @property
+    def redis(self):
+        return self._redis_provider()
+
+    def run(self, key: str, compute: Callable[[], Any], lookup: Callable[[], Optional[Any]],
+            cancel_check: Optional[Callable[[], None]] = None, timeout: Optional[float] = None) -> Any:
+        """
+        Run compute() at most once at a time across all workers for key.
+
+        Args:
+            key: Deduplication key (audio content hash + options)
+            compute: Produces the result and stores it where lookup() finds it
+            lookup: Returns the stored result, or None if not available
+            cancel_check: Called about once a second while waiting; its
+                exception (e.g. TranscriptionCancelled) aborts the wait
+            timeout: Seconds left to the caller (job timeout); caps max_wait
+
+        Returns:
+            The computed result, or the one produced by another worker
+        """
+        redis = self.redis
+        if not redis:
+            return compute()
+
+        lease_key = LEASE_KEY.format(key=key)
+        max_wait = self.max_wait if timeout is None else max(0.0, min(self.max_wait, timeout))
+        deadline = time.monotonic() + max_wait
+
+        while True:
+            token = uuid.uuid4().hex
+            try:
+                acquired = redis.set(lease_key, token, nx=True, px=self.lease_ttl * 1000)
+            except Exception as e:
+                logger.warning(f"Single-flight lease error, computing directly: {e}")
+                return compute()
+
+            if acquired:
+                return self._compute_with_lease(redis, key, lease_key, token, compute)
+
+            logger.info(f"⏳ Identical transcription in progress elsewhere, waiting: {key}")
+            result = self._wait(redis, key, lease_key, lookup, deadline, cancel_check)
+            if result is not None:
+                logger.info(f"✓ Reusing result of in-flight transcription: {key}")
+                return result
+
+            if time.monotonic() >= deadline:
+                logger.warning(f"Single-flight wait exceeded {max_wait:.0f}s, computing: {key}")
+                return compute()
+            # Lease vanished without a result (owner crashed or failed): retry acquire
+
+    def _compute_with_lease(self, redis, key: str, lease_key: str, token: str, compute: Callable) -> Any:
+        """Compute while a background thread keeps the lease alive"""
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(self.lease_ttl / 3):
+                try:
+                    redis.eval(_RENEW_SCRIPT, 1, lease_key, token, self.lease_ttl * 1000)
+                except Exception as e:
+                    logger.warning(f"Single-flight lease renewal failed: {e}")
+
+        thread = threading.Thread(target=heartbeat, name="single-flight-lease", daemon=True)
+        thread.start()
+        try:
+            result = compute()
+            try:
+                redis.publish(DONE_CHANNEL.format(key=key), "done")
+            except Exception as e:
+                logger.debug(f"Single-flight completion publish failed: {e}")
+            return result
+        finally:
+            stop.set()
+            try:
+                redis.eval(_RELEASE_SCRIPT, 1, lease_key, token)
+            except Exception as e:
+                logger.debug(f"Single-flight lease release failed: {e}")
+
+    def _wait(self, redis, key: str, lease_key: str, lookup: Callable, deadline: float,
+              cancel_check: Optional[Callable[[], None]] = None) -> Optional[Any]:
+        """
+        Wait for the lease owner to finish.
+
+        Returns:
+            The result if it was produced, None if the lease disappeared
+            without one (or the deadline passed)
+
+        Raises:
+            Whatever cancel_check raises (the wait is abandoned)
+        """
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            try:
+                pubsub.subscribe(DONE_CHANNEL.format(key=key))
+            except Exception as e:
+                logger.warning(f"Single-flight wait error: {e}")
+                return lookup()
+
+            # The owner may have finished before we subscribed
+            result = lookup()
+            if result is not None:
+                return result
+
+            while time.monotonic() < deadline:
+                if cancel_check:
+                    cancel_check()
+                try:
+                    message = pubsub.get_message(timeout=min(1.0, max(0.0, deadline - time.monotonic())))
+                    if message and message.get("type") == "message":
+                        return lookup()
+                    if not redis.exists(lease_key):
+                        return lookup()
+                except Exception as e:
+                    logger.warning(f"Single-flight wait error: {e}")
+                    return lookup()
+            return None
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+
+def job_time_left() -> Optional[float]:
+    """
+    Seconds until the current RQ job hits its timeout (None outside a job
+    or without a finite timeout).
+    """
+    try:
+        from datetime import datetime
+        from rq import get_current_job
+        job = get_current_job()
+        if not job or not job.timeout or job.timeout < 0 or not job.started_at:
+            return None
+        return job.timeout - (datetime.utcnow() - job.started_at).total_seconds()
+    except Exception as e:
+        logger.debug(f"Single-flight could not read job timeout: {e}")
+        return None
+
+
+def _cache_redis():
+    from app.services.cache_service import cache_service
+    return cache_service.redis if cache_service.is_available() else None
+
+
+# Global instance (leases live in the cache database)
+single_flight = SingleFlight(
+    _cache_redis,
+    lease_ttl=settings.SINGLE_FLIGHT_LEASE_TTL,
+    max_wait=settings.SINGLE_FLIGHT_MAX_WAIT
+)
@@ -0,0 +1,128 @@
+"""
+Channel-split transcription of stereo call recordings.
+
+Call-center recorders usually put the agent on one channel and the customer
+on the other. Downmixing to mono (enhance_audio) throws that separation
+away; instead, when a diarized task is a genuine two-party recording, each
+channel is transcribed on its own and the segments are merged by timestamp,
+each tagged with its channel's speaker (STEREO_SPLIT_LABELS) in the store's
+speaker column. The plain text stays unlabelled for analysis.
+
+"Genuine" means both channels carry speech and are not copies of each
+other: many "stereo" files are mono duplicated into two channels, and some
+recorders leave one channel silent. Those fall back to the mono pipeline.
+
+Both channels go through one batched Whisper call (packed on 30 s
+boundaries, as in app/services/microbatch.py), so the cost is the
+transcription of the two channels and nothing else.
+"""
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.services.segment_store import SegmentStore
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Trecho usado na detecção (início do arquivo; suficiente e barato)
+DETECT_SECONDS = 120
+# RMS abaixo disso é silêncio (áudio float em [-1, 1])
+SILENCE_RMS = 1e-3
+
+
+def speaker_labels(settings) -> List[str]:
+    """Labels of the left and right channels"""
+    labels = [label.strip() for label in settings.STEREO_SPLIT_LABELS.split(",") if label.strip()]
+    return (labels + ["Canal 1", "Canal 2"][len(labels):])[:2]
+
+
+def is_two_party(left: np.ndarray, right: np.ndarray, settings) -> bool:
+    """
+    Whether the channels hold two different speakers.
+
+    Args:
+        left, right: Decoded channels (16 kHz float32)
+
+    Returns:
+        False for duplicated mono, a silent channel or a lopsided mix
+    """
+    n = min(len(left), len(right), DETECT_SECONDS * SAMPLE_RATE)
+    if n == 0:
+        return False
+    a = left[:n].astype(np.float64)
+    b = right[:n].astype(np.float64)
+
+    rms_a, rms_b = np.sqrt(np.mean(a * a)), np.sqrt(np.mean(b * b))
+    if min(rms_a, rms_b) < SILENCE_RMS:
+        return False
+    if min(rms_a, rms_b) / max(rms_a, rms_b) < settings.STEREO_SPLIT_MIN_LEVEL_RATIO:
+        return False
+
+    correlation = float(np.corrcoef(a, b)[0, 1])
+    logger.debug(f"Estéreo: RMS {rms_a:.4f}/{rms_b:.4f}, correlação {correlation:.2f}")
+    return abs(correlation) < settings.STEREO_SPLIT_MAX_CORRELATION
+
+
+def normalize(audio: np.ndarray) -> np.ndarray:
+    """Peak-normalize one channel (stands in for loudnorm, which runs on the downmix)"""
+    peak = float(np.max(np.abs(audio))) if len(audio) else 0.0
+    if peak < SILENCE_RMS:
+        return audio
+    return (audio * (0.95 / peak)).astype(np.float32)
+
+
+def merge(channels: List[list], labels: List[str]) -> SegmentStore:
+    """
+    Merge per-channel segments by start time, tagged with the channel's speaker.
+
+    Args:
+        channels: One segment list per channel (channel-relative = absolute time)
+        labels: Speaker label per channel
+
+    Returns:
+        SegmentStore of the conversation
+    """
+    tagged: List[Tuple[float, int, object]] = [
+        (seg.start, channel, seg) for channel, segments in enumerate(channels) for seg in segments
+    ]
+    tagged.sort(key=lambda item: (item[0], item[1]))
+
+    store = SegmentStore()
+    for _, channel, seg in tagged:
+        text = seg.text.strip()
+        if not text:
+            continue
+        avg_logprob = getattr(seg, "avg_logprob", None)
+        confidence = float(np.exp(avg_logprob)) if avg_logprob is not None else 1.0
+        store.append(seg.start, seg.end, text, confidence, speaker=labels[channel])
+    return store
+
+
+def split_channels(path: str, channels: Optional[int], settings) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Decode a stereo file into (left, right) when it should be split.
+
+    Args:
+        path: Original upload (before the mono downmix)
+        channels: Channel count probed at upload (None = unknown)
+
+    Returns:
+        (left, right) at 16 kHz, or None to use the mono pipeline
+    """
+    if not settings.STEREO_SPLIT_ENABLED or channels != 2:
+        return None
+
+    from faster_whisper import decode_audio
+    try:
+        left, right = decode_audio(path, sampling_rate=SAMPLE_RATE, split_stereo=True)
+    except Exception as e:
+        logger.warning(f"Falha ao separar canais de {path}, usando mono: {e}")
+        return None
+
+    if not is_two_party(left, right, settings):
+        logger.info("🎧 Estéreo sem dois interlocutores distintos: transcrição mono")
+        return None
+    return normalize(left), normalize(right)
@@ -1,13 +1,25 @@
 
+import base64
+import dataclasses
 import logging
 import os
+from time import perf_counter
 from faster_whisper import WhisperModel, BatchedInferencePipeline
 from app.services.audio import AudioProcessor
 from app.services.analysis import BusinessAnalyzer
+from app.services.diarization import SpeakerDiarizer
+from app.services.segment_store import SegmentStore
 
 logger = logging.getLogger(__name__)
 
 
+def _with_duration(info, duration: float):
+    """TranscriptionInfo com outra duração (dataclass no faster-whisper >= 1.1, NamedTuple antes)"""
+    if dataclasses.is_dataclass(info):
+        return dataclasses.replace(info, duration=duration)
+    return info._replace(duration=duration)
+
+
 class TranscriptionService:
     """Serviço principal de transcrição de áudio usando Whisper."""
     
@@ -15,36 +27,59 @@ class TranscriptionService:
         self.settings = settings
         self.model = None
         self.batched_model = None
+        self._profile_models = {}  # Modelos extras dos perfis de qualidade (carregados sob demanda)
         self._load_model()
         
         # Sub-serviços
         self.audio_processor = AudioProcessor()
         self.analyzer = BusinessAnalyzer()
+        self.diarizer = SpeakerDiarizer(settings)  # Falantes em gravações mono
 
     def _load_model(self):
-        """Carrega o modelo Whisper conforme configurações."""
+        """Carrega o modelo Whisper conforme configurações (e perfil do host, se houver)."""
         try:
-            logger.info(f"Carregando Whisper: {self.settings.WHISPER_MODEL} ({self.settings.DEVICE})")
-            content_root = os.environ.get('HF_HOME', '/home/appuser/.cache/huggingface')
+            # Perfil medido por scripts/autotune.py neste host
+            from app.core.host_profile import apply_host_profile
+            apply_host_profile(self.settings)
             
-            self.model = WhisperModel(
-                self.settings.WHISPER_MODEL,
-                device=self.settings.DEVICE,
-                compute_type=self.settings.COMPUTE_TYPE,
-                download_root=content_root
-            )
-            
-            if self.settings.DEVICE == "cuda":
-                try:
-                    self.batched_model = BatchedInferencePipeline(model=self.model)
-                    logger.info("Pipeline em lote habilitado.")
-                except:
-                    logger.warning("Pipeline em lote falhou. Usando padrão.")
+            self.model, self.batched_model = self._create_model(self.settings.WHISPER_MODEL)
         except Exception as e:
             logger.error(f"Falha ao carregar modelo: {e}")
             raise e
 
-    def process_task(self, file_path: str, options: dict = {}, progress_callback=None, rules: list = None):
+    def _create_model(self, model_name: str):
+        """Instancia WhisperModel (e pipeline em lote na GPU) com as configurações do worker."""
+        logger.info(f"Carregando Whisper: {model_name} ({self.settings.DEVICE})")
+        content_root = os.environ.get('HF_HOME', '/home/appuser/.cache/huggingface')
+        
+        model = WhisperModel(
+            model_name,
+            device=self.settings.DEVICE,
+            compute_type=self.settings.COMPUTE_TYPE,
+            cpu_threads=self.settings.WHISPER_CPU_THREADS,  # Fatia de cores do worker (0 = todos)
+            num_workers=self.settings.WHISPER_NUM_WORKERS,
+            download_root=content_root
+        )
+        
+        batched = None
+        if self.settings.DEVICE == "cuda" or self.settings.WHISPER_CPU_BATCHED:
+            try:
+                batched = BatchedInferencePipeline(model=model)
+                logger.info("Pipeline em lote habilitado.")
+            except:
+                logger.warning("Pipeline em lote falhou. Usando padrão.")
+        return model, batched
+
+    def _models_for(self, model_name: str):
+        """(model, batched_model) para o modelo de um perfil; extras ficam em memória após o 1º uso."""
+        if model_name == self.settings.WHISPER_MODEL:
+            return self.model, self.batched_model
+        if model_name not in self._profile_models:
+            self._profile_models[model_name] = self._create_model(model_name)
+        return self._profile_models[model_name]
+
+    def process_task(self, file_path: str, options: dict = {}, progress_callback=None, rules: list = None,
+                     cancel_check=None):
         """
         Orquestra o pipeline completo com cache distribuído:
         1. Verificar cache de transcrição
@@ -52,46 +87,38 @@ class TranscriptionService:
         3. Transcrever (se não em cache)
         4. Verificar cache de análise
         5. Analisar (se não em cache)
+        
+        cancel_check é chamado entre segmentos e levanta TranscriptionCancelled
+        se a tarefa foi excluída (app/core/cancellation.py).
         """
         from app.services.cache_service import cache_service
+        from app.services.single_flight import single_flight, job_time_left
         
         # 1. VERIFICAR CACHE DE TRANSCRIÇÃO
+        transcribed = False  # Este processo transcreveu (amostra de RTF para o ETA)
         cached_transcription = cache_service.get_transcription(file_path, options)
         if cached_transcription:
             logger.info(f"✓ Usando transcrição em cache para {os.path.basename(file_path)}")
-            full_text = cached_transcription['text']
-            info_dict = cached_transcription['info']
         else:
-            # 2. Otimizar áudio
-            optimized_path = self.audio_processor.enhance_audio(file_path)
-            
-            # 3. Transcrever
-            segments, info = self._transcribe_audio(optimized_path, progress_callback)
-            
-            # 4. Formatar (apenas texto puro, sem diarização ou timestamps)
-            full_text = self._format_output(segments)
-            
-            # Armazenar info
-            info_dict = {
-                'language': info.language,
-                'duration': info.duration
-            }
+            def compute():
+                nonlocal transcribed
+                transcribed = True
+                return self._transcribe_and_cache(file_path, options, progress_callback, cancel_check)
             
-            # Salvar transcrição no cache
-            cache_service.set_transcription(
-                file_path,
-                {'text': full_text, 'info': info_dict},
-                options,
-                ttl=86400  # 24 horas
+            # 2-3. Transcrever uma única vez entre workers (single-flight):
+            # uploads idênticos em andamento aguardam e reutilizam o resultado
+            cached_transcription = single_flight.run(
+                cache_service.transcription_key(file_path, options),
+                compute=compute,
+                lookup=lambda: cache_service.get_transcription(file_path, options),
+                cancel_check=cancel_check,  # Tarefa excluída durante a espera
+                timeout=job_time_left()     # Não espera além do timeout do job
             )
-            
-            # Limpar arquivo otimizado
-            if optimized_path != file_path and os.path.exists(optimized_path):
-                try:
-                    os.remove(optimized_path)
-                    logger.debug(f"Arquivo temporário removido: {optimized_path}")
-                except Exception as e:
-                    logger.warning(f"Falha ao limpar {optimized_path}: {e}")
+        
+        full_text = cached_transcription['text']
+        info_dict = cached_transcription['info']
+        # Segmentos com timestamps (blob compacto; ausente em entradas antigas do cache)
+        segments_blob = cached_transcription.get('segments')
         
         # 5. VERIFICAR CACHE DE ANÁLISE
         cached_analysis = cache_service.get_analysis(full_text, rules)
@@ -115,50 +142,504 @@ class TranscriptionService:
             "language": info_dict.get('language', 'unknown'),
             "duration": info_dict.get('duration', 0.0),
             "summary": analysis.get("summary"),
-            "topics": analysis.get("topics")
+            "topics": analysis.get("topics"),
+            "segments": base64.b64decode(segments_blob) if segments_blob else None,
+            "transcribed": transcribed
         }
 
-    def _transcribe_audio(self, path, cb):
-        """Realiza a transcrição do áudio usando Whisper."""
-        if self.batched_model:
-            # Modelo em lote REQUER VAD - usando parâmetros mínimos para não cortar fala
-            segments, info = self.batched_model.transcribe(
-                path, 
-                batch_size=16,
-                language="pt",  # Força português brasileiro
-                word_timestamps=False,
-                vad_filter=True,  # Necessário para batched model
-                vad_parameters={
+    def _transcribe_and_cache(self, file_path: str, options: dict, progress_callback=None, cancel_check=None) -> dict:
+        """Otimiza, transcreve e grava o resultado no cache distribuído."""
+        from app.core.cancellation import TranscriptionCancelled
+        from app.services.cache_service import cache_service
+        
+        # Chave do cache também identifica o checkpoint desta transcrição
+        cache_key = cache_service.transcription_key(file_path, options) if self.settings.CHECKPOINT_ENABLED else None
+        
+        # Gravação estéreo de ligação (atendente/cliente em canais separados):
+        # cada canal transcrito à parte, segmentos intercalados com o falante
+        if self._stereo_candidate(file_path, options):
+            from app.services.stereo import split_channels
+            stereo = split_channels(file_path, 2, self.settings)
+            if stereo:
+                segments, info = self._transcribe_stereo(
+                    stereo, progress_callback, profile=options.get('profile'), cancel_check=cancel_check
+                )
+                transcription = self._transcription_entry(segments, info["language"], info["duration"])
+                cache_service.set_transcription(file_path, transcription, options, ttl=86400)
+                return transcription
+        
+        # 2. Otimizar áudio (+ redução de ruído, se pedida ou com SNR baixo)
+        optimized_path = self._denoise(self.audio_processor.enhance_audio(file_path), file_path, options)
+        
+        try:
+            # 3. Transcrever (perfil de qualidade faz parte das opções e da chave de cache)
+            segments, info = self._transcribe_audio(
+                optimized_path, progress_callback, profile=options.get('profile'),
+                checkpoint_key=cache_key, cancel_check=cancel_check
+            )
+            if options.get('diarization'):
+                segments = self._diarize(optimized_path, segments)
+        except TranscriptionCancelled:
+            # Tarefa excluída: ninguém vai retomar este checkpoint
+            if cache_key:
+                from app.services.checkpoint import transcription_checkpoint
+                transcription_checkpoint.clear(cache_key)
+            raise
+        finally:
+            # Limpar arquivo otimizado
+            if optimized_path != file_path and os.path.exists(optimized_path):
+                try:
+                    os.remove(optimized_path)
+                    logger.debug(f"Arquivo temporário removido: {optimized_path}")
+                except Exception as e:
+                    logger.warning(f"Falha ao limpar {optimized_path}: {e}")
+        
+        # 4. Formatar: texto puro + segmentos com timestamps (SegmentStore)
+        transcription = self._transcription_entry(segments, info.language, info.duration)
+        
+        # Salvar transcrição no cache
+        cache_service.set_transcription(
+            file_path,
+            transcription,
+            options,
+            ttl=86400  # 24 horas
+        )
+        
+        # Resultado no cache: o checkpoint não é mais necessário
+        if cache_key:
+            from app.services.checkpoint import transcription_checkpoint
+            transcription_checkpoint.clear(cache_key)
+        return transcription
+
+    def _transcription_entry(self, store: SegmentStore, language: str, duration: float) -> dict:
+        """Entrada do cache de transcrição (o blob de segmentos vai em base64)"""
+        return {
+            'text': self._format_output(store),
+            'info': {
+                'language': language,
+                'duration': duration
+            },
+            'segments': base64.b64encode(store.to_bytes()).decode('ascii')
+        }
+
+    def _transcribe_audio(self, path, cb, profile: str = None, checkpoint_key: str = None, cancel_check=None):
+        """
+        Realiza a transcrição do áudio usando Whisper com o perfil de qualidade pedido.
+        Com checkpoint_key, arquivos longos salvam checkpoints e retomam do último.
+        """
+        from app.services.quality import profile_params
+        params = profile_params(profile, self.settings)
+        
+        # Duas passadas: rascunho rápido + refino só dos trechos difíceis
+        if self._use_two_pass(profile, params):
+            segments, info, _ = self._transcribe_two_pass(path, cb, params, cancel_check)
+            return segments, info
+        
+        model, batched_model = self._models_for(params["model"])
+        duration = self.audio_processor.probe_duration(path) if batched_model or checkpoint_key else None
+        
+        from app.services.checkpoint import transcription_checkpoint
+        if checkpoint_key and transcription_checkpoint.applies(duration):
+            return self._transcribe_checkpointed(
+                path, cb, model, batched_model, self._decoding(params), checkpoint_key, cancel_check
+            )
+        
+        segments, info = self._run_model(model, batched_model, path, self._decoding(params), duration)
+        return self._collect(segments, info, cb, cancel_check=cancel_check)
+
+    def _transcribe_checkpointed(self, path, cb, model, batched_model, decoding: dict, checkpoint_key: str,
+                                 cancel_check=None):
+        """
+        Transcrição longa com checkpoints periódicos (app/services/checkpoint.py).
+        Se o job foi reexecutado após a queda do worker, decodifica só o áudio
+        depois do último offset salvo e continua a partir dos segmentos já emitidos.
+        """
+        from app.services.checkpoint import transcription_checkpoint
+        from app.services.two_pass import SAMPLE_RATE, shift_segment
+        
+        checkpoint = transcription_checkpoint.writer(checkpoint_key)
+        saved = transcription_checkpoint.load(checkpoint_key)
+        if not saved:
+            segments, info = self._run_model(model, batched_model, path, decoding)
+            return self._collect(segments, info, cb, checkpoint=checkpoint, cancel_check=cancel_check)
+        
+        from faster_whisper import decode_audio
+        from app.core.metrics import transcription_resumed_seconds_total
+        
+        offset, store = saved
+        logger.info(f"⏩ Retomando transcrição do checkpoint: {offset:.0f}s, {len(store)} segmentos")
+        transcription_resumed_seconds_total.inc(offset)
+        
+        audio = decode_audio(path, sampling_rate=SAMPLE_RATE)[int(offset * SAMPLE_RATE):]
+        # Texto já transcrito como contexto do restante
+        decoding = dict(decoding, initial_prompt=store.text[-200:] or None)
+        segments, info = self._run_model(model, batched_model, audio, decoding)
+        segments = (shift_segment(seg, offset) for seg in segments)
+        info = _with_duration(info, offset + info.duration)
+        return self._collect(segments, info, cb, store=store, checkpoint=checkpoint, cancel_check=cancel_check)
+
+    # ------------------------------------------------------------------
+    # Estéreo com um falante por canal (app/services/stereo.py)
+    # ------------------------------------------------------------------
+
+    def _stereo_candidate(self, file_path: str, options: dict) -> bool:
+        """Diarized task of a 2-channel file (the channel content is checked after decoding)"""
+        if not options.get('diarization') or not self.settings.STEREO_SPLIT_ENABLED:
+            return False
+        from app.services.audio_probe import InvalidAudioError, probe_file
+        try:
+            return probe_file(file_path).channels == 2
+        except (OSError, InvalidAudioError) as e:
+            logger.debug(f"Canais de {file_path} desconhecidos: {e}")
+            return False
+
+    def _transcribe_stereo(self, channels, cb, profile: str = None, cancel_check=None):
+        """
+        Transcreve os dois canais numa única chamada do pipeline em lote
+        (empacotados em janelas de 30 s, como no micro-batch) e intercala os
+        segmentos por timestamp, com o rótulo do canal como falante.
+        
+        Returns:
+            (SegmentStore, {"language", "duration"})
+        """
+        from app.services import stereo
+        from app.services.microbatch import SAMPLE_RATE, pack_clips, unpack_segments
+        from app.services.quality import profile_params
+        
+        params = profile_params(profile, self.settings)
+        model, batched_model = self._models_for(params["model"])
+        if batched_model is None:
+            batched_model = BatchedInferencePipeline(model=model)
+        
+        duration = max(len(audio) for audio in channels) / SAMPLE_RATE
+        packed, windows, offsets = pack_clips(list(channels))
+        del channels
+        
+        segments, info = batched_model.transcribe(
+            packed,
+            clip_timestamps=windows,
+            batch_size=self._batched_options()["batch_size"],
+            **self._decoding(params),
+            language="pt",
+            word_timestamps=False,
+            vad_filter=False
+        )
+        segments, info = self._collect(segments, info, cb, raw=True, cancel_check=cancel_check)
+        
+        labels = stereo.speaker_labels(self.settings)
+        store = stereo.merge(unpack_segments(segments, offsets), labels)
+        logger.info(f"🎧 Estéreo separado por canal: {len(store)} segmentos ({' / '.join(labels)})")
+        return store, {"language": info.language, "duration": duration}
+
+    # ------------------------------------------------------------------
+    # Diarização de gravações mono (app/services/diarization.py)
+    # ------------------------------------------------------------------
+
+    def _diarize(self, audio, store: SegmentStore) -> SegmentStore:
+        """Rótulos de falante nos segmentos; falhas mantêm a transcrição sem rótulos"""
+        if not self.settings.DIARIZATION_ENABLED:
+            return store
+        try:
+            if isinstance(audio, str):
+                from faster_whisper import decode_audio
+                audio = decode_audio(audio, sampling_rate=16000)
+            return self.diarizer.diarize(audio, store)
+        except Exception as e:
+            logger.warning(f"Diarização falhou, mantendo texto sem falantes: {e}")
+            return store
+
+    def _denoise(self, optimized_path: str, file_path: str, options: dict) -> str:
+        """
+        Spectral gating do WAV otimizado (app/services/denoise.py).
+        Retorna o WAV filtrado (o otimizado é removido) ou o próprio otimizado.
+        """
+        if optimized_path == file_path:
+            return optimized_path  # enhance_audio falhou: não é o WAV 16 kHz mono
+        from app.services.denoise import denoise_wav
+        
+        denoised_path = os.path.splitext(optimized_path)[0] + "_dn.wav"
+        try:
+            report = denoise_wav(optimized_path, denoised_path, self.settings, options.get('denoise'))
+        except Exception as e:
+            logger.warning(f"Redução de ruído falhou, seguindo sem ela: {e}")
+            report = None
+        if not report:
+            if os.path.exists(denoised_path):
+                os.remove(denoised_path)
+            return optimized_path
+        
+        from app.core.metrics import denoise_applied_total
+        denoise_applied_total.labels(reason=report["reason"]).inc()
+        os.remove(optimized_path)
+        return denoised_path
+
+    def _decoding(self, params: dict) -> dict:
+        """Opções de decodificação do perfil (temperature None = fallback padrão)"""
+        decoding = {"beam_size": params["beam_size"], "best_of": params["best_of"]}
+        if params["temperature"] is not None:
+            decoding["temperature"] = params["temperature"]
+        return decoding
+
+    def _batched_options(self) -> dict:
+        """Tamanho de lote e VAD do pipeline em lote, por dispositivo"""
+        if self.settings.DEVICE == "cuda":
+            return {
+                "batch_size": self.settings.WHISPER_BATCH_SIZE,
+                "vad_parameters": {
                     "threshold": 0.1,  # Muito sensível - captura falas baixas
                     "min_speech_duration_ms": 50,  # Mínimo muito curto
                     "min_silence_duration_ms": 2000,  # Só corta silêncios longos (2s)
                     "speech_pad_ms": 400  # Padding generoso ao redor da fala
                 }
-            )
-        else:
-            segments, info = self.model.transcribe(
-                path, 
-                beam_size=5, 
+            }
+        # CPU: lote menor e VAD menos sensível - cada janela a menos é CPU poupada
+        return {
+            "batch_size": self.settings.WHISPER_CPU_BATCH_SIZE,
+            "vad_parameters": {
+                "threshold": self.settings.WHISPER_CPU_VAD_THRESHOLD,
+                "min_speech_duration_ms": 250,
+                "min_silence_duration_ms": self.settings.WHISPER_CPU_VAD_MIN_SILENCE_MS,
+                "speech_pad_ms": self.settings.WHISPER_CPU_VAD_SPEECH_PAD_MS
+            }
+        }
+
+    def _run_model(self, model, batched_model, audio, decoding: dict, duration: float = None):
+        """
+        Chama o Whisper; retorna o gerador de segmentos e info.
+        Usa o pipeline em lote, exceto em clipes curtos (< WHISPER_BATCHED_MIN_SECONDS),
+        que têm poucas janelas para agrupar e pagariam o VAD à toa.
+        """
+        if duration is None and not isinstance(audio, str):
+            duration = len(audio) / 16000
+        short_clip = duration is not None and duration < self.settings.WHISPER_BATCHED_MIN_SECONDS
+        
+        if batched_model and not short_clip:
+            # Modelo em lote REQUER VAD
+            return batched_model.transcribe(
+                audio, 
+                **self._batched_options(),
+                **decoding,
                 language="pt",  # Força português brasileiro
-                vad_filter=False,  # DESABILITADO - processa todo o áudio
-                word_timestamps=False  # Desabilitado - não precisamos de timestamps
+                word_timestamps=False,
+                vad_filter=True  # Necessário para batched model
             )
+        return model.transcribe(
+            audio, 
+            **decoding,
+            language="pt",  # Força português brasileiro
+            vad_filter=False,  # DESABILITADO - processa todo o áudio
+            word_timestamps=False  # Desabilitado - não precisamos de timestamps
+        )
+
+    def _collect(self, segments, info, cb, low: int = 0, high: int = 100, raw: bool = False,
+                 store: SegmentStore = None, checkpoint=None, cancel_check=None):
+        """
+        Consome o gerador de segmentos reportando progresso entre low e high (%).
+        Guarda só início/fim/texto/confiança (SegmentStore); raw=True mantém os
+        objetos Segment completos (rascunho das duas passadas).
         
-        # Coletar para progresso (faster-whisper retorna gerador)
-        results = []
+        Args:
+            store: SegmentStore a continuar (retomada de checkpoint)
+            checkpoint: Callback (store, offset) chamado a cada segmento
+            cancel_check: Chamado a cada segmento; levanta exceção se a tarefa foi cancelada
+        """
+        results = [] if raw else (store if store is not None else SegmentStore())
         total_dur = info.duration or 1.0
         
         for seg in segments:
-            results.append(seg)
+            if cancel_check:
+                cancel_check()
+            if raw:
+                results.append(seg)
+            else:
+                results.add_segment(seg)
+                if checkpoint:
+                    checkpoint(results, seg.end)
             if cb:
-                pct = int((seg.end / total_dur) * 100)
-                cb(min(99, pct))
+                pct = low + int((seg.end / total_dur) * (high - low))
+                cb(min(high - 1, pct))
         
-        if cb: cb(100)
+        if cb: cb(high)
         return results, info
 
+    # ------------------------------------------------------------------
+    # Micro-batch entre jobs (app/services/microbatch.py)
+    # ------------------------------------------------------------------
+
+    def transcribe_batch(self, file_paths: list, profile: str = None, diarize: bool = False,
+                         denoise: bool = None) -> list:
+        """
+        Transcreve vários clipes curtos numa única chamada do pipeline em lote.
+        Com diarize, cada clipe recebe os rótulos de falante (como no job sozinho);
+        denoise segue options["denoise"] (None = automático pelo SNR).
+        
+        Returns:
+            [(segments, {"language", "duration"})] na ordem de file_paths
+        """
+        from faster_whisper import decode_audio
+        from app.services.microbatch import SAMPLE_RATE, pack_clips, unpack_segments
+        from app.services.quality import profile_params
+        
+        params = profile_params(profile, self.settings)
+        model, batched_model = self._models_for(params["model"])
+        if batched_model is None:
+            # Só um wrapper sobre o mesmo modelo (WHISPER_CPU_BATCHED desligado)
+            batched_model = BatchedInferencePipeline(model=model)
+        
+        audios = []
+        for path in file_paths:
+            optimized_path = self._denoise(self.audio_processor.enhance_audio(path), path, {"denoise": denoise})
+            try:
+                audios.append(decode_audio(optimized_path, sampling_rate=SAMPLE_RATE))
+            finally:
+                if optimized_path != path and os.path.exists(optimized_path):
+                    os.remove(optimized_path)
+        
+        packed, windows, offsets = pack_clips(audios)
+        segments, info = batched_model.transcribe(
+            packed,
+            clip_timestamps=windows,  # Janelas de 30 s alinhadas aos clipes
+            batch_size=self._batched_options()["batch_size"],
+            **self._decoding(params),
+            language="pt",
+            word_timestamps=False,
+            vad_filter=False
+        )
+        per_clip = unpack_segments(list(segments), offsets)
+        results = []
+        for clip_segments, audio in zip(per_clip, audios):
+            store = SegmentStore.from_segments(clip_segments)
+            if diarize:
+                store = self._diarize(audio, store)
+            results.append((store, {"language": info.language, "duration": len(audio) / SAMPLE_RATE}))
+        return results
+
+    def prefetch_batch(self, items: list) -> int:
+        """
+        Transcreve em lote os clipes ainda sem cache e grava cada resultado com
+        a mesma chave que process_task vai consultar; depois cada tarefa segue
+        sozinha (status, progresso, análise) e encontra a transcrição pronta.
+        
+        Args:
+            items: [(file_path, options)] - options já com o perfil efetivo
+        
+        Returns:
+            Número de clipes transcritos em lote
+        """
+        from app.services.cache_service import cache_service
+        
+        by_profile = {}
+        for file_path, options in items:
+            if self._stereo_candidate(file_path, options):
+                continue  # Estéreo separado por canal no próprio job
+            if os.path.exists(file_path) and not cache_service.get_transcription(file_path, options):
+                key = (options.get('profile'), bool(options.get('diarization')), options.get('denoise'))
+                by_profile.setdefault(key, []).append((file_path, options))
+        
+        done = 0
+        for (profile, diarize, denoise), group in by_profile.items():
+            if len(group) < 2:
+                continue  # Sozinho não ganha nada: o job transcreve normalmente
+            results = self.transcribe_batch([path for path, _ in group], profile, diarize, denoise)
+            for (file_path, options), (segments, info) in zip(group, results):
+                cache_service.set_transcription(
+                    file_path,
+                    self._transcription_entry(segments, info["language"], info["duration"]),
+                    options,
+                    ttl=86400  # 24 horas
+                )
+            done += len(group)
+        return done
+
+    # ------------------------------------------------------------------
+    # Duas passadas (app/services/two_pass.py)
+    # ------------------------------------------------------------------
+
+    def _use_two_pass(self, profile, params: dict) -> bool:
+        """Só compensa quando o modelo do perfil é maior que o de rascunho"""
+        return (
+            self.settings.TWO_PASS_ENABLED
+            and profile != "fast"
+            and params["model"] != self.settings.TWO_PASS_DRAFT_MODEL
+        )
+
+    def _transcribe_two_pass(self, path, cb, params: dict, cancel_check=None):
+        """
+        Rascunho com TWO_PASS_DRAFT_MODEL no arquivo inteiro; segmentos de baixa
+        confiança são retranscritos com o modelo do perfil e recolocados por timestamp.
+        
+        Returns:
+            (segments, info, report) - report: refined_fraction, spans, tempos e
+            speedup estimado contra o modelo grande no arquivo todo
+        """
+        from faster_whisper import decode_audio
+        from app.services import two_pass
+        from app.core.metrics import two_pass_refined_fraction, two_pass_speedup
+        
+        audio = decode_audio(path, sampling_rate=two_pass.SAMPLE_RATE)
+        
+        # 1ª passada: rascunho guloso (progresso 0-50%)
+        start = perf_counter()
+        draft_model, draft_batched = self._models_for(self.settings.TWO_PASS_DRAFT_MODEL)
+        segments, info = self._run_model(draft_model, draft_batched, audio, {"beam_size": 1, "best_of": 1})
+        draft, info = self._collect(segments, info, cb, 0, 50, raw=True, cancel_check=cancel_check)
+        draft_time = perf_counter() - start
+        
+        # 2ª passada: apenas trechos de baixa confiança (progresso 50-100%)
+        spans = two_pass.refine_spans(draft, info.duration, self.settings)
+        model, _ = self._models_for(params["model"])
+        decoding = self._decoding(params)
+        refined = []
+        start = perf_counter()
+        for i, (span_start, span_end) in enumerate(spans):
+            if cancel_check:
+                cancel_check()
+            chunk = audio[int(span_start * two_pass.SAMPLE_RATE):int(span_end * two_pass.SAMPLE_RATE)]
+            # Texto anterior do rascunho como contexto para o trecho isolado
+            context = " ".join(s.text.strip() for s in draft if s.end <= span_start)[-200:]
+            span_segments, _ = model.transcribe(
+                chunk,
+                **decoding,
+                language="pt",
+                vad_filter=False,
+                word_timestamps=False,
+                initial_prompt=context or None
+            )
+            refined.append([two_pass.shift_segment(s, span_start) for s in span_segments])
+            if cb:
+                cb(min(99, 50 + int(50 * (i + 1) / len(spans))))
+        refine_time = perf_counter() - start
+        if cb: cb(100)
+        
+        # Relatório: fração refinada e speedup contra o modelo grande no arquivo todo
+        # (RTF do modelo grande medido nos próprios trechos refinados)
+        duration = info.duration or 1.0
+        refined_seconds = sum(end - begin for begin, end in spans)
+        report = {
+            "spans": len(spans),
+            "refined_fraction": refined_seconds / duration,
+            "draft_seconds": draft_time,
+            "refine_seconds": refine_time,
+            "speedup": None,
+        }
+        if refined_seconds:
+            full_estimate = refine_time / refined_seconds * duration
+            report["speedup"] = full_estimate / (draft_time + refine_time)
+            two_pass_speedup.observe(report["speedup"])
+        two_pass_refined_fraction.observe(report["refined_fraction"])
+        
+        speedup = f"{report['speedup']:.2f}x" if report["speedup"] else "n/a"
+        logger.info(
+            f"✂️  Duas passadas: {len(spans)} trechos, {report['refined_fraction']:.1%} do áudio refinado | "
+            f"rascunho {draft_time:.1f}s + refino {refine_time:.1f}s | speedup estimado {speedup}"
+        )
+        return SegmentStore.from_segments(two_pass.splice(draft, spans, refined)), info, report
+
     def _format_output(self, segments):
-        """Formata a saída da transcrição como texto puro (sem timestamps ou diarização)."""
+        """Formata a saída da transcrição como texto puro (sem timestamps nem rótulos de falante: é o texto analisado)."""
+        if isinstance(segments, SegmentStore):
+            return segments.text
+        
         lines = []
         for seg in segments:
             text = seg.text.strip()
@@ -0,0 +1,105 @@
+"""
+Two-pass transcription: fast draft, then refine only the hard stretches.
+
+The draft pass runs a small model (TWO_PASS_DRAFT_MODEL) over the whole
+file and keeps Whisper's per-segment confidence (avg_logprob,
+compression_ratio, no_speech_prob). Segments below the thresholds are
+merged into padded time spans, re-transcribed with the larger model and
+spliced back in by timestamp. Clear audio never touches the large model.
+"""
+import dataclasses
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+def is_low_confidence(segment, settings) -> bool:
+    """
+    Whisper's own failure heuristics: low average log-probability or a
+    repetitive (highly compressible) text. Silence (high no_speech_prob with
+    low log-probability) is not worth refining.
+    """
+    low_logprob = segment.avg_logprob < settings.TWO_PASS_LOGPROB_THRESHOLD
+    if low_logprob and segment.no_speech_prob > settings.TWO_PASS_NO_SPEECH_THRESHOLD:
+        return False
+    return low_logprob or segment.compression_ratio > settings.TWO_PASS_COMPRESSION_THRESHOLD
+
+
+def refine_spans(segments, duration: float, settings) -> List[Tuple[float, float]]:
+    """
+    Time spans to re-transcribe: low-confidence segments padded by
+    TWO_PASS_PAD_SECONDS, with overlapping/touching spans merged.
+
+    The padding only reaches into the gaps around a segment: it stops at the
+    end of the previous kept draft segment and the start of the next one,
+    otherwise words at the span edges would be transcribed twice (once in
+    the kept draft, once in the refined span).
+
+    Args:
+        segments: Draft segments (with start, end and confidence fields)
+        duration: Audio duration in seconds
+        settings: Settings instance
+
+    Returns:
+        Sorted, disjoint [(start, end)] in seconds
+    """
+    pad = settings.TWO_PASS_PAD_SECONDS
+    low = [is_low_confidence(seg, settings) for seg in segments]
+
+    # Início do próximo segmento mantido depois de cada posição
+    next_kept, upcoming = [duration] * len(segments), duration
+    for i in range(len(segments) - 1, -1, -1):
+        next_kept[i] = upcoming
+        if not low[i]:
+            upcoming = segments[i].start
+
+    spans, previous_kept = [], 0.0
+    for i, seg in enumerate(segments):
+        if not low[i]:
+            previous_kept = max(previous_kept, seg.end)
+            continue
+        start = max(0.0, seg.start - pad, min(seg.start, previous_kept))
+        end = min(duration, seg.end + pad, max(seg.end, next_kept[i]))
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def shift_segment(segment, offset: float):
+    """Segment with timestamps moved by offset (refined spans start at 0)"""
+    start, end = segment.start + offset, segment.end + offset
+    if dataclasses.is_dataclass(segment):
+        return dataclasses.replace(segment, start=start, end=end, words=None)
+    return segment._replace(start=start, end=end)
+
+
+def splice(draft, spans: List[Tuple[float, float]], refined: List[list]) -> list:
+    """
+    Replace the draft segments whose midpoint falls inside a span by that
+    span's refined segments, keeping time order.
+
+    Args:
+        draft: Draft segments
+        spans: Spans returned by refine_spans
+        refined: Refined segments per span (already shifted to absolute time)
+
+    Returns:
+        Merged segment list
+    """
+    merged, i = [], 0
+    for seg in draft:
+        mid = (seg.start + seg.end) / 2
+        while i < len(spans) and mid >= spans[i][1]:
+            merged.extend(refined[i])
+            i += 1
+        if i < len(spans) and spans[i][0] <= mid < spans[i][1]:
+            continue  # Coberto pelo trecho refinado
+        merged.append(seg)
+    for rest in refined[i:]:
+        merged.extend(rest)
+    return merged
@@ -6,9 +6,10 @@ import psutil
 import signal
 import sys
 import os
+import time
 from rq import Worker
 from rq.job import Job
-from typing import Optional
+from typing import Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,6 +34,12 @@ class CustomWorker(Worker):
         self.max_memory_mb = max_memory_mb
         self.jobs_processed = 0
         
+        # Smooth weighted round-robin entre filas de prioridade
+        from app.core.config import settings
+        self.queue_weights = self._parse_weights(settings.PRIORITY_WEIGHTS)
+        self.max_wait_seconds = settings.PRIORITY_MAX_WAIT_SECONDS
+        self._credits: Dict[str, int] = {q.name: 0 for q in self.queues}
+        
         # Configurar shutdown gracioso
         signal.signal(signal.SIGTERM, self._handle_shutdown)
         signal.signal(signal.SIGINT, self._handle_shutdown)
@@ -62,6 +69,16 @@ class CustomWorker(Worker):
                 error_msg = f"Limite de memória excedido: {memory_mb:.2f}MB > {self.max_memory_mb}MB"
                 logger.error(f"❌ {error_msg}")
                 
+                # Com retries restantes, devolve o job à fila e recicla o worker:
+                # outro processo (com memória limpa) o executa, retomando do checkpoint
+                if job.retries_left:
+                    with self.connection.pipeline() as pipe:
+                        job.retry(queue, pipe)
+                        pipe.execute()
+                    logger.warning(f"🔁 Job {job.id} devolvido à fila ({job.retries_left} tentativas restantes); reiniciando worker")
+                    self.request_stop(None, None)
+                    return False
+                
                 job.set_status('failed')
                 job.meta['error'] = error_msg
                 job.meta['memory_mb'] = memory_mb
@@ -82,6 +99,9 @@ class CustomWorker(Worker):
             # Atualizar contador
             self.jobs_processed += 1
             
+            # Fair-share: liberar próximos jobs das filas por usuário
+            self._pump_fair_share()
+            
             # Log conclusão
             memory_after = process.memory_info().rss / 1024 / 1024
             logger.info(
@@ -108,6 +128,90 @@ class CustomWorker(Worker):
             job.save()
             return False
     
+    @staticmethod
+    def _parse_weights(spec: str) -> Dict[str, int]:
+        """'high:6,default:3,low:1' -> {'high': 6, 'default': 3, 'low': 1}"""
+        weights = {}
+        for part in spec.split(","):
+            name, _, weight = part.partition(":")
+            if name.strip():
+                weights[name.strip()] = max(1, int(weight or 1))
+        return weights
+    
+    def _head_wait_seconds(self, queue) -> float:
+        """Quanto tempo o job mais antigo da fila está esperando, fair-share incluído (0 se vazia)"""
+        job_ids = queue.get_job_ids(0, 1)
+        if not job_ids:
+            return 0.0
+        from app.core.queue import queue_wait_seconds
+        job = Job.fetch(job_ids[0], connection=self.connection)
+        return queue_wait_seconds(job) or 0.0
+    
+    def reorder_queues(self, reference_queue):
+        """
+        Ordem da próxima retirada: weighted round-robin entre as filas com
+        jobs (high > default > low), para que chamadas curtas passem na
+        frente sem que gravações longas fiquem paradas para sempre.
+        
+        Anti-starvation: uma fila cujo job mais antigo espera há mais de
+        PRIORITY_MAX_WAIT_SECONDS vai para o início da ordem.
+        """
+        try:
+            pipe = self.connection.pipeline()
+            for queue in self.queues:
+                pipe.llen(queue.key)
+            sizes = dict(zip((q.name for q in self.queues), pipe.execute()))
+            
+            pending = [q for q in self.queues if sizes[q.name]]
+            if len(pending) < 2:
+                return  # Nada a disputar: a ordem não importa
+            
+            # Job mais antigo esperando demais passa na frente
+            for queue in reversed(pending):
+                if self._head_wait_seconds(queue) > self.max_wait_seconds:
+                    logger.info(f"⏫ Fila '{queue.name}' acima de {self.max_wait_seconds}s de espera, priorizando")
+                    self._ordered_queues = [queue] + [q for q in self.queues if q is not queue]
+                    return
+            
+            # Smooth weighted round-robin (sem rajadas da mesma fila)
+            total = 0
+            for queue in pending:
+                weight = self.queue_weights.get(queue.name, 1)
+                self._credits[queue.name] += weight
+                total += weight
+            chosen = max(pending, key=lambda q: self._credits[q.name])
+            self._credits[chosen.name] -= total
+            
+            self._ordered_queues = [chosen] + [q for q in self.queues if q is not chosen]
+        except Exception as e:
+            # Ordem padrão (prioridade estrita) se Redis falhar aqui
+            logger.warning(f"⚠️  Falha ao reordenar filas: {e}")
+            self._ordered_queues = self.queues[:]
+    
+    def _pump_fair_share(self):
+        """Move jobs das filas por usuário para o RQ (app/core/fair_share.py)"""
+        try:
+            from app.core.fair_share import fair_share
+            dispatched = fair_share.pump()
+            if dispatched:
+                logger.info(f"⚖️  Fair-share: {dispatched} job(s) liberado(s) para a fila")
+        except Exception as e:
+            logger.warning(f"⚠️  Fair-share pump falhou: {e}")
+    
+    def _reap(self):
+        """Reenfileira jobs de workers mortos e reconcilia status (app/core/reaper.py)"""
+        try:
+            from app.core.reaper import job_reaper
+            job_reaper.reap()
+        except Exception as e:
+            logger.warning(f"⚠️  Reaper falhou: {e}")
+    
+    def run_maintenance_tasks(self):
+        """Manutenção periódica do RQ + reaper + pump do fair-share (jobs órfãos se uma API caiu)"""
+        super().run_maintenance_tasks()
+        self._reap()
+        self._pump_fair_share()
+    
     def work(self, *args, **kwargs):
         """Sobrescreve método work para adicionar log de inicialização"""
         logger.info(
@@ -115,53 +219,245 @@ class CustomWorker(Worker):
             f"Memória Máx: {self.max_memory_mb}MB | "
             f"Jobs Máx: {self.max_jobs}"
         )
+        self._pump_fair_share()
         return super().work(*args, **kwargs)
 
 
-def _get_redis_url() -> str:
+class MicroBatchWorker(CustomWorker):
     """
-    Obtém URL do Redis de forma segura.
-    Tenta primeiro via módulo de secrets, depois variáveis de ambiente.
+    Worker em modo micro-batch para clipes curtos.
+    
+    Ao retirar um job curto (<= MICROBATCH_MAX_SECONDS de áudio), junta até
+    MICROBATCH_MAX_JOBS jobs curtos das filas, esperando no máximo
+    MICROBATCH_MAX_WAIT_MS, e transcreve todos numa única chamada do pipeline
+    em lote (encoder cheio). As transcrições vão para o cache e cada job roda
+    em seguida normalmente: status, progresso, análise e cache continuam
+    independentes por tarefa. Jobs longos seguem o caminho padrão.
+    
+    O lote inteiro roda num único work-horse (fork), como um job comum: o pai
+    mantém a verificação de memória, os heartbeats de todos os jobs do lote e
+    mata o horse que passar do prazo (soma dos timeouts); cada job continua com
+    o próprio death penalty dentro do horse. Jobs do lote que o horse não
+    concluiu voltam para a fila (não iniciados) ou vão para o tratamento de
+    falha do RQ (retry).
     """
-    # 1. Tentar via módulo de secrets
-    try:
-        from app.core.secrets import get_redis_url
-        return get_redis_url()
-    except Exception as e:
-        logger.warning(f"Falha ao carregar URL do Redis via secrets: {e}")
-    
-    # 2. Fallback: variáveis de ambiente
-    redis_host = os.getenv("REDIS_HOST", "redis")
-    redis_port = os.getenv("REDIS_PORT", "6379")
-    redis_db = os.getenv("REDIS_DB", "0")
-    
-    # 3. Senha: priorizar arquivo de secret, depois env var
-    redis_password = ""
-    secret_path = os.getenv("REDIS_PASSWORD_FILE", "/run/secrets/redis_password")
-    
-    if os.path.exists(secret_path):
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from app.core.config import settings
+        self.batch_max_jobs = settings.MICROBATCH_MAX_JOBS
+        self.batch_max_wait = settings.MICROBATCH_MAX_WAIT_MS / 1000
+        self.batch_max_seconds = settings.MICROBATCH_MAX_SECONDS
+        self._batch = None  # [(job, queue)] do lote em execução no horse
+    
+    def _is_batchable(self, job: Job) -> bool:
+        """Transcrição de áudio curto com duração conhecida"""
+        seconds = job.meta.get("audio_seconds")
+        return (
+            job.func_name == "app.core.worker.process_transcription"
+            and seconds is not None
+            and seconds <= self.batch_max_seconds
+        )
+    
+    def _collect_companions(self):
+        """Retira jobs curtos das filas (na ordem de prioridade) até encher o lote ou o prazo"""
+        from rq.exceptions import NoSuchJobError
+        
+        deadline = time.monotonic() + self.batch_max_wait
+        companions, blocked = [], set()
+        while len(companions) < self.batch_max_jobs - 1:
+            found = None
+            for queue in self._ordered_queues:
+                if queue.name in blocked:
+                    continue
+                job_id = queue.pop_job_id()
+                if not job_id:
+                    continue
+                try:
+                    job = self.job_class.fetch(job_id, connection=self.connection, serializer=self.serializer)
+                except NoSuchJobError:
+                    continue
+                if self._is_batchable(job):
+                    found = (job, queue)
+                    break
+                # Job longo na cabeça: devolve para a frente e ignora esta fila
+                queue.push_job_id(job_id, at_front=True)
+                blocked.add(queue.name)
+            
+            if found:
+                companions.append(found)
+                continue
+            if time.monotonic() >= deadline:
+                break
+            # Fila vazia: o fair-share pode liberar mais jobs enquanto esperamos
+            self._pump_fair_share()
+            time.sleep(0.02)
+        return companions
+    
+    def _prefetch(self, batch):
+        """Decide o perfil de cada job e transcreve o lote inteiro para o cache"""
+        from app.core.services import whisper_service
+        from app.core.cancellation import job_canceller
+        from app.core.queue import queue_wait_seconds
+        from app.services.quality import quality_governor
+        
+        items = []
+        for job, _ in batch:
+            task_id, file_path, options = job.args[:3]
+            if job_canceller.is_cancelled(task_id):
+                continue  # Tarefa excluída: o job só registra o cancelamento
+            wait = queue_wait_seconds(job)
+            profile, reason = quality_governor.resolve((options or {}).get('profile'), wait)
+            # process_transcription reaproveita a decisão (mesma chave de cache)
+            job.meta["quality"] = [profile, reason]
+            job.save_meta()
+            items.append((file_path, dict(options or {}, profile=profile)))
+        
+        start = time.perf_counter()
+        done = whisper_service.prefetch_batch(items)
+        if done:
+            audio = sum(job.meta.get("audio_seconds") or 0 for job, _ in batch)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"📦 Micro-batch: {done} clipes transcritos juntos em {elapsed:.1f}s "
+                f"({audio / elapsed if elapsed else 0:.1f} s de áudio/s)"
+            )
+    
+    @staticmethod
+    def _timeout_of(job: Job) -> int:
+        from rq import Queue
+        return job.timeout if job.timeout and job.timeout > 0 else Queue.DEFAULT_TIMEOUT
+    
+    def execute_job(self, job: Job, queue) -> bool:
+        """Job curto: executa em lote com os vizinhos num único horse; demais: caminho padrão"""
+        if not self._is_batchable(job):
+            return super().execute_job(job, queue)
+        
+        batch = [(job, queue)] + self._collect_companions()
+        if len(batch) == 1:
+            return super().execute_job(job, queue)
+        
+        from rq.utils import utcnow
+        
+        logger.info(f"📦 Micro-batch com {len(batch)} jobs: {[j.id for j, _ in batch]}")
+        
+        # Retirados da fila: visíveis no StartedJobRegistry até o horse chegar neles
+        ttl = max(self._timeout_of(j) for j, _ in batch) + 60
+        for j, _ in batch[1:]:
+            j.heartbeat(utcnow(), ttl)
+        
+        # Verificação de memória + fork (CustomWorker.execute_job); o horse
+        # entra em perform_job com o lote e executa todos os jobs
+        self._batch = batch
+        try:
+            result = super().execute_job(job, queue)
+        finally:
+            self._batch = None
+        
+        self._settle_companions(batch[1:])
+        self.jobs_processed += len(batch) - 1
+        if self.jobs_processed >= self.max_jobs:
+            logger.warning(f"⚠️  Máximo de jobs atingido ({self.max_jobs}), worker será reiniciado")
+            self.request_stop(None, None)
+        return result
+    
+    def perform_job(self, job: Job, queue) -> bool:
+        """No horse do lote: transcrição conjunta para o cache, depois cada job em sequência"""
+        batch = self._batch
+        if not (self._is_horse and batch and job is batch[0][0]):
+            return super().perform_job(job, queue)
+        
+        from rq.timeouts import JobTimeoutException
         try:
-            with open(secret_path, "r") as f:
-                redis_password = f.read().strip()
+            # O lote não pode levar mais que o job mais longo levaria sozinho
+            with self.death_penalty_class(max(self._timeout_of(j) for j, _ in batch),
+                                          JobTimeoutException, job_id=job.id):
+                self._prefetch(batch)
         except Exception as e:
-            logger.warning(f"Não foi possível ler secret do Redis: {e}")
+            logger.warning(f"⚠️  Micro-batch falhou, jobs seguem individualmente: {e}")
+        
+        # Cada job segue independente (transcrição já em cache), com o próprio timeout
+        results = []
+        for j, q in batch:
+            results.append(super().perform_job(j, q))
+        return all(results)
+    
+    def maintain_heartbeats(self, job: Job):
+        """Heartbeat também dos jobs do lote que o horse ainda vai executar"""
+        super().maintain_heartbeats(job)
+        if not self._batch:
+            return
+        from rq.utils import utcnow
+        ttl = self.get_heartbeat_ttl(job)
+        with self.connection.pipeline() as pipe:
+            for j, _ in self._batch[1:]:
+                j.heartbeat(utcnow(), ttl, pipeline=pipe, xx=True)
+            pipe.execute()
     
-    if not redis_password:
-        redis_password = os.getenv("REDIS_PASSWORD", "")
+    def monitor_work_horse(self, job: Job, queue):
+        """O prazo do horse do lote é a soma dos timeouts (+ a transcrição conjunta)"""
+        if not self._batch:
+            return super().monitor_work_horse(job, queue)
+        
+        timeout = job.timeout
+        job.timeout = sum(self._timeout_of(j) for j, _ in self._batch) + self._timeout_of(job)
+        try:
+            return super().monitor_work_horse(job, queue)
+        finally:
+            job.timeout = timeout
+            # Um retry no monitor regrava o job: mantém o timeout original no Redis
+            if self.connection.hexists(job.key, "timeout"):
+                if timeout is None:
+                    self.connection.hdel(job.key, "timeout")
+                else:
+                    self.connection.hset(job.key, "timeout", timeout)
     
-    return f"redis://:{redis_password}@{redis_host}:{redis_port}/{redis_db}"
+    def _settle_companions(self, companions):
+        """Jobs do lote que o horse não concluiu (morto por OOM, sinal ou prazo)"""
+        from rq.job import JobStatus
+        
+        for j, q in companions:
+            try:
+                status = j.get_status(refresh=True)
+            except Exception as e:
+                logger.warning(f"⚠️  Status do job {j.id} indisponível: {e}")
+                continue
+            if status in (None, JobStatus.FINISHED, JobStatus.FAILED, JobStatus.CANCELED):
+                continue
+            if status == JobStatus.QUEUED:
+                # Nunca iniciado: volta para a frente da fila
+                q.push_job_id(j.id, at_front=True)
+                logger.warning(f"🔁 Job {j.id} do micro-batch devolvido à fila")
+            else:
+                self.handle_job_failure(
+                    j, queue=q, exc_string="Micro-batch work-horse terminated before this job finished"
+                )
 
 
-def main():
-    """Ponto de entrada principal para worker customizado"""
-    from redis import Redis
+def run_worker(slot: int = 0, slots: int = 1):
+    """
+    Executa um único worker customizado (também alvo dos processos do supervisor)
+    
+    Args:
+        slot: Índice deste worker no host (partição de CPU)
+        slots: Total de workers previstos no host
+    """
+    from app.core.config import settings
+    from app.core.queue import TRANSCRIPTION_QUEUES
+    from app.core.redis_client import get_redis
+    
+    # Divide os cores entre os workers antes de carregar o modelo
+    if settings.WORKER_CPU_PARTITION and settings.DEVICE == "cpu":
+        from app.core.cpu_partition import apply_partition
+        apply_partition(settings, slot, slots)
     
-    redis_url = _get_redis_url()
-    redis_conn = Redis.from_url(redis_url)
+    # Pool sem socket_timeout: o worker bloqueia em BLPOP por minutos
+    redis_conn = get_redis(db=0, blocking=True)
     
-    # Criar worker
-    worker = CustomWorker(
-        ['transcription_tasks'],
+    # Criar worker (micro-batch de clipes curtos, se habilitado)
+    worker_class = MicroBatchWorker if settings.WORKER_MICROBATCH else CustomWorker
+    worker = worker_class(
+        list(TRANSCRIPTION_QUEUES),  # high, default, low + fila legada
         connection=redis_conn,
         max_memory_mb=int(os.getenv('WORKER_MAX_MEMORY_MB', '3500')),
         max_jobs=int(os.getenv('WORKER_MAX_JOBS', '100'))
@@ -171,5 +467,30 @@ def main():
     worker.work(with_scheduler=True, burst=False)
 
 
+def main():
+    """
+    Ponto de entrada principal.
+    
+    python -m app.workers              -> um worker
+    python -m app.workers --autoscale  -> supervisor que escala workers pela fila
+                                          (ou WORKER_AUTOSCALE=true)
+    python -m app.workers --microbatch -> workers agrupam clipes curtos
+                                          (ou WORKER_MICROBATCH=true)
+    """
+    from app.core.config import settings
+    
+    if "--microbatch" in sys.argv[1:]:
+        settings.WORKER_MICROBATCH = True
+    
+    if "--autoscale" in sys.argv[1:] or settings.WORKER_AUTOSCALE:
+        from app.core.autoscaler import WorkerSupervisor
+        WorkerSupervisor(
+            run_worker,
+            worker_memory_mb=int(os.getenv('WORKER_MAX_MEMORY_MB', '3500'))
+        ).run()
+    else:
+        run_worker()
+
+
 if __name__ == '__main__':
     main()
@@ -9,6 +9,8 @@ from redis import Redis
 from rq import Worker, Queue
 from rq.job import Job
 
+from app.core.queue import TRANSCRIPTION_QUEUES
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,7 +50,7 @@ def check_worker_health(redis_conn: Redis, max_stuck_time_minutes: int = 30) ->
         stuck_threshold = datetime.now() - timedelta(minutes=max_stuck_time_minutes)
         stuck_jobs: List[Job] = []
         
-        for queue_name in ['default', 'high', 'low']:
+        for queue_name in TRANSCRIPTION_QUEUES:
             try:
                 queue = Queue(queue_name, connection=redis_conn)
                 started_jobs = queue.started_job_registry.get_job_ids()
@@ -89,7 +91,7 @@ def get_worker_stats(redis_conn: Redis) -> dict:
             "queues": {}
         }
         
-        for queue_name in ['default', 'high', 'low']:
+        for queue_name in TRANSCRIPTION_QUEUES:
             try:
                 queue = Queue(queue_name, connection=redis_conn)
                 stats["queues"][queue_name] = {
@@ -1711,7 +1711,21 @@ class MirrorMonitorApp(tk.Tk):
             except: pass
     def do_upload(self):
         fs = filedialog.askopenfilenames()
-        if fs: threading.Thread(target=lambda: [requests.post(f"{self.api_url}/api/upload", files={"file":open(f,'rb')}, headers={"Authorization":f"Bearer {self.token}"}, data={"timestamp":"true"}) for f in fs] and self.fetch_now(), daemon=True).start()
+        if fs: threading.Thread(target=self._upload_batch, args=(list(fs),), daemon=True).start()
+    def _upload_batch(self, fs, chunk=25):
+        # Vários arquivos por requisição (/api/upload/batch), em lotes para limitar memória
+        erros = []
+        for i in range(0, len(fs), chunk):
+            handles = [open(f, 'rb') for f in fs[i:i+chunk]]
+            try:
+                r = requests.post(f"{self.api_url}/api/upload/batch", files=[("files", (os.path.basename(h.name), h)) for h in handles], headers={"Authorization":f"Bearer {self.token}"}, data={"timestamp":"true"})
+                if r.status_code == 200: erros += [f"{t['filename']}: {t['error']}" for t in r.json().get("tasks", []) if t and t.get("error")]
+                else: erros.append(f"Lote {i//chunk + 1}: HTTP {r.status_code}")
+            except Exception as e: erros.append(str(e))
+            finally:
+                for h in handles: h.close()
+        self.fetch_now()
+        if erros: self.after(0, lambda: messagebox.showwarning("Envio", "\n".join(erros[:20])))
     def show_context_menu(self, e):
         i = self.tree.identify_row(e.y)
         if i:
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Autotune do Whisper para este host
+Roda o TranscriptionService sobre um conjunto de clipes de referência para
+cada combinação de modelo / compute type / cpu_threads / beam / batch,
+mede real-time factor (RTF) e WER contra os textos de referência e grava
+em HOST_PROFILE_PATH a configuração mais rápida com WER aceitável.
+O worker aplica o perfil ao carregar o modelo.
+
+Conjunto de referência (AUTOTUNE_REFERENCE_DIR ou --reference):
+    ligacao1.wav  ligacao1.txt
+    ligacao2.mp3  ligacao2.txt
+    ...
+
+Usage:
+    python scripts/autotune.py
+    python scripts/autotune.py --reference /data/ref --compute-types int8 float32 --beams 1 5
+    python scripts/autotune.py --max-wer-delta 0.01 --dry-run
+"""
+import argparse
+import copy
+import glob
+import itertools
+import os
+import re
+import sys
+import time
+import unicodedata
+from typing import Dict, List, Tuple
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.autoscaler import available_cpus
+from app.core.host_profile import save_host_profile
+
+AUDIO_EXTENSIONS = ("wav", "mp3", "m4a", "ogg", "flac", "opus", "webm")
+
+
+def normalize_text(text: str) -> List[str]:
+    """Lowercase, strip accents and punctuation, split into words"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^\w\s]", " ", text).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> Tuple[int, int]:
+    """
+    Word-level edit distance.
+
+    Returns:
+        (errors, reference word count) so corpus WER can be summed
+    """
+    ref, hyp = normalize_text(reference), normalize_text(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_reference_set(directory: str) -> List[Tuple[str, str]]:
+    """[(audio path, reference text)] for every clip that has a .txt next to it"""
+    clips = []
+    for ext in AUDIO_EXTENSIONS:
+        for audio in glob.glob(os.path.join(directory, f"*.{ext}")):
+            txt = os.path.splitext(audio)[0] + ".txt"
+            if os.path.exists(txt):
+                with open(txt, "r", encoding="utf-8") as f:
+                    clips.append((audio, f.read()))
+    return sorted(clips)
+
+
+def build_service(overrides: Dict):
+    """TranscriptionService with the candidate settings (profile disabled)"""
+    from app.services.transcription import TranscriptionService
+
+    candidate = copy.copy(settings)
+    candidate.HOST_PROFILE_ENABLED = False
+    for key, value in overrides.items():
+        setattr(candidate, key, value)
+    return TranscriptionService(candidate)
+
+
+def measure(overrides: Dict, clips: List[Tuple[str, str, float]]) -> Dict:
+    """Transcribe every clip with one configuration; returns RTF and corpus WER"""
+    service = build_service(overrides)
+    errors = words = 0
+    audio_seconds = elapsed = 0.0
+
+    for path, reference, duration in clips:
+        start = time.perf_counter()
+        segments, info = service._transcribe_audio(path, None, profile="balanced")
+        elapsed += time.perf_counter() - start
+        audio_seconds += duration or info.duration
+
+        e, n = word_error_rate(reference, service._format_output(segments))
+        errors += e
+        words += n
+
+    del service
+    return {
+        "rtf": elapsed / audio_seconds if audio_seconds else float("inf"),
+        "wer": errors / words if words else 0.0,
+    }
+
+
+def main():
+    cpus = available_cpus()
+    parser = argparse.ArgumentParser(description="Pick the fastest acceptable Whisper configuration for this host")
+    parser.add_argument("--reference", default=settings.AUTOTUNE_REFERENCE_DIR, help="Reference clip directory")
+    parser.add_argument("--models", nargs="+", default=[settings.WHISPER_MODEL])
+    parser.add_argument("--compute-types", nargs="+",
+                        default=["int8", "int8_float32", "float32"] if settings.DEVICE == "cpu"
+                        else ["int8_float16", "float16"])
+    parser.add_argument("--threads", nargs="+", type=int,
+                        default=sorted({cpus, max(1, cpus // 2)}) if settings.DEVICE == "cpu" else [0])
+    parser.add_argument("--beams", nargs="+", type=int, default=[1, 2, 5])
+    parser.add_argument("--batch-sizes", nargs="+", type=int,
+                        default=[settings.WHISPER_BATCH_SIZE] if settings.DEVICE == "cuda"
+                        else [settings.WHISPER_CPU_BATCH_SIZE],
+                        help="Only relevant when the batched pipeline is used")
+    parser.add_argument("--max-wer-delta", type=float, default=0.02,
+                        help="Accept configurations within this WER of the most accurate one")
+    parser.add_argument("--output", default=settings.HOST_PROFILE_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="Print the choice without writing the profile")
+    args = parser.parse_args()
+
+    references = load_reference_set(args.reference)
+    if not references:
+        sys.exit(f"No reference clips (<name>.<audio> + <name>.txt) in {args.reference}")
+
+    # Same preprocessing as production, done once per clip
+    from app.services.audio import AudioProcessor
+    clips = []
+    for path, text in references:
+        clips.append((AudioProcessor.enhance_audio(path), text, AudioProcessor.probe_duration(path)))
+
+    grid = list(itertools.product(args.models, args.compute_types, args.threads, args.beams, args.batch_sizes))
+    print(f"{len(clips)} reference clips | {len(grid)} configurations | device={settings.DEVICE} | cpus={cpus}")
+    print(f"{'model':<10} {'compute':<14} {'threads':>7} {'beam':>5} {'batch':>6} {'RTF':>7} {'WER':>7}")
+
+    batch_key = "WHISPER_BATCH_SIZE" if settings.DEVICE == "cuda" else "WHISPER_CPU_BATCH_SIZE"
+    results = []
+    try:
+        for model, compute_type, threads, beam, batch in grid:
+            overrides = {
+                "WHISPER_MODEL": model,
+                "COMPUTE_TYPE": compute_type,
+                "WHISPER_CPU_THREADS": threads,
+                "WHISPER_BEAM_SIZE": beam,
+                batch_key: batch,
+            }
+            try:
+                r = measure(overrides, clips)
+            except Exception as e:
+                print(f"{model:<10} {compute_type:<14} {threads:>7} {beam:>5} {batch:>6}   failed: {e}")
+                continue
+            results.append((overrides, r))
+            print(f"{model:<10} {compute_type:<14} {threads:>7} {beam:>5} {batch:>6} "
+                  f"{r['rtf']:>7.3f} {r['wer']:>7.3f}")
+    finally:
+        for path, _, _ in clips:
+            if path not in dict(references):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    if not results:
+        sys.exit("No configuration could be measured")
+
+    best_wer = min(r["wer"] for _, r in results)
+    acceptable = [(o, r) for o, r in results if r["wer"] <= best_wer + args.max_wer_delta]
+    chosen, measured = min(acceptable, key=lambda item: item[1]["rtf"])
+
+    print(f"\nChosen: {chosen} | RTF {measured['rtf']:.3f} | WER {measured['wer']:.3f} (best {best_wer:.3f})")
+    if args.dry_run:
+        return
+
+    save_host_profile(args.output, {
+        "settings": chosen,
+        "measurements": {
+            "rtf": round(measured["rtf"], 4),
+            "wer": round(measured["wer"], 4),
+            "best_wer": round(best_wer, 4),
+            "max_wer_delta": args.max_wer_delta,
+            "clips": len(clips),
+            "measured_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+    }, settings.DEVICE)
+    print(f"Profile written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
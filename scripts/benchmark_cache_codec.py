@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos codecs de cache (serializador + compressor)
+Mede throughput de encode/decode e taxa de compressão sobre payloads reais
+de transcrição e análise (lidos do banco) ou de um arquivo JSON.
+
+Usage:
+    python scripts/benchmark_cache_codec.py                  # últimas 50 tarefas do banco
+    python scripts/benchmark_cache_codec.py --limit 200
+    python scripts/benchmark_cache_codec.py --input payloads.json
+"""
+import argparse
+import gzip
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Dict, List
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache_codec import (
+    CacheCodec,
+    available_compressors,
+    available_serializers,
+)
+
+LEVELS = {
+    "zstd": [1, 3, 9],
+    "lz4": [0, 9],
+    "gzip": [1, 6],
+    "none": [0],
+}
+
+
+def load_payloads_from_db(limit: int) -> Dict[str, List[dict]]:
+    """Build cache payloads exactly as TranscriptionService stores them"""
+    from app.database import SessionLocal
+    from app import models
+
+    db = SessionLocal()
+    try:
+        tasks = (
+            db.query(models.TranscriptionTask)
+            .filter(models.TranscriptionTask.status == "completed")
+            .order_by(models.TranscriptionTask.completed_at.desc())
+            .limit(limit)
+            .all()
+        )
+        transcriptions = [
+            {"text": t.result_text or "", "info": {"language": t.language, "duration": t.duration}}
+            for t in tasks
+        ]
+        analyses = [{"summary": t.summary, "topics": t.topics} for t in tasks]
+        return {"transcription": transcriptions, "analysis": analyses}
+    finally:
+        db.close()
+
+
+def load_payloads_from_file(path: str) -> Dict[str, List[dict]]:
+    """File format: {"transcription": [...], "analysis": [...]}"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def legacy_encode(value) -> bytes:
+    return gzip.compress(pickle.dumps(value), compresslevel=6)
+
+
+def legacy_decode(data: bytes):
+    return pickle.loads(gzip.decompress(data))
+
+
+def measure(encode, decode, payloads: List[dict], repeat: int) -> dict:
+    raw_bytes = sum(len(json.dumps(p, ensure_ascii=False).encode("utf-8")) for p in payloads)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encoded = [encode(p) for p in payloads]
+    encode_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for e in encoded:
+            decode(e)
+    decode_time = (time.perf_counter() - start) / repeat
+
+    stored_bytes = sum(len(e) for e in encoded)
+    mb = raw_bytes / 1024 / 1024
+    return {
+        "encode_mb_s": mb / encode_time if encode_time else float("inf"),
+        "decode_mb_s": mb / decode_time if decode_time else float("inf"),
+        "ratio": raw_bytes / stored_bytes if stored_bytes else 0.0,
+        "stored_kb": stored_bytes / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cache codecs")
+    parser.add_argument("--input", help="JSON file with payloads instead of the database")
+    parser.add_argument("--limit", type=int, default=50, help="Tasks to load from the database")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement")
+    args = parser.parse_args()
+
+    payloads = load_payloads_from_file(args.input) if args.input else load_payloads_from_db(args.limit)
+
+    print(f"Serializers: {', '.join(s for s in available_serializers() if s != 'pickle')}")
+    print(f"Compressors: {', '.join(available_compressors())}")
+
+    for kind, items in payloads.items():
+        if not items:
+            print(f"\n{kind}: no payloads")
+            continue
+
+        print(f"\n=== {kind} ({len(items)} payloads) ===")
+        print(f"{'codec':<28} {'encode MB/s':>12} {'decode MB/s':>12} {'ratio':>7} {'stored KB':>10}")
+
+        rows = [("pickle+gzip(6) [legacy]", measure(legacy_encode, legacy_decode, items, args.repeat))]
+        for serializer in available_serializers():
+            if serializer == "pickle":
+                continue
+            for compressor in available_compressors():
+                for level in LEVELS[compressor]:
+                    codec = CacheCodec(serializer, compressor, level=level, min_compress_size=0)
+                    rows.append((codec.describe(), measure(codec.encode, codec.decode, items, args.repeat)))
+
+        for name, r in rows:
+            print(
+                f"{name:<28} {r['encode_mb_s']:>12.1f} {r['decode_mb_s']:>12.1f} "
+                f"{r['ratio']:>7.2f} {r['stored_kb']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
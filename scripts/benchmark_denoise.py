@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark da redução de ruído (spectral gating, app/services/denoise.py)
+Mede o fator de tempo real (RTF = tempo de processamento / duração do áudio)
+e o pico de memória do estágio em blocos, sobre um WAV 16 kHz mono ou sobre
+áudio sintético (tons intermitentes + ruído branco).
+
+Usage:
+    python scripts/benchmark_denoise.py                       # 10 min sintéticos
+    python scripts/benchmark_denoise.py --minutes 60
+    python scripts/benchmark_denoise.py --input call.wav      # saída de enhance_audio
+    python scripts/benchmark_denoise.py --max-rtf 0.02        # falha (exit 1) acima disso
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.denoise import SAMPLE_RATE, denoise_wav, probe_wav
+
+
+def write_synthetic(path: str, minutes: float, noise_level: float):
+    """Speech-like bursts (two tones, 2 s on / 2 s off) under white noise, written per minute"""
+    rng = np.random.default_rng(0)
+    with wave.open(path, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(SAMPLE_RATE)
+        for minute in range(int(np.ceil(minutes))):
+            seconds = min(60.0, minutes * 60 - minute * 60)
+            t = minute * 60 + np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+            tones = 0.3 * (np.sin(2 * np.pi * 300 * t) + 0.5 * np.sin(2 * np.pi * 900 * t))
+            signal = tones * (np.sin(2 * np.pi * 0.25 * t) > 0) + noise_level * rng.standard_normal(len(t))
+            writer.writeframes((np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark noise reduction")
+    parser.add_argument("--input", help="16 kHz mono 16-bit WAV instead of synthetic audio")
+    parser.add_argument("--minutes", type=float, default=10, help="Synthetic audio length")
+    parser.add_argument("--noise", type=float, default=0.03, help="Synthetic noise level (RMS)")
+    parser.add_argument("--chunk-seconds", type=float, default=10, help="DENOISE_CHUNK_SECONDS")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions (best time is reported)")
+    parser.add_argument("--max-rtf", type=float, default=0.05, help="Fail if the RTF is above this")
+    args = parser.parse_args()
+
+    settings = SimpleNamespace(
+        DENOISE_AUTO=True,
+        DENOISE_SNR_THRESHOLD_DB=20,
+        DENOISE_N_STD=1.5,
+        DENOISE_MAX_ATTENUATION_DB=12,
+        DENOISE_CHUNK_SECONDS=args.chunk_seconds,
+    )
+
+    workdir = tempfile.mkdtemp(prefix="denoise_bench_")
+    src = args.input
+    if not src:
+        src = os.path.join(workdir, "synthetic.wav")
+        write_synthetic(src, args.minutes, args.noise)
+    dst = os.path.join(workdir, "denoised.wav")
+
+    _, _, snr = probe_wav(src)
+    print(f"Input: {src}")
+    print(f"Estimated SNR: {snr:.1f} dB (auto threshold {settings.DENOISE_SNR_THRESHOLD_DB} dB)")
+    print(f"Chunk: {args.chunk_seconds:.0f} s")
+
+    best = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        report = denoise_wav(src, dst, settings, requested=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    denoise_wav(src, dst, settings, requested=True)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = report["seconds"]
+    rtf = best / seconds
+    print(f"\n{'audio (s)':>10} {'time (s)':>10} {'RTF':>10} {'x realtime':>11} {'peak MB':>9}")
+    print(f"{seconds:>10.0f} {best:>10.2f} {rtf:>10.4f} {1 / rtf:>11.0f} {peak / 1024 / 1024:>9.1f}")
+
+    if rtf > args.max_rtf:
+        print(f"\nFAIL: RTF {rtf:.4f} above {args.max_rtf}")
+        sys.exit(1)
+    print(f"\nOK: RTF below {args.max_rtf}")
+
+
+if __name__ == "__main__":
+    main()
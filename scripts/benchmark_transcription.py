@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de transcrição (throughput em audio-seconds por segundo)
+
+Subcomandos:
+    workers   N workers no mesmo host, com e sem partição de CPU
+    two-pass  rascunho + refino contra o modelo grande no arquivo inteiro
+    cpu-batch pipeline em lote na CPU por batch size, contra decodificação sequencial
+    microbatch clipes curtos em lote (entre jobs) contra um job por chamada
+
+Usage:
+    python scripts/benchmark_transcription.py workers --clips /path/clips
+    python scripts/benchmark_transcription.py workers --clips a.wav b.wav --counts 1 2 4 --affinity
+    python scripts/benchmark_transcription.py two-pass --clips /path/clips --draft-model base
+    python scripts/benchmark_transcription.py cpu-batch --clips /path/long_calls --batch-sizes 1 4 8 16
+    python scripts/benchmark_transcription.py microbatch --clips /path/snippets --jobs 1 4 8
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from typing import List
+
+# Add parent directory to path so we can import app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+AUDIO_EXTENSIONS = ("wav", "mp3", "m4a", "ogg", "flac", "opus", "webm")
+
+
+def collect_clips(paths: List[str]) -> List[str]:
+    """Expand directories into audio files"""
+    clips = []
+    for path in paths:
+        if os.path.isdir(path):
+            for ext in AUDIO_EXTENSIONS:
+                clips.extend(glob.glob(os.path.join(path, f"*.{ext}")))
+        else:
+            clips.append(path)
+    return sorted(clips)
+
+
+def load_audio(clips: List[str]):
+    """Decode once in the parent so workers measure inference only"""
+    from faster_whisper import decode_audio
+    return [decode_audio(c) for c in clips]
+
+
+# ============================================================================
+# workers: aggregate throughput for 1..N co-located workers
+# ============================================================================
+
+def _worker_run(slot, slots, partition, affinity, model, compute_type, audios, ready_queue, start_event, result_queue):
+    """One benchmark worker: load model with its thread budget, transcribe all clips"""
+    from faster_whisper import WhisperModel
+    from app.core.cpu_partition import partition_cores, usable_cores
+
+    cpu_threads = 0  # CTranslate2 default: one thread per core
+    if partition:
+        cores = partition_cores(usable_cores(), slots)[slot]
+        cpu_threads = len(cores)
+        os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+        if affinity:
+            os.sched_setaffinity(0, cores)
+
+    whisper = WhisperModel(model, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+    ready_queue.put(slot)
+    start_event.wait()
+
+    audio_seconds = 0.0
+    for audio in audios:
+        segments, info = whisper.transcribe(audio, beam_size=5, language="pt", vad_filter=False)
+        for _ in segments:  # Generator: consume to actually decode
+            pass
+        audio_seconds += info.duration
+    result_queue.put(audio_seconds)
+
+
+def run_workers(n: int, partition: bool, affinity: bool, args, audios) -> float:
+    """Run n workers concurrently; returns aggregate audio-seconds per second"""
+    ctx = multiprocessing.get_context("spawn")
+    ready_queue = ctx.Queue()
+    start_event = ctx.Event()
+    result_queue = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=_worker_run,
+            args=(i, n, partition, affinity, args.model, args.compute_type, audios,
+                  ready_queue, start_event, result_queue)
+        )
+        for i in range(n)
+    ]
+    for p in processes:
+        p.start()
+
+    # Models load before the clock starts
+    for _ in processes:
+        ready_queue.get()
+    start = time.perf_counter()
+    start_event.set()
+    total_audio = sum(result_queue.get() for _ in processes)
+    elapsed = time.perf_counter() - start
+
+    for p in processes:
+        p.join()
+    return total_audio / elapsed if elapsed else 0.0
+
+
+def cmd_workers(args):
+    clips = collect_clips(args.clips)
+    if not clips:
+        sys.exit("No clips found")
+    audios = load_audio(clips)
+    total = sum(len(a) for a in audios) / 16000
+
+    print(f"{len(clips)} clips, {total:.0f}s audio per worker | model={args.model} ({args.compute_type}) | "
+          f"cores={os.cpu_count()}")
+    print(f"{'workers':>8} {'shared (audio s/s)':>20} {'partitioned (audio s/s)':>25}")
+
+    for n in args.counts:
+        shared = run_workers(n, partition=False, affinity=False, args=args, audios=audios)
+        partitioned = run_workers(n, partition=True, affinity=args.affinity, args=args, audios=audios)
+        print(f"{n:>8} {shared:>20.2f} {partitioned:>25.2f}")
+
+
+# ============================================================================
+# two-pass: draft + refine vs the refine model on the whole file
+# ============================================================================
+
+def cmd_two_pass(args):
+    import copy
+    from app.core.config import settings
+    from app.services.quality import profile_params
+    from app.services.transcription import TranscriptionService
+
+    clips = collect_clips(args.clips)
+    if not clips:
+        sys.exit("No clips found")
+
+    candidate = copy.copy(settings)
+    candidate.TWO_PASS_DRAFT_MODEL = args.draft_model
+    service = TranscriptionService(candidate)
+    params = profile_params(args.profile, candidate)
+
+    print(f"{len(clips)} clips | draft={args.draft_model} refine={params['model']} | profile={args.profile}")
+    print(f"{'clip':<30} {'audio s':>8} {'full s':>8} {'2-pass s':>9} {'refined':>8} {'speedup':>8}")
+
+    totals = {"audio": 0.0, "full": 0.0, "two_pass": 0.0, "refined": 0.0}
+    for clip in clips:
+        candidate.TWO_PASS_ENABLED = False
+        start = time.perf_counter()
+        _, info = service._transcribe_audio(clip, None, profile=args.profile)
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, _, report = service._transcribe_two_pass(clip, None, params)
+        two_pass = time.perf_counter() - start
+
+        totals["audio"] += info.duration
+        totals["full"] += full
+        totals["two_pass"] += two_pass
+        totals["refined"] += report["refined_fraction"] * info.duration
+        print(f"{os.path.basename(clip)[:30]:<30} {info.duration:>8.1f} {full:>8.1f} {two_pass:>9.1f} "
+              f"{report['refined_fraction']:>8.1%} {full / two_pass:>7.2f}x")
+
+    print(f"{'TOTAL':<30} {totals['audio']:>8.1f} {totals['full']:>8.1f} {totals['two_pass']:>9.1f} "
+          f"{totals['refined'] / totals['audio']:>8.1%} {totals['full'] / totals['two_pass']:>7.2f}x")
+
+
+# ============================================================================
+# cpu-batch: within-file batching on CPU
+# ============================================================================
+
+def cmd_cpu_batch(args):
+    import copy
+    from app.core.config import settings
+    from app.services.transcription import TranscriptionService
+
+    clips = collect_clips(args.clips)
+    if not clips:
+        sys.exit("No clips found")
+    audios = load_audio(clips)
+    total = sum(len(a) for a in audios) / 16000
+
+    candidate = copy.copy(settings)
+    candidate.DEVICE = "cpu"
+    candidate.WHISPER_CPU_BATCHED = True
+    candidate.WHISPER_BATCHED_MIN_SECONDS = 0  # Medir o lote mesmo em clipes curtos
+    service = TranscriptionService(candidate)
+    decoding = {"beam_size": candidate.WHISPER_BEAM_SIZE}
+
+    def throughput(batched_model) -> float:
+        start = time.perf_counter()
+        for audio in audios:
+            segments, _ = service._run_model(service.model, batched_model, audio, decoding)
+            for _ in segments:  # Generator: consume to actually decode
+                pass
+        return total / (time.perf_counter() - start)
+
+    print(f"{len(clips)} clips, {total:.0f}s audio | model={candidate.WHISPER_MODEL} "
+          f"({candidate.COMPUTE_TYPE}) | cpu_threads={candidate.WHISPER_CPU_THREADS or os.cpu_count()}")
+    print(f"{'batch size':>10} {'audio s/s':>10} {'vs sequential':>14}")
+
+    sequential = throughput(None)
+    print(f"{'sequential':>10} {sequential:>10.2f} {1.0:>13.2f}x")
+    for size in args.batch_sizes:
+        candidate.WHISPER_CPU_BATCH_SIZE = size
+        batched = throughput(service.batched_model)
+        print(f"{size:>10} {batched:>10.2f} {batched / sequential:>13.2f}x")
+
+
+# ============================================================================
+# microbatch: short clips across jobs vs one job per call
+# ============================================================================
+
+def cmd_microbatch(args):
+    import copy
+    from app.core.config import settings
+    from app.services.transcription import TranscriptionService
+
+    clips = collect_clips(args.clips)
+    if not clips:
+        sys.exit("No clips found")
+
+    candidate = copy.copy(settings)
+    candidate.TWO_PASS_ENABLED = False
+    service = TranscriptionService(candidate)
+
+    # Caminho atual: um model.transcribe por job, com o mesmo pré-processamento
+    # (enhance_audio + redução de ruído automática) que transcribe_batch faz por clipe
+    start = time.perf_counter()
+    total = 0.0
+    for clip in clips:
+        optimized = service._denoise(service.audio_processor.enhance_audio(clip), clip, {"denoise": None})
+        try:
+            _, info = service._transcribe_audio(optimized, None, profile="balanced")
+        finally:
+            if optimized != clip and os.path.exists(optimized):
+                os.remove(optimized)
+        total += info.duration
+    single = total / (time.perf_counter() - start)
+
+    print(f"{len(clips)} clips, {total:.0f}s audio ({total / len(clips):.0f}s avg) | "
+          f"model={candidate.WHISPER_MODEL} ({candidate.COMPUTE_TYPE}) | device={candidate.DEVICE}")
+    print(f"{'jobs/batch':>10} {'audio s/s':>10} {'vs one-per-call':>16}")
+    print(f"{'1 (job)':>10} {single:>10.2f} {1.0:>15.2f}x")
+
+    for n in args.jobs:
+        start = time.perf_counter()
+        for i in range(0, len(clips), n):
+            service.transcribe_batch(clips[i:i + n], profile="balanced")
+        batched = total / (time.perf_counter() - start)
+        print(f"{n:>10} {batched:>10.2f} {batched / single:>15.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcription benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("workers", help="Aggregate throughput of co-located workers")
+    p.add_argument("--clips", nargs="+", required=True, help="Audio files or directories")
+    p.add_argument("--counts", nargs="+", type=int, default=[1, 2, 4, 8], help="Worker counts to test")
+    p.add_argument("--model", default=os.getenv("WHISPER_MODEL", "small"))
+    p.add_argument("--compute-type", default=os.getenv("COMPUTE_TYPE", "int8"))
+    p.add_argument("--affinity", action="store_true", help="Also pin partitioned workers to their cores")
+    p.set_defaults(func=cmd_workers)
+
+    p = sub.add_parser("two-pass", help="Draft + refine against the refine model on the whole file")
+    p.add_argument("--clips", nargs="+", required=True, help="Audio files or directories")
+    p.add_argument("--draft-model", default=os.getenv("TWO_PASS_DRAFT_MODEL", "base"))
+    p.add_argument("--profile", default="balanced", choices=["balanced", "accurate"],
+                   help="Profile whose model refines (and runs the full-file baseline)")
+    p.set_defaults(func=cmd_two_pass)
+
+    p = sub.add_parser("cpu-batch", help="CPU batched pipeline throughput per batch size")
+    p.add_argument("--clips", nargs="+", required=True, help="Audio files or directories (long calls)")
+    p.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8, 16])
+    p.set_defaults(func=cmd_cpu_batch)
+
+    p = sub.add_parser("microbatch", help="Short clips batched across jobs vs one job per call")
+    p.add_argument("--clips", nargs="+", required=True, help="Audio files or directories (short snippets)")
+    p.add_argument("--jobs", nargs="+", type=int, default=[1, 4, 8], help="Clips per batch")
+    p.set_defaults(func=cmd_microbatch)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -222,7 +222,8 @@ async function uploadFile(file) {
 
     const ts = document.getElementById('opt-timestamp');
     if (ts) formData.append('timestamp', ts.checked);
-    formData.append('diarization', true);
+    const dr = document.getElementById('opt-diarization');
+    if (dr) formData.append('diarization', dr.checked);
 
     const bar = item.querySelector('.progress-bar-fill');
     const statusEl = item.querySelector(`#status-${itemId}`);
@@ -60,7 +60,8 @@ async function uploadFile(files) {
     const useTimestamp = document.getElementById('opt-timestamp')?.checked || false;
 
     formData.append('timestamp', useTimestamp);
-    formData.append('diarization', true); // Default true for now
+    const useDiarization = document.getElementById('opt-diarization')?.checked || false;
+    formData.append('diarization', useDiarization);
 
     showToast('Iniciando upload...', 'ph-upload-simple');
 
@@ -4,6 +4,12 @@ import { authFetch } from '../utils/auth.js';
 import { formatDuration, escapeHtml } from '../utils/formatters.js';
 import { showToast } from '../utils/toast.js';
 
+// ETA do backend (ISO UTC sem fuso) -> hora local HH:MM
+function formatEta(iso) {
+    const date = new Date(iso.endsWith('Z') ? iso : iso + 'Z');
+    return date.toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' });
+}
+
 export class DashboardView {
     constructor(player) {
         this.player = player;
@@ -137,10 +143,13 @@ export class DashboardView {
 
                 if (data.status === 'processing') {
                     if (data.progress) bar.style.width = `${data.progress}%`;
-                    statusEl.textContent = `Processando: ${data.progress}%`;
+                    statusEl.textContent = `Processando: ${data.progress}%` +
+                        (data.eta_finish ? ` - término ~${formatEta(data.eta_finish)}` : '');
                     setTimeout(poll, 2000);
                 } else if (data.status === 'queued') {
-                    statusEl.textContent = 'Na fila...';
+                    statusEl.textContent = data.eta_start
+                        ? `Na fila${data.queue_position ? ` (${data.queue_position}º)` : ''} - início ~${formatEta(data.eta_start)}`
+                        : 'Na fila...';
                     setTimeout(poll, 2000);
                 } else if (data.status === 'completed') {
                     bar.style.width = '100%';
@@ -216,6 +225,27 @@ export class DashboardView {
     }
 
     // Global Helper for View Result (exposed to window)
+    async renderSegments(id) {
+        // Segmentos do SegmentStore; null para tarefas antigas (sem segmentos)
+        try {
+            const res = await authFetch(`/api/segments/${id}`);
+            if (!res.ok) return null;
+            const data = await res.json();
+            const hits = data.rule_hits || [];
+            return data.segments.map(seg => {
+                const hit = hits.find(h => h.start === seg.start);
+                const cls = hit ? ` rule-hit rule-${hit.category}` : '';
+                const title = hit ? ` title="${escapeHtml(hit.term)}"` : '';
+                const mm = String(Math.floor(seg.start / 60)).padStart(2, '0');
+                const ss = String(Math.floor(seg.start % 60)).padStart(2, '0');
+                return `<p class="transcript-line${cls}" data-time="${seg.start}"${title}>` +
+                    `[${mm}:${ss}] ${escapeHtml(seg.text)}</p>`;
+            }).join('');
+        } catch (e) {
+            return null;
+        }
+    }
+
     async viewResult(id) {
         const modal = document.getElementById('result-modal');
         const textDiv = document.getElementById('result-text');
@@ -237,18 +267,27 @@ export class DashboardView {
             const data = await res.json();
             window.currentTaskId = id;
 
-            // Text
-            const safeText = escapeHtml(data.text || '');
-            const lines = safeText.split('\n');
-            let htmlContent = '';
-            lines.forEach(line => {
-                const match = line.match(/^\[(\d{2}):(\d{2})\]/);
-                let sec = 0;
-                if (match) sec = parseInt(match[1]) * 60 + parseInt(match[2]);
-                htmlContent += `<p class="transcript-line" data-time="${sec}">${line}</p>`;
-            });
+            // Text (segmentos com timestamps quando disponíveis)
+            let htmlContent = await this.renderSegments(id);
+            if (htmlContent === null) {
+                const safeText = escapeHtml(data.text || '');
+                const lines = safeText.split('\n');
+                htmlContent = '';
+                lines.forEach(line => {
+                    const match = line.match(/^\[(\d{2}):(\d{2})\]/);
+                    let sec = 0;
+                    if (match) sec = parseInt(match[1]) * 60 + parseInt(match[2]);
+                    htmlContent += `<p class="transcript-line" data-time="${sec}">${line}</p>`;
+                });
+            }
             textDiv.innerHTML = htmlContent;
             textDiv.dataset.original = htmlContent;
+            textDiv.onclick = (e) => {
+                const line = e.target.closest('.transcript-line');
+                if (line && this.player && this.player.wavesurfer) {
+                    this.player.wavesurfer.setTime(parseFloat(line.dataset.time) || 0);
+                }
+            };
 
             summaryDiv.textContent = data.summary || 'Não disponível';
             topicsDiv.textContent = data.topics || 'Não disponível';
@@ -0,0 +1,8 @@
+"""Shared pytest setup: import the app from the repo root without a .env"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.core.config valida SECRET_KEY na importação
+os.environ.setdefault("SECRET_KEY", "test-secret-key-" + "x" * 32)
@@ -0,0 +1,107 @@
+"""Header parsers of app/services/audio_probe.py (no ffprobe involved)"""
+import io
+import struct
+import wave
+
+import pytest
+
+from app.services.audio_probe import AudioInfo, InvalidAudioError, parse_header, probe_content
+
+
+def make_wav(seconds=1.5, rate=16000, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(b"\x00\x00" * channels * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def make_flac(rate=44100, channels=2, total_samples=441000):
+    info = (rate << 44) | ((channels - 1) << 41) | (15 << 36) | total_samples
+    streaminfo = b"\x10\x00\x10\x00" + b"\x00" * 6 + info.to_bytes(8, "big") + b"\x00" * 16
+    return b"fLaC" + b"\x80" + len(streaminfo).to_bytes(3, "big") + streaminfo
+
+
+def ogg_page(granule, packet):
+    return (b"OggS" + b"\x00\x00" + struct.pack("<q", granule) + b"\x00" * 12
+            + bytes([1, len(packet)]) + packet)
+
+
+def mp3_frames(count=10):
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz, estéreo: 417 bytes por frame
+    header = b"\xff\xfb\x90\x00"
+    return (header + b"\x00" * (417 - len(header))) * count
+
+
+def test_wav_from_wave_module():
+    info = probe_content(make_wav(seconds=1.5, rate=16000, channels=2))
+    assert info == AudioInfo(pytest.approx(1.5), "pcm_s16le", 16000, 2)
+
+
+def test_wav_streaming_data_size_uses_rest_of_file():
+    content = bytearray(make_wav(seconds=2.0))
+    data = content.find(b"data")
+    content[data + 4:data + 8] = b"\xff\xff\xff\xff"
+    assert probe_content(bytes(content)).duration == pytest.approx(2.0)
+
+
+def test_wav_without_data_chunk_is_invalid():
+    content = make_wav()
+    with pytest.raises(InvalidAudioError):
+        probe_content(content[:content.find(b"data")])
+
+
+def test_flac_streaminfo():
+    info = probe_content(make_flac(rate=44100, channels=2, total_samples=441000))
+    assert info == AudioInfo(pytest.approx(10.0), "flac", 44100, 2)
+
+
+def test_flac_without_streaminfo_is_invalid():
+    with pytest.raises(InvalidAudioError):
+        probe_content(b"fLaC\x80\x00\x00")
+
+
+def test_ogg_vorbis_duration_from_last_granule():
+    identification = b"\x01vorbis" + b"\x00" * 4 + bytes([1]) + struct.pack("<I", 48000) + b"\x00" * 14
+    content = ogg_page(0, identification) + ogg_page(48000 * 3, b"\x00" * 8)
+    assert probe_content(content) == AudioInfo(pytest.approx(3.0), "vorbis", 48000, 1)
+
+
+def test_ogg_opus_subtracts_pre_skip():
+    head = b"OpusHead" + bytes([1, 2]) + struct.pack("<H", 312) + struct.pack("<I", 16000) + b"\x00" * 3
+    content = ogg_page(0, head) + ogg_page(48000 * 2 + 312, b"\x00" * 8)
+    assert probe_content(content) == AudioInfo(pytest.approx(2.0), "opus", 16000, 2)
+
+
+def test_ogg_without_known_stream_is_invalid():
+    with pytest.raises(InvalidAudioError):
+        probe_content(ogg_page(0, b"\x7fFLAC" + b"\x00" * 20))
+
+
+def test_mp3_cbr_duration():
+    content = mp3_frames(10)
+    info = probe_content(content)
+    assert info == AudioInfo(pytest.approx(len(content) * 8 / 128000), "mp3", 44100, 2)
+
+
+def test_mp3_after_id3_tag():
+    tag = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + b"\x00" * 20
+    info = probe_content(tag + mp3_frames(4))
+    assert info.codec == "mp3"
+    assert info.duration == pytest.approx(4 * 417 * 8 / 128000)
+
+
+def test_mp3_without_frames_is_invalid():
+    with pytest.raises(InvalidAudioError):
+        probe_content(b"ID3\x04\x00\x00\x00\x00\x00\x00" + b"\x00" * 100)
+
+
+def test_truncated_header_is_invalid():
+    with pytest.raises(InvalidAudioError):
+        parse_header(b"RIFF\x00\x00\x00\x00WAVEfmt \x10\x00\x00\x00", b"", 20)
+
+
+def test_unknown_container_is_left_to_ffprobe():
+    assert probe_content(b"\x00\x00\x00\x20ftypM4A " + b"\x00" * 100) is None
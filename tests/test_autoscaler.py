@@ -0,0 +1,53 @@
+"""Backlog measurement of app/core/autoscaler.py (needs fakeredis)"""
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from rq import Queue, Worker
+
+from app.core import autoscaler
+from app.core.autoscaler import WorkerSupervisor
+from app.core.fair_share import fair_share
+from app.core.queue import task_queue
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    redis = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(task_queue, "redis_conn", redis)
+    monkeypatch.setattr(fair_share, "get_stats", lambda: {"enabled": False})
+    monkeypatch.setattr(autoscaler.settings, "FAIR_SHARE_DEFAULT_COST_SECONDS", 300)
+    return WorkerSupervisor(target=None, worker_memory_mb=1000)
+
+
+def enqueue(redis, name, audio_seconds):
+    Queue(name, connection=redis).enqueue("builtins.print", meta={"audio_seconds": audio_seconds})
+
+
+def test_waiting_audio_is_the_sum_of_job_durations(supervisor):
+    enqueue(task_queue.redis_conn, "high", 60)
+    enqueue(task_queue.redis_conn, "low", 3600)
+    enqueue(task_queue.redis_conn, "default", None)  # Duração desconhecida: custo padrão
+
+    waiting_jobs, waiting_audio, running = supervisor._backlog()
+
+    assert waiting_jobs == 3
+    assert waiting_audio == 60 + 3600 + 300
+    assert running == 0
+
+
+def test_running_counts_only_this_supervisors_workers(supervisor, monkeypatch):
+    hostname = socket.gethostname()
+    supervisor.workers = [SimpleNamespace(pid=101), SimpleNamespace(pid=102)]
+    workers = [
+        SimpleNamespace(hostname=hostname, pid=101, get_current_job_id=lambda: "a"),
+        SimpleNamespace(hostname=hostname, pid=102, get_current_job_id=lambda: None),   # Ocioso
+        SimpleNamespace(hostname="outro-host", pid=101, get_current_job_id=lambda: "b"),
+        SimpleNamespace(hostname=hostname, pid=999, get_current_job_id=lambda: "c"),    # Outro supervisor
+    ]
+    monkeypatch.setattr(Worker, "all", classmethod(lambda cls, connection=None: workers))
+
+    assert supervisor._running(task_queue.redis_conn) == 1
@@ -0,0 +1,76 @@
+"""Header dispatch of app/services/cache_codec.py"""
+import gzip
+import pickle
+
+import pytest
+
+from app.services.cache_codec import (
+    COMPRESSORS,
+    SERIALIZERS,
+    CacheCodec,
+    CodecError,
+    available_compressors,
+    available_serializers,
+)
+
+VALUE = {"text": "olá mundo " * 200, "segments": [{"start": 0.0, "end": 1.5}], "n": 3}
+
+COMBINATIONS = [
+    (serializer, compressor)
+    for serializer in available_serializers()
+    for compressor in available_compressors()
+]
+
+
+@pytest.mark.parametrize("serializer,compressor", COMBINATIONS)
+def test_round_trip_every_header(serializer, compressor):
+    codec = CacheCodec(serializer, compressor, allow_pickle=True)
+    data = codec.encode(VALUE)
+
+    assert data[0] == (SERIALIZERS[serializer][0] << 4) | COMPRESSORS[compressor][0]
+    assert codec.decode(data) == VALUE
+
+
+@pytest.mark.parametrize("serializer", available_serializers())
+def test_small_payload_is_stored_uncompressed(serializer):
+    codec = CacheCodec(serializer, "gzip", allow_pickle=True)
+    data = codec.encode({"a": 1})
+
+    assert data[0] & 0x0F == COMPRESSORS["none"][0]
+    assert codec.decode(data) == {"a": 1}
+
+
+def test_reader_follows_header_not_its_own_config():
+    written = CacheCodec("json", "gzip").encode(VALUE)
+    assert CacheCodec("msgpack" if "msgpack" in available_serializers() else "json", "none").decode(written) == VALUE
+
+
+def test_pickle_entry_rejected_without_allow_pickle():
+    data = CacheCodec("pickle", "gzip", allow_pickle=True).encode(VALUE)
+
+    with pytest.raises(CodecError):
+        CacheCodec("json", "gzip", allow_pickle=False).decode(data)
+
+
+def test_legacy_gzip_pickle_rejected_without_allow_pickle():
+    legacy = gzip.compress(pickle.dumps(VALUE))
+
+    with pytest.raises(CodecError):
+        CacheCodec("json", "gzip", allow_pickle=False).decode(legacy)
+
+
+def test_legacy_gzip_pickle_read_with_allow_pickle():
+    legacy = gzip.compress(pickle.dumps(VALUE))
+
+    assert CacheCodec("json", "gzip", allow_pickle=True).decode(legacy) == VALUE
+
+
+def test_pickle_serializer_requires_allow_pickle():
+    with pytest.raises(CodecError):
+        CacheCodec("pickle", "gzip", allow_pickle=False)
+
+
+@pytest.mark.parametrize("data", [b"", b"\xf0payload", b"\x1fpayload"])
+def test_invalid_entries_raise(data):
+    with pytest.raises(CodecError):
+        CacheCodec("json", "none").decode(data)
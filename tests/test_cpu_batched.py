@@ -0,0 +1,67 @@
+"""Batched vs sequential routing of TranscriptionService._run_model (needs faster-whisper)"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faster_whisper")
+
+from app.services.transcription import TranscriptionService
+
+SETTINGS = SimpleNamespace(
+    DEVICE="cpu",
+    WHISPER_BATCH_SIZE=16,
+    WHISPER_CPU_BATCH_SIZE=4,
+    WHISPER_CPU_VAD_THRESHOLD=0.3,
+    WHISPER_CPU_VAD_MIN_SILENCE_MS=1000,
+    WHISPER_CPU_VAD_SPEECH_PAD_MS=200,
+    WHISPER_BATCHED_MIN_SECONDS=60,
+)
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append(kwargs)
+        return iter(()), None
+
+
+@pytest.fixture
+def service():
+    service = TranscriptionService.__new__(TranscriptionService)
+    service.settings = SimpleNamespace(**vars(SETTINGS))
+    return service
+
+
+def test_long_audio_uses_cpu_batch_options(service):
+    model, batched = FakeModel(), FakeModel()
+    service._run_model(model, batched, "call.wav", {"beam_size": 1}, duration=600)
+
+    assert not model.calls
+    call = batched.calls[0]
+    assert call["batch_size"] == 4
+    assert call["vad_filter"] is True
+    assert call["vad_parameters"]["threshold"] == 0.3
+
+
+def test_short_clip_is_decoded_sequentially(service):
+    model, batched = FakeModel(), FakeModel()
+    service._run_model(model, batched, "clip.wav", {"beam_size": 1}, duration=20)
+
+    assert not batched.calls
+    assert model.calls[0]["vad_filter"] is False
+
+
+def test_duration_of_array_input_is_derived(service):
+    model, batched = FakeModel(), FakeModel()
+    service._run_model(model, batched, np.zeros(16000 * 10, dtype=np.float32), {})
+
+    assert model.calls and not batched.calls
+
+
+def test_gpu_keeps_its_own_batch_size(service):
+    service.settings.DEVICE = "cuda"
+
+    assert service._batched_options()["batch_size"] == 16
@@ -0,0 +1,37 @@
+"""Core split of app/core/cpu_partition.py"""
+import os
+from types import SimpleNamespace
+
+from app.core import cpu_partition
+from app.core.cpu_partition import apply_partition, partition_cores
+
+
+def settings(threads=0):
+    return SimpleNamespace(WHISPER_CPU_THREADS=threads, WHISPER_NUM_WORKERS=1, WORKER_CPU_AFFINITY=False)
+
+
+def test_groups_are_contiguous_and_disjoint():
+    assert partition_cores(list(range(8)), 3) == [[0, 1, 2], [3, 4, 5], [6, 7]]
+    assert partition_cores([0, 1], 3) == [[0], [1], [0]]
+
+
+def test_single_worker_keeps_explicit_or_autotuned_threads(monkeypatch):
+    monkeypatch.setattr(cpu_partition, "usable_cores", lambda: list(range(8)))
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    config = settings()
+
+    apply_partition(config, 0, 1)
+
+    assert config.WHISPER_CPU_THREADS == 0  # host_profile / CTranslate2 decidem
+    assert "OMP_NUM_THREADS" not in os.environ
+
+
+def test_workers_get_their_slice(monkeypatch):
+    monkeypatch.setattr(cpu_partition, "usable_cores", lambda: list(range(8)))
+    monkeypatch.setattr("app.core.autoscaler.available_cpus", lambda: 8)
+    monkeypatch.setenv("OMP_NUM_THREADS", "")
+    config = settings()
+
+    assert apply_partition(config, 1, 2) == [4, 5, 6, 7]
+    assert config.WHISPER_CPU_THREADS == 4
+    assert os.environ["OMP_NUM_THREADS"] == "4"
@@ -0,0 +1,80 @@
+"""Speaker tagging and Redis fallback of app/services/diarization.py"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.services import diarization
+from app.services.diarization import SpeakerDiarizer
+from app.services.segment_store import SegmentStore
+
+SETTINGS = SimpleNamespace(
+    DIARIZATION_WINDOW_SECONDS=1.0,
+    DIARIZATION_BATCH_SIZE=8,
+    DIARIZATION_MAX_SPEAKERS=3,
+    DIARIZATION_MIN_SILHOUETTE=0.15,
+    DIARIZATION_CACHE_TTL=60,
+    DIARIZATION_CACHE_MAX_ENTRIES=100,
+)
+
+
+class UnreachableRedis:
+    """Commands fail the test; pipelines may be built but never executed"""
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            raise AssertionError(f"Redis chamado com o circuito aberto ({name})")
+        return command
+
+    def pipeline(self, transaction=True):
+        return UnreachablePipeline()
+
+
+class UnreachablePipeline(UnreachableRedis):
+    def __getattr__(self, name):
+        if name == "execute":
+            return super().__getattr__(name)
+        return lambda *args, **kwargs: self
+
+
+class OfflineDiarizer(SpeakerDiarizer):
+    """Circuit already open: no Redis call may go out"""
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self._breaker = CircuitBreaker("test_diarization", probe=lambda: None, cooldown_seconds=3600)
+        self._breaker.trip()
+
+    @property
+    def redis(self):
+        return UnreachableRedis()
+
+    @property
+    def breaker(self):
+        return self._breaker
+
+
+def test_open_circuit_skips_the_embedding_cache():
+    diarizer = OfflineDiarizer(SETTINGS)
+    audio = np.random.default_rng(0).standard_normal(8 * diarization.SAMPLE_RATE).astype(np.float32)
+    starts = [i * diarization.SAMPLE_RATE for i in range(6)]
+
+    embeddings = diarizer._embeddings(audio, starts)
+
+    assert embeddings.shape == (6, 2 * diarization.N_MFCC)
+    assert np.all(np.isfinite(embeddings))
+
+
+def test_speakers_go_to_the_speaker_column(monkeypatch):
+    diarizer = OfflineDiarizer(SETTINGS)
+    starts = [i * diarization.SAMPLE_RATE for i in range(6)]
+    monkeypatch.setattr(diarizer, "_windows", lambda audio: starts)
+    monkeypatch.setattr(diarization, "cluster", lambda *args: np.array([0, 0, 0, 1, 1, 1]))
+
+    store = SegmentStore()
+    store.append(0.0, 2.9, "Bom dia")
+    store.append(3.0, 6.0, "Quero cancelar")
+    labelled = diarizer.diarize(np.zeros(7 * diarization.SAMPLE_RATE, dtype=np.float32), store)
+
+    assert labelled.text == store.text
+    assert [seg.speaker for seg in labelled] == ["Falante 1", "Falante 2"]
@@ -0,0 +1,115 @@
+"""Queue snapshot caching of app/services/eta.py (needs fakeredis)"""
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from rq import Queue
+
+from app.core.config import settings
+from app.core.queue import TRANSCRIPTION_QUEUES
+from app.services import eta as eta_module
+from app.services.eta import EtaEstimator
+
+
+@pytest.fixture
+def estimator(monkeypatch):
+    redis = fakeredis.FakeStrictRedis()
+    queues = {name: Queue(name, connection=redis) for name in TRANSCRIPTION_QUEUES}
+    estimator = EtaEstimator(settings, queue=SimpleNamespace(redis_conn=redis, queues=queues, queue=queues["default"]))
+    # Sem banco nos testes: só o RTF padrão
+    monkeypatch.setattr(estimator, "_history_rtf", lambda profile: None)
+
+    for i in range(5):
+        queues["default"].enqueue("app.core.worker.process_transcription", args=(f"t{i}", "f", {}),
+                                  job_id=f"t{i}", meta={"audio_seconds": 100})
+    return estimator
+
+
+def expected(jobs_ahead):
+    per_job = 100 * settings.ETA_DEFAULT_RTF + settings.ETA_OVERHEAD_SECONDS
+    return jobs_ahead * per_job
+
+
+def test_wait_counts_jobs_ahead(estimator):
+    position, wait = estimator._queued_wait("t3", datetime.utcnow())
+
+    assert position == 4
+    assert wait == pytest.approx(expected(3))
+
+
+def test_polls_reuse_the_snapshot(estimator, monkeypatch):
+    fetches = []
+    fetch_many = eta_module.Job.fetch_many
+    monkeypatch.setattr(eta_module.Job, "fetch_many",
+                        staticmethod(lambda ids, connection: fetches.append(len(ids)) or fetch_many(ids, connection=connection)))
+
+    for task_id in ("t1", "t2", "t4", "t1"):
+        estimator._queued_wait(task_id, datetime.utcnow())
+
+    # Uma leitura por fila + registros de jobs em execução, só na primeira chamada
+    assert len(fetches) == 2 * len(TRANSCRIPTION_QUEUES)
+
+
+def test_new_task_refreshes_stale_snapshot(estimator, monkeypatch):
+    estimator._queued_wait("t0", datetime.utcnow())
+    estimator.task_queue.queues["high"].enqueue(
+        "app.core.worker.process_transcription", args=("new", "f", {}), job_id="new", meta={"audio_seconds": 10}
+    )
+    estimator._snapshot_at -= eta_module.SNAPSHOT_MIN_AGE_SECONDS
+
+    position, _ = estimator._queued_wait("new", datetime.utcnow())
+    assert position == 1
+
+
+class BrokenSession:
+    def query(self, *args):
+        raise RuntimeError("db down")
+
+    def close(self):
+        pass
+
+
+def test_failed_history_lookup_is_not_cached(monkeypatch):
+    database = pytest.importorskip("app.database")
+    estimator = EtaEstimator(settings, queue=SimpleNamespace(redis_conn=None, queues={}, queue=None))
+    monkeypatch.setattr(database, "SessionLocal", BrokenSession)
+
+    assert estimator._history_rtf("balanced") is None
+    assert "balanced" not in estimator._history
+
+
+def park(redis, user_id, *entries):
+    from app.core.fair_share import FairShareScheduler
+    scheduler = FairShareScheduler(SimpleNamespace(redis_conn=redis, queue=object()))
+    scheduler._park(user_id, [
+        {"task_id": task_id, "file_path": "f", "options": {}, "audio_seconds": seconds, "parked_at": 0}
+        for task_id, seconds in entries
+    ])
+
+
+def test_parked_task_waits_for_its_users_earlier_files_and_other_users(estimator, monkeypatch):
+    monkeypatch.setattr(estimator.settings, "FAIR_SHARE_ENABLED", True)
+    monkeypatch.setattr(estimator.settings, "FAIR_SHARE_QUANTUM_SECONDS", 200)
+    redis = estimator.redis
+    park(redis, "bulk", ("b0", 100), ("b1", 100), ("b2", 100))
+    park(redis, "other", *[(f"o{i}", 100) for i in range(10)])
+
+    position, wait = estimator._queued_wait("b2", datetime.utcnow())
+
+    # 5 no RQ + b0, b1 + dois turnos do bulk (300 s) = 400 s do outro usuário (4 jobs)
+    assert position == 5 + 2 + 4 + 1
+    assert wait == pytest.approx(expected(5 + 2 + 4))
+
+
+def test_parked_task_keeps_the_snapshot(estimator, monkeypatch):
+    monkeypatch.setattr(estimator.settings, "FAIR_SHARE_ENABLED", True)
+    park(estimator.redis, "bulk", ("b0", 100))
+    estimator._queued_wait("b0", datetime.utcnow())
+    taken_at = estimator._snapshot_at
+    estimator._snapshot_at -= eta_module.SNAPSHOT_MIN_AGE_SECONDS
+
+    estimator._queued_wait("b0", datetime.utcnow())
+    assert estimator._snapshot_at == taken_at - eta_module.SNAPSHOT_MIN_AGE_SECONDS
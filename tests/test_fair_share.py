@@ -0,0 +1,156 @@
+"""Deficit round-robin accounting of app/core/fair_share.py (needs fakeredis)"""
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.core import fair_share as fair_share_module
+from app.core.fair_share import DEFICIT_KEY, FairShareScheduler
+
+
+class FakeQueue:
+    """Stands in for TaskQueue: enqueue_job pushes the id onto an RQ list"""
+
+    def __init__(self, redis):
+        self.redis_conn = redis
+        self.queue = object()
+        self.enqueued = []
+        self.queued_at = {}
+        self.fail = False
+
+    def enqueue_job(self, task_id, file_path, options, duration, queued_at=None):
+        if self.fail:
+            raise RuntimeError("enqueue failed")
+        self.enqueued.append(task_id)
+        self.queued_at[task_id] = queued_at
+        self.redis_conn.rpush("rq:queue:default", task_id)
+
+    def consume(self):
+        """Workers pick up everything that is ready"""
+        self.redis_conn.delete("rq:queue:default")
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(fair_share_module.settings, "WORKER_MICROBATCH", False)
+    monkeypatch.setattr(fair_share_module.settings, "PRIORITY_SHORT_MAX_SECONDS", 300)
+    monkeypatch.setattr(fair_share_module.settings, "PRIORITY_LONG_MIN_SECONDS", 1800)
+    queue = FakeQueue(fakeredis.FakeStrictRedis())
+    scheduler = FairShareScheduler(queue)
+    scheduler.quantum = 600
+    scheduler.ready_depth = 1
+    scheduler.max_wait_seconds = 1800
+    return scheduler
+
+
+def park(scheduler, user_id, *durations, parked_at=None, first=0):
+    scheduler._park(user_id, [
+        {"task_id": f"{user_id}-{i}", "file_path": "f", "options": {}, "audio_seconds": d,
+         "parked_at": parked_at or time.time()}
+        for i, d in enumerate(durations, first)
+    ])
+
+
+def parked(scheduler, user_id):
+    return sum(scheduler.redis.llen(key) for key in scheduler.user_keys(user_id))
+
+
+def drain(scheduler):
+    order = []
+    while True:
+        before = len(scheduler.task_queue.enqueued)
+        scheduler._pump_locked()
+        new = scheduler.task_queue.enqueued[before:]
+        if not new:
+            return order
+        order.extend(new)
+        scheduler.task_queue.consume()
+
+
+def credit(scheduler, user_id):
+    return float(scheduler.redis.hget(DEFICIT_KEY, user_id) or 0)
+
+
+def test_turns_are_weighted_by_audio_seconds(scheduler):
+    park(scheduler, "bulk", 300, 300, 300, 300, 300, 300)
+    park(scheduler, "interactive", 60, 60)
+
+    # Um quantum (600 s) por vez: dois arquivos de 300 s do bulk, depois o interativo
+    assert drain(scheduler) == [
+        "bulk-0", "bulk-1", "interactive-0", "interactive-1",
+        "bulk-2", "bulk-3", "bulk-4", "bulk-5",
+    ]
+
+
+def test_deficit_is_charged_per_dispatch(scheduler):
+    park(scheduler, "a", 250, 250, 250)
+
+    scheduler._pump_locked()
+    assert scheduler.task_queue.enqueued == ["a-0"]
+    assert credit(scheduler, "a") == 350
+
+    scheduler.task_queue.consume()
+    scheduler._pump_locked()
+    assert credit(scheduler, "a") == 100
+
+
+def test_unused_credit_is_forfeited_when_user_empties(scheduler):
+    park(scheduler, "a", 100)
+
+    drain(scheduler)
+    assert not scheduler.redis.hexists(DEFICIT_KEY, "a")
+
+
+def test_failed_enqueue_keeps_job_parked_and_credit(scheduler):
+    park(scheduler, "a", 100)
+    scheduler.task_queue.fail = True
+
+    with pytest.raises(RuntimeError):
+        scheduler._pump_locked()
+    assert parked(scheduler, "a") == 1
+    assert credit(scheduler, "a") == 600
+
+    scheduler.task_queue.fail = False
+    assert scheduler._pump_locked() == 1
+    assert scheduler.task_queue.enqueued == ["a-0"]
+
+
+def test_job_already_in_rq_is_not_enqueued_twice(scheduler):
+    park(scheduler, "a", 100)
+    scheduler.redis.hset("rq:job:a-0", "status", "queued")
+
+    assert scheduler._pump_locked() == 1
+    assert scheduler.task_queue.enqueued == []
+    assert parked(scheduler, "a") == 0
+
+
+def test_target_depth_follows_live_workers(scheduler, monkeypatch):
+    monkeypatch.setattr(fair_share_module.Worker, "count", classmethod(lambda cls, connection=None: 4))
+    park(scheduler, "a", *[60] * 10)
+
+    assert scheduler._pump_locked() == 4
+
+
+def test_short_file_leaves_before_the_same_users_long_files(scheduler):
+    park(scheduler, "bulk", 3600, 3600, 600)
+    park(scheduler, "bulk", 60, first=3)
+    scheduler.quantum = 10000
+
+    # high (60 s), default (600 s), depois low (3600 s) em ordem de chegada
+    assert drain(scheduler) == ["bulk-3", "bulk-2", "bulk-0", "bulk-1"]
+
+
+def test_overdue_long_file_is_not_starved(scheduler):
+    park(scheduler, "bulk", 3600, parked_at=time.time() - 7200)
+    park(scheduler, "bulk", 60, first=1)
+    scheduler.quantum = 10000
+
+    assert drain(scheduler) == ["bulk-0", "bulk-1"]
+
+
+def test_park_time_is_handed_to_rq(scheduler):
+    park(scheduler, "a", 100, parked_at=1000.0)
+
+    scheduler._pump_locked()
+    assert scheduler.task_queue.queued_at == {"a-0": 1000.0}
@@ -0,0 +1,74 @@
+"""Byte bound, LRU order and TTL of app/services/local_cache.py"""
+from app.services import local_cache
+from app.services.local_cache import LocalCache, estimate_size
+
+VALUE = "x" * 1000
+SIZE = estimate_size(VALUE)
+
+
+def test_total_bytes_never_exceed_bound():
+    cache = LocalCache(max_bytes=SIZE * 3)
+    for i in range(10):
+        cache.set(f"k{i}", VALUE)
+        assert cache.get_stats()["bytes"] <= cache.max_bytes
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 7
+    assert [cache.get(f"k{i}") for i in range(7, 10)] == [VALUE] * 3
+
+
+def test_least_recently_used_is_evicted_first():
+    cache = LocalCache(max_bytes=SIZE * 2)
+    cache.set("a", VALUE)
+    cache.set("b", VALUE)
+    cache.get("a")
+    cache.set("c", VALUE)
+
+    assert cache.get("a") == VALUE
+    assert cache.get("b") is None
+    assert cache.get("c") == VALUE
+
+
+def test_replacing_a_key_does_not_double_count():
+    cache = LocalCache(max_bytes=SIZE * 2)
+    cache.set("a", VALUE)
+    cache.set("a", VALUE)
+
+    assert cache.get_stats()["bytes"] == SIZE
+
+
+def test_value_larger_than_cache_is_not_kept():
+    cache = LocalCache(max_bytes=SIZE - 1)
+    cache.set("a", VALUE)
+
+    assert cache.get("a") is None
+    assert cache.get_stats()["bytes"] == 0
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(local_cache.time, "monotonic", lambda: now[0])
+    cache = LocalCache(max_bytes=SIZE * 2, default_ttl=10)
+    cache.set("a", VALUE)
+    now[0] += 11
+
+    assert cache.get("a") is None
+    stats = cache.get_stats()
+    assert (stats["entries"], stats["bytes"], stats["misses"]) == (0, 0, 1)
+
+
+def test_clear_by_prefix():
+    cache = LocalCache(max_bytes=SIZE * 4)
+    for key in ("transcription:1", "transcription:2", "analysis:1"):
+        cache.set(key, VALUE)
+
+    assert cache.clear("transcription:") == 2
+    assert cache.get_stats()["bytes"] == SIZE
+
+
+def test_zero_bytes_disables_cache():
+    cache = LocalCache(max_bytes=0)
+    cache.set("a", VALUE)
+
+    assert cache.get("a") is None
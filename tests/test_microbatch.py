@@ -0,0 +1,58 @@
+"""Packing of short clips on 30 s windows (app/services/microbatch.py)"""
+from collections import namedtuple
+
+import numpy as np
+
+from app.services.microbatch import SAMPLE_RATE, WINDOW, pack_clips, unpack_segments
+
+Segment = namedtuple("Segment", "start end text")
+
+
+def clip(seconds, value):
+    return np.full(int(seconds * SAMPLE_RATE), value, dtype=np.float32)
+
+
+def test_clips_start_on_window_boundaries():
+    packed, windows, offsets = pack_clips([clip(10, 0.1), clip(45, 0.2), clip(30, 0.3)])
+
+    assert offsets == [0.0, 30.0, 90.0]
+    assert len(packed) == 4 * WINDOW
+    assert [w["start"] for w in windows] == [0, WINDOW, 2 * WINDOW, 3 * WINDOW]
+    assert all(w["end"] - w["start"] == WINDOW for w in windows)
+
+
+def test_padding_is_silence_and_clip_samples_are_kept():
+    packed, _, offsets = pack_clips([clip(10, 0.1), clip(5, 0.2)])
+
+    first = packed[:WINDOW]
+    assert np.all(first[:10 * SAMPLE_RATE] == np.float32(0.1))
+    assert np.all(first[10 * SAMPLE_RATE:] == 0)
+    second = packed[int(offsets[1] * SAMPLE_RATE):]
+    assert np.all(second[:5 * SAMPLE_RATE] == np.float32(0.2))
+
+
+def test_empty_clip_still_takes_one_window():
+    packed, windows, offsets = pack_clips([np.zeros(0, dtype=np.float32), clip(1, 0.5)])
+
+    assert offsets == [0.0, 30.0]
+    assert len(windows) == 2
+
+
+def test_unpack_returns_clip_relative_segments():
+    offsets = [0.0, 30.0, 90.0]
+    segments = [
+        Segment(0.5, 4.0, "a"), Segment(31.0, 40.0, "b1"),
+        Segment(62.0, 70.0, "b2"), Segment(90.0, 95.5, "c"),
+    ]
+
+    per_clip = unpack_segments(segments, offsets)
+
+    assert [[s.text for s in clip_segments] for clip_segments in per_clip] == [["a"], ["b1", "b2"], ["c"]]
+    assert (per_clip[1][1].start, per_clip[1][1].end) == (32.0, 40.0)
+    assert (per_clip[2][0].start, per_clip[2][0].end) == (0.0, 5.5)
+
+
+def test_clip_without_segments_gets_empty_list():
+    per_clip = unpack_segments([Segment(31.0, 33.0, "b")], [0.0, 30.0, 60.0])
+
+    assert [len(c) for c in per_clip] == [0, 1, 0]
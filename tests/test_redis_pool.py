@@ -0,0 +1,45 @@
+"""Metric labels of the shared pools in app/core/redis_client.py"""
+from prometheus_client import REGISTRY
+
+from app.core import redis_client
+
+URL = "redis://:secret@redis-test:6390/0"
+
+
+def _in_use(labels):
+    return REGISTRY.get_sample_value("redis_pool_connections_in_use", labels)
+
+
+def _labels(pool):
+    return dict(pool._labels)
+
+
+def test_pools_of_same_db_have_distinct_labels():
+    raw = redis_client.get_connection_pool(db=5, url=URL)
+    decoded = redis_client.get_connection_pool(db=5, decode_responses=True, url=URL)
+    blocking = redis_client.get_connection_pool(db=5, blocking=True, url=URL)
+
+    labels = [_labels(raw), _labels(decoded), _labels(blocking)]
+    assert len({tuple(sorted(l.items())) for l in labels}) == 3
+    assert "secret" not in str(labels)
+
+
+def test_reset_only_zeroes_its_own_gauge():
+    raw = redis_client.get_connection_pool(db=6, url=URL)
+    decoded = redis_client.get_connection_pool(db=6, decode_responses=True, url=URL)
+
+    from app.core.metrics import redis_pool_in_use
+    redis_pool_in_use.labels(**raw._labels).set(3)
+    redis_pool_in_use.labels(**decoded._labels).set(2)
+    raw.reset()
+
+    assert _in_use(_labels(raw)) == 0
+    assert _in_use(_labels(decoded)) == 2
+
+
+def test_explicit_url_is_its_own_pool_label():
+    default = redis_client._pool_label(False)
+    explicit = redis_client._pool_label(False, {"host": "other", "port": 6380})
+
+    assert default == "bytes"
+    assert explicit == "bytes@other:6380"
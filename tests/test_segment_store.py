@@ -0,0 +1,89 @@
+"""Round trip and lookups of app/services/segment_store.py"""
+import pytest
+
+from app.services.segment_store import SegmentStore
+
+
+def make_store():
+    store = SegmentStore()
+    store.append(0.0, 2.5, " Olá, bom dia. ", 0.9)
+    store.append(2.5, 3.0, "   ")  # Vazio: ignorado
+    store.append(3.0, 7.25, "Quero cancelar o plano", 0.75)
+    store.append(65.5, 70.0, "Ação concluída ✓", 0.5)
+    return store
+
+
+def test_round_trip_keeps_every_column():
+    store = make_store()
+    loaded = SegmentStore.from_bytes(store.to_bytes())
+
+    assert len(loaded) == 3
+    assert loaded.text == store.text == "Olá, bom dia.\nQuero cancelar o plano\nAção concluída ✓"
+    assert [seg.text for seg in loaded] == [seg.text for seg in store]
+    assert list(loaded.starts) == list(store.starts)
+    assert list(loaded.ends) == list(store.ends)
+    assert list(loaded.offsets) == list(store.offsets)
+    assert list(loaded.confidence) == pytest.approx(list(store.confidence))
+
+
+def test_empty_store_round_trip():
+    loaded = SegmentStore.from_bytes(SegmentStore().to_bytes())
+
+    assert len(loaded) == 0
+    assert loaded.text == ""
+
+
+def test_invalid_blob_is_rejected():
+    blob = bytearray(make_store().to_bytes())
+    blob[:4] = b"NOPE"
+
+    with pytest.raises(ValueError):
+        SegmentStore.from_bytes(bytes(blob))
+
+
+def test_locate_maps_text_positions_to_segments():
+    store = SegmentStore.from_bytes(make_store().to_bytes())
+
+    hits = store.locate("CANCELAR")
+    assert [(hit.start, hit.end) for hit in hits] == [(3.0, 7.25)]
+    assert store.locate("inexistente") == []
+
+
+def test_exports_use_segment_timestamps():
+    store = make_store()
+
+    assert "00:01:05,500 --> 00:01:10,000\nAção concluída ✓" in store.to_srt()
+    assert store.to_vtt().startswith("WEBVTT\n")
+    assert store.to_timestamped_text().splitlines()[2] == "[01:05] Ação concluída ✓"
+
+
+def test_speakers_stay_out_of_text():
+    store = SegmentStore()
+    store.append(0.0, 1.0, "Bom dia", speaker="Atendente")
+    store.append(1.0, 2.0, "Quero cancelar", speaker="Cliente")
+    store.append(2.0, 3.0, "Certo", speaker="Atendente")
+    loaded = SegmentStore.from_bytes(store.to_bytes())
+
+    assert loaded.text == "Bom dia\nQuero cancelar\nCerto"
+    assert loaded.labels == ["Atendente", "Cliente"]
+    assert [seg.speaker for seg in loaded] == ["Atendente", "Cliente", "Atendente"]
+    assert loaded.locate("cliente") == []
+    assert loaded.labelled_text.splitlines()[1] == "[Cliente] Quero cancelar"
+    assert loaded.to_timestamped_text().splitlines()[0] == "[00:00] [Atendente] Bom dia"
+    assert loaded.to_dicts()[1]["speaker"] == "Cliente"
+
+
+def test_version_1_blob_is_still_readable():
+    import struct
+    import zlib
+    from array import array
+
+    columns = b"".join(array(code, values).tobytes() for code, values in (
+        ("f", [0.0, 2.0]), ("f", [2.0, 4.0]), ("I", [0, 4]), ("f", [1.0, 0.5]),
+    ))
+    blob = struct.pack("<4sBI", b"SEGS", 1, 2) + zlib.compress(columns + "Olá\nTudo bem".encode("utf-8"))
+    loaded = SegmentStore.from_bytes(blob)
+
+    assert [seg.text for seg in loaded] == ["Olá", "Tudo bem"]
+    assert [seg.speaker for seg in loaded] == [None, None]
+    assert loaded.labels == []
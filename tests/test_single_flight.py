@@ -0,0 +1,54 @@
+"""Waiting side of app/services/single_flight.py (needs fakeredis)"""
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from app.services.single_flight import LEASE_KEY, SingleFlight
+
+
+class Cancelled(Exception):
+    pass
+
+
+@pytest.fixture
+def redis():
+    client = fakeredis.FakeStrictRedis()
+    # Outro worker detém a lease e nunca termina
+    client.set(LEASE_KEY.format(key="k"), "other", px=60000)
+    return client
+
+
+def test_wait_aborts_when_cancelled(redis):
+    flight = SingleFlight(lambda: redis, max_wait=3600)
+    calls = []
+
+    def cancel_check():
+        calls.append(1)
+        if len(calls) >= 2:
+            raise Cancelled()
+
+    start = time.monotonic()
+    with pytest.raises(Cancelled):
+        flight.run("k", compute=lambda: "computed", lookup=lambda: None, cancel_check=cancel_check)
+    assert time.monotonic() - start < 5
+
+
+def test_wait_is_capped_by_job_timeout(redis):
+    flight = SingleFlight(lambda: redis, max_wait=3600)
+
+    start = time.monotonic()
+    result = flight.run("k", compute=lambda: "computed", lookup=lambda: None, timeout=0.3)
+
+    assert result == "computed"
+    assert time.monotonic() - start < 3
+
+
+def test_result_of_lease_owner_is_reused(redis):
+    flight = SingleFlight(lambda: redis, max_wait=3600)
+    redis.delete(LEASE_KEY.format(key="k"))
+    redis.set(LEASE_KEY.format(key="k"), "other", px=200)
+
+    results = iter([None, "theirs"])
+    assert flight.run("k", compute=lambda: "computed", lookup=lambda: next(results)) == "theirs"
@@ -0,0 +1,48 @@
+"""Two-party detection and merge of app/services/stereo.py"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services import stereo
+
+SETTINGS = SimpleNamespace(
+    STEREO_SPLIT_MAX_CORRELATION=0.8,
+    STEREO_SPLIT_MIN_LEVEL_RATIO=0.05,
+    STEREO_SPLIT_LABELS="Atendente,Cliente",
+)
+
+
+def noise(seed, seconds=5, level=0.1):
+    return (level * np.random.default_rng(seed).standard_normal(seconds * stereo.SAMPLE_RATE)).astype(np.float32)
+
+
+def test_independent_channels_are_two_party():
+    assert stereo.is_two_party(noise(1), noise(2), SETTINGS)
+
+
+def test_duplicated_mono_is_not_split():
+    left = noise(1)
+    assert not stereo.is_two_party(left, left.copy(), SETTINGS)
+    assert not stereo.is_two_party(left, -0.5 * left, SETTINGS)
+
+
+def test_silent_or_lopsided_channel_is_not_split():
+    assert not stereo.is_two_party(noise(1), np.zeros_like(noise(2)), SETTINGS)
+    assert not stereo.is_two_party(noise(1), noise(2, level=0.002), SETTINGS)
+    assert not stereo.is_two_party(np.array([], dtype=np.float32), noise(2), SETTINGS)
+
+
+def test_speaker_labels_fill_missing_names():
+    assert stereo.speaker_labels(SETTINGS) == ["Atendente", "Cliente"]
+    assert stereo.speaker_labels(SimpleNamespace(STEREO_SPLIT_LABELS="Agente")) == ["Agente", "Canal 2"]
+
+
+def test_merge_orders_by_time_and_keeps_labels_out_of_text():
+    seg = lambda start, end, text: SimpleNamespace(start=start, end=end, text=text, avg_logprob=0.0)
+    store = stereo.merge(
+        [[seg(0.0, 2.0, " Bom dia"), seg(5.0, 6.0, "Certo")], [seg(2.5, 4.0, "Quero cancelar"), seg(7.0, 8.0, " ")]],
+        ["Atendente", "Cliente"],
+    )
+
+    assert store.text == "Bom dia\nQuero cancelar\nCerto"
+    assert [seg.speaker for seg in store] == ["Atendente", "Cliente", "Atendente"]
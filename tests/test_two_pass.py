@@ -0,0 +1,79 @@
+"""Span selection and splicing of app/services/two_pass.py"""
+from collections import namedtuple
+from types import SimpleNamespace
+
+from app.services.two_pass import refine_spans, shift_segment, splice
+
+Segment = namedtuple("Segment", "start end text avg_logprob compression_ratio no_speech_prob")
+
+SETTINGS = SimpleNamespace(
+    TWO_PASS_LOGPROB_THRESHOLD=-0.6,
+    TWO_PASS_COMPRESSION_THRESHOLD=2.4,
+    TWO_PASS_NO_SPEECH_THRESHOLD=0.6,
+    TWO_PASS_PAD_SECONDS=0.5,
+)
+
+
+def seg(start, end, text="ok", logprob=-0.2, ratio=1.5, no_speech=0.0):
+    return Segment(start, end, text, logprob, ratio, no_speech)
+
+
+def texts(segments):
+    return [s.text for s in segments]
+
+
+def test_spans_cover_only_low_confidence_segments():
+    draft = [seg(0, 2), seg(2, 4, logprob=-1.0), seg(4, 6), seg(6, 8, ratio=3.0)]
+
+    # Sem folga entre os segmentos: o padding não invade os segmentos mantidos
+    assert refine_spans(draft, 8.0, SETTINGS) == [(2.0, 4.0), (6.0, 8.0)]
+
+
+def test_padding_stops_at_kept_neighbours():
+    draft = [seg(0, 2, "a"), seg(2.2, 4, logprob=-1.0), seg(4.1, 6, "c"), seg(7, 8, logprob=-1.0)]
+
+    assert refine_spans(draft, 9.0, SETTINGS) == [(2.0, 4.1), (6.5, 8.5)]
+
+
+def test_kept_neighbours_are_not_repeated_after_splice():
+    draft = [seg(0, 2, "a"), seg(2.2, 4, "bad", logprob=-1.0), seg(4.1, 6, "c")]
+    spans = refine_spans(draft, 6.0, SETTINGS)
+    refined = [[seg(2.0, 4.1, "B")]]
+
+    assert texts(splice(draft, spans, refined)) == ["a", "B", "c"]
+
+
+def test_adjacent_spans_are_merged_and_silence_skipped():
+    draft = [
+        seg(0, 2, logprob=-1.0), seg(2.5, 4, logprob=-1.0),
+        seg(10, 12, logprob=-1.0, no_speech=0.9),
+    ]
+
+    assert refine_spans(draft, 12.0, SETTINGS) == [(0.0, 4.5)]
+
+
+def test_splice_replaces_covered_segments_in_order():
+    draft = [seg(0, 2, "a"), seg(2, 4, "bad"), seg(4, 6, "c"), seg(6, 8, "bad2")]
+    spans = [(1.5, 4.5), (5.5, 8.0)]
+    refined = [[seg(1.6, 4.4, "B")], [seg(5.6, 7.0, "D1"), seg(7.0, 8.0, "D2")]]
+
+    assert texts(splice(draft, spans, refined)) == ["a", "B", "c", "D1", "D2"]
+
+
+def test_splice_without_spans_returns_draft():
+    draft = [seg(0, 2, "a"), seg(2, 4, "b")]
+
+    assert texts(splice(draft, [], [])) == ["a", "b"]
+
+
+def test_splice_keeps_refined_span_without_draft_midpoint():
+    draft = [seg(0, 2, "a"), seg(5, 7, "c")]
+    spans = [(2.0, 4.0)]
+
+    assert texts(splice(draft, spans, [[seg(2.1, 3.9, "X")]])) == ["a", "X", "c"]
+
+
+def test_shift_segment_moves_timestamps():
+    shifted = shift_segment(seg(1.0, 2.5, "x"), 10.0)
+
+    assert (shifted.start, shifted.end, shifted.text) == (11.0, 12.5, "x")